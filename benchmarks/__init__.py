@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks for npyscreen2.
+
+The benchmarks in this package run against the headless backend (see
+`npyscreen2.backends`), so they need no terminal and may be run on a build box:
+
+    python -m benchmarks.render --output before.json
+    python -m benchmarks.render --output after.json
+    python -m benchmarks.compare before.json after.json
+
+`keys.py` likewise measures the dispatch of keys to their handlers, and
+`ring.py` the samples passing from a producer process through a shared memory
+ring buffer (see `npyscreen2.ring_buffer`) to the Gauges of a Form.
+
+`drawing_calls.py` is an older script which must be run in a terminal.
+"""
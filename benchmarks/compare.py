@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compares two sets of results written by a benchmark, printing for each
+measurement the old and new values and the ratio new/old; below 1 is faster
+(or smaller), except for rates (ending in _per_s) where above 1 is faster.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _value(result, key):
+    value = result.get(key)
+    if isinstance(value, dict):
+        value = value.get('median')
+    return value
+
+
+def compare(old, new, out=sys.stdout):
+    keys = [key for key, value in new['results'][0].items()
+            if key.endswith(('_s', '_kib', '_per_s'))]
+    old_results = {(r.get('layout'), r.get('requested')): r
+                   for r in old['results']}
+    out.write('old: {0}\nnew: {1}\n\n'.format(old.get('revision'),
+                                              new.get('revision')))
+    for result in new['results']:
+        name = (result.get('layout'), result.get('requested'))
+        previous = old_results.get(name)
+        if previous is None:
+            continue
+        out.write('{0} {1}\n'.format(*name))
+        for key in keys:
+            a, b = _value(previous, key), _value(result, key)
+            if a is None or b is None:
+                continue
+            ratio = b / a if a else float('inf')
+            out.write('    {0:<20} {1:>14.6g} {2:>14.6g} {3:>8.3f}\n'.format(key, a, b, ratio))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    args = parser.parse_args(argv)
+    with open(args.old) as inf:
+        old = json.load(inf)
+    with open(args.new) as inf:
+        new = json.load(inf)
+    compare(old, new)
+
+
+if __name__ == '__main__':
+    main()
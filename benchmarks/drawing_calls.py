@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""
+Micro-benchmark counting the calls made to the curses pad while drawing one
+full frame of a bordered Form, using the drawing primitives of Widget, and
+using the character-at-a-time drawing they replaced.
+
+Must be run in a terminal; the results are printed after curses exits.
+"""
+
+import curses
+import sys
+import time
+
+import npyscreen2
+from npyscreen2.widgets import Widget, BorderBox
+
+
+class CountingPad(object):
+    """
+    Wraps a curses pad, counting the calls made to each of its methods. Calls
+    made to windows derived from it are counted too.
+    """
+    def __init__(self, pad, counts=None):
+        self._pad = pad
+        self.counts = {} if counts is None else counts
+
+    def __getattr__(self, name):
+        method = getattr(self._pad, name)
+
+        def counted(*args):
+            self.counts[name] = self.counts.get(name, 0) + 1
+            result = method(*args)
+            if name == 'subpad':
+                result = CountingPad(result, self.counts)
+            return result
+        return counted
+
+    def total(self):
+        return sum(self.counts.values())
+
+
+#The drawing methods as they were before the primitives were introduced
+def legacy_clear(self, usechar=' '):
+    for y in range(self.rely, self.rely + self.height):
+        if self.do_colors():
+            self.addstr(y, self.relx, usechar * (self.width),
+                        self.form.theme_manager.find_pair(self,
+                                                          self.form.color))
+        else:
+            self.addstr(y, self.relx, usechar * (self.width))
+
+
+def legacy_hline(self, y, x, ch, n, attr=None):
+    attr = self.get_text_attr()
+    for i in range(n):
+        self.addch(y, x + i, ch, attr)
+
+
+def legacy_vline(self, y, x, ch, n, attr=None):
+    attr = self.get_text_attr()
+    for i in range(n):
+        self.addch(y + i, x, ch, attr)
+
+
+def legacy_print_borders(self, blank=False):
+    if blank:
+        hbar_char = vbar_char = ' '
+        ul_c_char = ur_c_char = ll_c_char = lr_c_char = ' '
+    else:
+        hbar_char = curses.ACS_HLINE
+        vbar_char = curses.ACS_VLINE
+        ul_c_char = curses.ACS_ULCORNER
+        ur_c_char = curses.ACS_URCORNER
+        ll_c_char = curses.ACS_LLCORNER
+        lr_c_char = curses.ACS_LRCORNER
+    ul_y, ul_x = self.rely, self.relx
+    if self._top:
+        self.hline(ul_y, ul_x, hbar_char, self.width)
+    if self._bottom:
+        self.hline(ul_y + self.height - 1, ul_x, hbar_char, self.width)
+    if self._left:
+        self.vline(ul_y, ul_x, vbar_char, self.height)
+    if self._right:
+        self.vline(ul_y, ul_x + self.width - 1, vbar_char, self.height)
+    if self._top and self._left:
+        self.addch(ul_y, ul_x, ul_c_char)
+    if self._top and self._right:
+        self.addch(ul_y, ul_x + self.width - 1, ur_c_char)
+    if self._bottom and self._left:
+        self.addch(ul_y + self.height - 1, ul_x, ll_c_char)
+    if self._bottom and self._right:
+        self.addch(ul_y + self.height - 1, ul_x + self.width - 1, lr_c_char)
+
+
+LEGACY = {(Widget, 'clear'): legacy_clear,
+          (Widget, 'hline'): legacy_hline,
+          (Widget, 'vline'): legacy_vline,
+          (BorderBox, 'print_borders'): legacy_print_borders}
+
+
+class BoxGrid(npyscreen2.GridContainer):
+    """
+    A GridContainer surrounded by a BorderBox.
+    """
+    def __init__(self, *args, **kwargs):
+        super(BoxGrid, self).__init__(*args, **kwargs)
+        self.border = self.add_widget(BorderBox,
+                                      widget_id='border',
+                                      preserve_instantiation_dimensions=False,
+                                      auto_manage=False)
+
+    def resize(self):
+        self.border.multi_set(rely=self.rely,
+                              relx=self.relx,
+                              max_height=self.max_height,
+                              max_width=self.max_width)
+
+
+class BenchForm(npyscreen2.TraditionalForm):
+    def __init__(self, *args, **kwargs):
+        super(BenchForm, self).__init__(*args, **kwargs)
+        self.grid = self.add_widget(npyscreen2.GridContainer,
+                                    rows=4,
+                                    cols=5,
+                                    preserve_instantiation_dimensions=False,
+                                    hide_partially_visible=False)
+        for i in range(self.grid.rows * self.grid.cols):
+            box = self.grid.add_widget(BoxGrid, rows=3, cols=3, margin=1)
+            for j in range(9):
+                box.add_widget(npyscreen2.TextField, value=str(j))
+
+
+def measure_frame(form, repeats=20):
+    """
+    Returns the calls to the pad per full frame, by method, and the time taken
+    per frame in milliseconds.
+    """
+    pad = form.curses_pad
+    counting = CountingPad(pad)
+    form.curses_pad = counting
+    form.mark_dirty()
+    form._update()
+    counts = counting.counts
+    form.curses_pad = pad
+
+    start = time.time()
+    for i in range(repeats):
+        form.mark_dirty()
+        form._update()
+    elapsed = (time.time() - start) / repeats * 1000
+    return counts, elapsed
+
+
+class BenchApp(npyscreen2.NPSApp):
+    def main(self):
+        form = self.add_form(BenchForm, 'MAIN', framed=True)
+        form._resize()
+
+        self.results = {}
+        self.results['primitives'] = measure_frame(form)
+
+        current = dict((key, getattr(*key)) for key in LEGACY)
+        for (cls, name), func in LEGACY.items():
+            setattr(cls, name, func)
+        try:
+            self.results['per-cell'] = measure_frame(form)
+        finally:
+            for (cls, name), func in current.items():
+                setattr(cls, name, func)
+
+
+def main():
+    app = BenchApp()
+    app.run(fork=False)
+    for label in ('per-cell', 'primitives'):
+        counts, elapsed = app.results[label]
+        summary = ', '.join('{0}={1}'.format(name, count)
+                            for name, count in sorted(counts.items()))
+        sys.stdout.write('{0:>10}: {1:6d} pad calls per frame, {2:7.2f} ms \
+({3})\n'.format(label, sum(counts.values()), elapsed, summary))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Key dispatch benchmark: measures how many keys per second reach their handlers
+from a TextField nested in Containers `--depths` deep (6 by default), for
+keys handled at each end of the chain:
+
+    leaf_keys_per_s     printable keys, inserted by the TextField
+    form_keys_per_s     a key bound on the Form, found by walking every level
+    unbound_keys_per_s  a key which nothing handles
+
+Keys are passed to the TextField's handle_input as they would be after being
+read, so nothing is drawn. Each figure is the maximum and median of `--repeat`
+runs of `--keys` keys. Everything runs against the headless backend and the
+results are written as JSON, see compare.py.
+"""
+
+import argparse
+import curses
+import json
+import platform
+import statistics
+import sys
+import time
+
+import npyscreen2
+from npyscreen2 import backends
+
+from .render import git_revision
+
+
+DEPTHS = (6,)
+
+
+def nest(form, depth):
+    """
+    Adds `depth` Containers, each inside the last, and returns a TextField
+    added to the innermost.
+    """
+    container = form
+    for i in range(depth):
+        container = container.add(npyscreen2.Container)
+    return container.add(npyscreen2.TextField, height=1)
+
+
+def rate(function, keys, repeat):
+    rates = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        rates.append(keys / (time.perf_counter() - start))
+    return {'max': max(rates), 'median': statistics.median(rates)}
+
+
+class BenchmarkApp(npyscreen2.NPSApp):
+    """
+    Runs the measurements in place of the usual main loop.
+    """
+    def __init__(self, depths, keys, repeat):
+        super(BenchmarkApp, self).__init__()
+        self.depths = depths
+        self.keys = keys
+        self.repeat = repeat
+        self.results = []
+
+    def main(self):
+        for depth in self.depths:
+            result = self.measure(depth)
+            self.results.append(result)
+            sys.stderr.write('{0:>4} deep  leaf {1[median]:.0f}/s  form {2[median]:.0f}/s  unbound {3[median]:.0f}/s\n'.format(
+                depth, result['leaf_keys_per_s'], result['form_keys_per_s'],
+                result['unbound_keys_per_s']))
+
+    def measure(self, depth):
+        form = npyscreen2.TraditionalForm(parent_app=self, framed=True)
+        form.add_handlers({curses.KEY_F2: lambda inpt: None})
+        field = nest(form, depth)
+        keys = self.keys
+
+        def leaf():
+            handle_input = field.handle_input
+            for i in range(keys):
+                handle_input(97)  # 'a'
+            field.value = ''
+            field.cursor_position = 0
+
+        def to_form():
+            handle_input = field.handle_input
+            for i in range(keys):
+                handle_input(curses.KEY_F2)
+
+        def unbound():
+            handle_input = field.handle_input
+            for i in range(keys):
+                handle_input(curses.KEY_F10)
+
+        #As set by Widget._get_ch on reading a key
+        field._last_get_ch_was_unicode = False
+        field.cursor_position = 0
+        result = {'layout': 'nested',
+                  'requested': depth,
+                  'keys': keys,
+                  'leaf_keys_per_s': rate(leaf, keys, self.repeat),
+                  'form_keys_per_s': rate(to_form, keys, self.repeat),
+                  'unbound_keys_per_s': rate(unbound, keys, self.repeat)}
+        form.release_pad()
+        return result
+
+
+def run(depths=DEPTHS, keys=20000, repeat=10):
+    """
+    Runs the benchmark and returns the results as a dictionary.
+    """
+    app = BenchmarkApp(depths, keys, repeat)
+    app.run(backend=backends.HeadlessBackend())
+    return {'benchmark': 'keys',
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': repeat,
+            'results': app.results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--depths', nargs='+', type=int, default=list(DEPTHS))
+    parser.add_argument('--keys', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--output', default='-',
+                        help='file to write the JSON results to, - for stdout')
+    args = parser.parse_args(argv)
+
+    results = run(args.depths, args.keys, args.repeat)
+    if args.output == '-':
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Render benchmark: builds Forms of 10 to 10,000 widgets in each of several
+layouts and measures, for each Form:
+
+    build_s           instantiating the Form and adding its widgets
+    resize_s          Form._resize()
+    full_display_s    Form.display() after the whole Form was marked dirty
+    widget_display_s  Widget.display() after one visible widget was marked dirty
+    peak_memory_kib   peak memory allocated while building, resizing and
+                      displaying the Form, measured in a separate build
+
+Times are given as the minimum and median of `--repeat` runs, along with the
+number of widgets drawn. The layouts are:
+
+    traditional  TextFields stacked by a TraditionalForm
+    grid         TextFields in a GridContainer of 10 columns
+    smart        TextFields packed by a SmartContainer
+    titled       TitledFields (each a Container of two TextFields)
+
+Everything runs against the headless backend, at the screen size given by
+`--height` and `--width`. The results are written as JSON, see compare.py.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import npyscreen2
+from npyscreen2 import backends
+
+
+def build_traditional(form, count):
+    for i in range(count):
+        form.add(npyscreen2.TextField, value='field {0}'.format(i), height=1)
+
+
+def build_grid(form, count):
+    grid = form.add(npyscreen2.GridContainer,
+                    rows=(count + 9) // 10,
+                    cols=10,
+                    hide_partially_visible=False)
+    for i in range(count):
+        grid.add(npyscreen2.TextField, value='cell {0}'.format(i))
+
+
+def build_smart(form, count):
+    smart = form.add(npyscreen2.SmartContainer)
+    for i in range(count):
+        smart.add(npyscreen2.TextField,
+                  value='box {0}'.format(i),
+                  height=1,
+                  width=12)
+
+
+def build_titled(form, count):
+    #A TitledField is three widgets: itself, its title and its field
+    for i in range(max(count // 3, 1)):
+        form.add(npyscreen2.TitledField,
+                 title_value='Title {0}:'.format(i),
+                 field_value='value',
+                 height=1)
+
+
+LAYOUTS = {'traditional': build_traditional,
+           'grid': build_grid,
+           'smart': build_smart,
+           'titled': build_titled}
+
+COUNTS = (10, 100, 1000, 10000)
+
+
+def count_widgets(container):
+    total = 0
+    for widget in container.contained:
+        total += 1
+        if isinstance(widget, npyscreen2.Container):
+            total += count_widgets(widget)
+    return total
+
+
+def first_visible_leaf(container):
+    for widget in container.visible_contained():
+        if isinstance(widget, npyscreen2.Container):
+            leaf = first_visible_leaf(widget)
+            if leaf is not None:
+                return leaf
+        else:
+            return widget
+    return None
+
+
+def timed(function, repeat):
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times)}
+
+
+class BenchmarkApp(npyscreen2.NPSApp):
+    """
+    Runs the measurements in place of the usual main loop.
+    """
+    def __init__(self, layouts, counts, repeat):
+        super(BenchmarkApp, self).__init__()
+        self.layouts = layouts
+        self.counts = counts
+        self.repeat = repeat
+        self.results = []
+
+    def main(self):
+        for layout in self.layouts:
+            for count in self.counts:
+                result = self.measure(layout, count)
+                self.results.append(result)
+                sys.stderr.write('{layout:>12} {widgets:>6}  full {full_display_s[median]:.6f}s  widget {widget_display_s[median]:.6f}s  resize {resize_s[median]:.6f}s\n'.format(**result))
+
+    def build(self, layout, count):
+        form = npyscreen2.TraditionalForm(parent_app=self, framed=True)
+        LAYOUTS[layout](form, count)
+        return form
+
+    def measure(self, layout, count):
+        start = time.perf_counter()
+        form = self.build(layout, count)
+        build = time.perf_counter() - start
+
+        resize = timed(form._resize, self.repeat)
+
+        def full_display():
+            form.mark_dirty()
+            form.display()
+        full = timed(full_display, self.repeat)
+        full_drawn = form.widgets_redrawn
+
+        widget = first_visible_leaf(form)
+
+        def widget_display():
+            widget.mark_dirty()
+            widget.display()
+        if widget is None:
+            single, single_drawn = None, 0
+        else:
+            single = timed(widget_display, self.repeat)
+            single_drawn = form.widgets_redrawn
+
+        widgets = count_widgets(form)
+        form.release_pad()
+        del form, widget
+        gc.collect()
+
+        #Tracing allocations slows everything down, so memory is measured on
+        #a second build
+        tracemalloc.start()
+        form = self.build(layout, count)
+        form._resize()
+        form.display()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        form.release_pad()
+        del form
+        gc.collect()
+
+        return {'layout': layout,
+                'requested': count,
+                'widgets': widgets,
+                'build_s': build,
+                'resize_s': resize,
+                'full_display_s': full,
+                'full_display_drawn': full_drawn,
+                'widget_display_s': single,
+                'widget_display_drawn': single_drawn,
+                'peak_memory_kib': peak / 1024.0}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                       stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(layouts=tuple(LAYOUTS), counts=COUNTS, repeat=20, height=50,
+        width=160):
+    """
+    Runs the benchmark and returns the results as a dictionary.
+    """
+    app = BenchmarkApp(layouts, counts, repeat)
+    app.run(backend=backends.HeadlessBackend(height, width))
+    return {'benchmark': 'render',
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'screen': [height, width],
+            'repeat': repeat,
+            'results': app.results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--layouts', nargs='+', choices=sorted(LAYOUTS),
+                        default=list(LAYOUTS))
+    parser.add_argument('--counts', nargs='+', type=int, default=list(COUNTS))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--height', type=int, default=50)
+    parser.add_argument('--width', type=int, default=160)
+    parser.add_argument('--output', default='-',
+                        help='file to write the JSON results to, - for stdout')
+    args = parser.parse_args(argv)
+
+    results = run(args.layouts, args.counts, args.repeat, args.height,
+                  args.width)
+    if args.output == '-':
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Ring buffer benchmark: measures samples passing through a shared memory
+RingBuffer (see npyscreen2.ring_buffer) of 1 to 16 channels, written by a
+LocalProducer in a child process as fast as it can:
+
+    write_per_s     samples written per second by this process, alone
+    produced_per_s  samples written per second by the child process while
+                    this one reads them
+    read_per_s      samples read per second with read_since, while they are
+                    being written
+    latest_per_s    calls per second of latest, while samples are written
+    frames_per_s    Form frames per second, each publishing the latest sample
+                    to `--gauges` Gauges through a RingBufferSource
+
+along with the fraction of samples lost by the reader for being overwritten
+first. Each rate is the maximum and median of `--repeat` runs of `--seconds`
+seconds. Everything runs against the headless backend and the results are
+written as JSON, see compare.py.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+
+import npyscreen2
+from npyscreen2 import backends
+from npyscreen2.ring_buffer import RingBuffer, RingBufferSource, LocalProducer
+
+from .render import git_revision
+
+
+CHANNELS = (1, 4, 16)
+
+#The producer's samples, counting up so that gaps can be seen
+_counter = itertools.count()
+
+
+class Sample(object):
+    """
+    Returns samples of `channels` values; picklable, for the spawn start
+    method.
+    """
+    def __init__(self, channels):
+        self.channels = channels
+
+    def __call__(self):
+        return (float(next(_counter)),) * self.channels
+
+
+def rates(function, seconds, repeat):
+    """
+    Calls `function` with the time at which to stop, `repeat` times; it returns
+    how many things it did, and the rates are returned.
+    """
+    results = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        done = function(start + seconds)
+        results.append(done / (time.perf_counter() - start))
+    return {'max': max(results), 'median': statistics.median(results)}
+
+
+class BenchmarkApp(npyscreen2.NPSApp):
+    """
+    Runs the measurements in place of the usual main loop.
+    """
+    def __init__(self, channels, gauges, capacity, seconds, repeat):
+        super(BenchmarkApp, self).__init__()
+        self.channels = channels
+        self.gauges = gauges
+        self.capacity = capacity
+        self.seconds = seconds
+        self.repeat = repeat
+        self.results = []
+
+    def main(self):
+        for channels in self.channels:
+            result = self.measure(channels)
+            self.results.append(result)
+            sys.stderr.write('{requested:>4} ch  write {write_per_s[median]:.0f}/s  produced {produced_per_s[median]:.0f}/s  read {read_per_s[median]:.0f}/s  latest {latest_per_s[median]:.0f}/s  frames {frames_per_s[median]:.0f}/s  lost {lost_fraction:.3f}\n'.format(**result))
+
+    def measure(self, channels):
+        capacity = self.capacity
+        sample = (0.0,) * channels
+
+        ring = RingBuffer.create(channels=channels, capacity=capacity)
+
+        def write(stop):
+            done = 0
+            while time.perf_counter() < stop:
+                for i in range(1000):
+                    ring.write(sample)
+                done += 1000
+            return done
+        write_rate = rates(write, self.seconds, self.repeat)
+        ring.close()
+        ring.unlink()
+
+        producer = LocalProducer(Sample(channels), channels=channels,
+                                 capacity=capacity, interval=0).start()
+        ring = producer.ring
+        #Until the child process is writing
+        while not ring.count:
+            time.sleep(0.01)
+        #The samples written during each run of read, and how long it took
+        produced = []
+
+        def read(stop):
+            start = time.perf_counter()
+            before = cursor = ring.count
+            done = 0
+            while time.perf_counter() < stop:
+                cursor, samples = ring.read_since(cursor)
+                done += len(samples)
+            produced.append((ring.count - before, time.perf_counter() - start))
+            return done
+        read_rate = rates(read, self.seconds, self.repeat)
+        lost = ring.lost
+
+        def latest(stop):
+            done = 0
+            while time.perf_counter() < stop:
+                for i in range(1000):
+                    ring.latest()
+                done += 1000
+            return done
+        latest_rate = rates(latest, self.seconds, self.repeat)
+
+        form = npyscreen2.TraditionalForm(parent_app=self, framed=True)
+        #A ttl of almost nothing, so that every frame reads the latest sample
+        source = RingBufferSource(ring, ttl=1e-9, name='ring')
+        for i in range(self.gauges):
+            gauge = form.add(npyscreen2.Gauge, height=1,
+                             max_val=float(1 << 53))
+            gauge.subscribe(source, i % channels)
+        form.display()
+
+        def frames(stop):
+            done = 0
+            while time.perf_counter() < stop:
+                form.run_due()
+                form.display()
+                done += 1
+            return done
+        frame_rate = rates(frames, self.seconds, self.repeat)
+        form.release_pad()
+        producer.stop()
+
+        produced_rates = [count / seconds for count, seconds in produced]
+
+        return {'layout': 'ring',
+                'requested': channels,
+                'capacity': capacity,
+                'gauges': self.gauges,
+                'write_per_s': write_rate,
+                'produced_per_s': {'max': max(produced_rates),
+                                   'median': statistics.median(produced_rates)},
+                'read_per_s': read_rate,
+                'latest_per_s': latest_rate,
+                'frames_per_s': frame_rate,
+                'lost_fraction': lost / max(sum(count for count, seconds
+                                                in produced), 1)}
+
+
+def run(channels=CHANNELS, gauges=20, capacity=4096, seconds=0.5, repeat=5):
+    """
+    Runs the benchmark and returns the results as a dictionary.
+    """
+    app = BenchmarkApp(channels, gauges, capacity, seconds, repeat)
+    app.run(backend=backends.HeadlessBackend())
+    return {'benchmark': 'ring',
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': repeat,
+            'results': app.results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--channels', nargs='+', type=int,
+                        default=list(CHANNELS))
+    parser.add_argument('--gauges', type=int, default=20)
+    parser.add_argument('--capacity', type=int, default=4096)
+    parser.add_argument('--seconds', type=float, default=0.5)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default='-',
+                        help='file to write the JSON results to, - for stdout')
+    args = parser.parse_args(argv)
+
+    results = run(args.channels, args.gauges, args.capacity, args.seconds,
+                  args.repeat)
+    if args.output == '-':
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
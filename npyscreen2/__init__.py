@@ -16,16 +16,27 @@ npyscreen2 author: Paul Barton (SavinaRoja)
 
 from .safe_wrapper import wrapper, wrapper_basic
 
+from .backends import CursesBackend, HeadlessBackend
+
 from .app import NPSApp, App, NPSAppAdvanced, AppAdvanced
 
+from .async_app import AsyncApp
+
 from .widgets import Widget, NotEnoughSpaceForWidget, BorderBox, TextField, \
-                     Gauge
+                     Gauge, ListView
 
 from .containers import Container, GridContainer, SmartContainer, TitledField
 
 from .forms import Form, set_theme, get_theme, TraditionalForm
 
-from .logs import activate_logging, add_rotating_file_handler
+from .models import Observable, ObservableList, ObservableDict
+
+from .feeds import FeedExecutor
+
+from .sources import DataSource, SourceRegistry
+
+from .logs import activate_logging, add_rotating_file_handler, \
+                   enable_tracing, disable_tracing
 
 from . import themes
 from . import theme_managers
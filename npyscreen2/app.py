@@ -1,13 +1,22 @@
 # -*- coding: utf-8 -*-
 
 import curses
+import threading
 import weakref
 
-from . import safe_wrapper
+from . import backends
+from . import logs
+from . import timers
+from .dispatch import FocusPath
+from .input_reader import InputReader
+from .pad_pool import PadPool
 
 import logging
 log = logging.getLogger('npyscreen2.app')
 
+#Guards the creation of Wakers, which other threads may cause by posting
+_WAKER_LOCK = threading.Lock()
+
 
 class NPSApp(object):
     """
@@ -52,31 +61,78 @@ class NPSApp(object):
 
     STARTING_FORM = "MAIN"
 
-    def __init__(self, keypress_timeout_default=None):
+    #The timers.Waker shared by the application's Forms, see waker
+    _waker = None
+
+    def __init__(self, keypress_timeout_default=None, feed_executor=None,
+                 sources=None):
         log.info('Instantiating NPSApp')
         self.keypress_timeout_default = keypress_timeout_default
         log.debug('NPSApp.keypress_timeout_default set to: {0}'.format(self.keypress_timeout_default))
+        #A feeds.FeedExecutor running the feeds of the application's Forms in
+        #worker threads, or None to call them on this thread
+        self.feed_executor = feed_executor
+        #A sources.SourceRegistry of the DataSources shared by the Widgets of
+        #the application's Forms
+        self.sources = sources
         self._FORM_VISIT_LIST = []
         self.NEXT_ACTIVE_FORM = self.__class__.STARTING_FORM
         self._LAST_NEXT_ACTIVE_FORM = None
         self._Forms = {}
+        #The curses pads are shared by all Forms of the application
+        self.pad_pool = PadPool()
+        #As is the InputReader, so that keys typed ahead of a change of Form
+        #reach the next one
+        self.input_reader = InputReader()
 
     def __remove_argument_call_main(self, screen, enable_mouse=True):
         if enable_mouse:
-            curses.mousemask(curses.ALL_MOUSE_EVENTS)
+            backends.get_backend().mousemask(curses.ALL_MOUSE_EVENTS)
         del screen
         return self.main()
 
-    def run(self, fork=None):
+    def run(self, fork=None, backend=None):
         log.info('NPSApp.run called; fork={0}'.format(fork))
         """
         Run application. Calls Mainloop (`main` method) wrapped properly.
+
+        By default the application runs in the terminal. Pass a
+        `backends.HeadlessBackend` as `backend` to run it in memory instead,
+        reading keys from the backend's script; the snapshots of the screen
+        taken at each update are returned.
         """
-        if fork is None:
-            return safe_wrapper.wrapper(self.__remove_argument_call_main)
-        else:
-            return safe_wrapper.wrapper(self.__remove_argument_call_main,
-                                        fork=fork)
+        if backend is None:
+            backend = backends.get_backend()
+        try:
+            return backend.wrapper(self.__remove_argument_call_main, fork=fork)
+        except Exception:
+            logs.crash_dump()
+            raise
+        finally:
+            self.close_waker()
+
+    @property
+    def waker(self):
+        """
+        The timers.Waker interrupting the wait for input of whichever of the
+        application's Forms is waiting. There is one for the application, made
+        when first needed, rather than a pipe for each Form.
+        """
+        if self._waker is None:
+            with _WAKER_LOCK:
+                if self._waker is None:
+                    self._waker = timers.Waker()
+        return self._waker
+
+    def close_waker(self):
+        """
+        Close the application's Waker, which `run` does on returning; another
+        is made if it is needed again.
+        """
+        with _WAKER_LOCK:
+            waker, self._waker = self._waker, None
+        if waker is not None:
+            waker.close()
 
     def add_form_class(self, form_class, form_id, *args, **kwargs):
         log.debug('''NPSApp.add_form_class called: form_class={}, form_id={}, \
@@ -204,28 +260,37 @@ args={2}, kwargs={3}'''.format(form_id, form_class, args, kwargs))
 
         self.on_start()
         while self.NEXT_ACTIVE_FORM is not None:
-            self._LAST_NEXT_ACTIVE_FORM = self._Forms[self.NEXT_ACTIVE_FORM]
-            self.LAST_ACTIVE_FORM_NAME = self.NEXT_ACTIVE_FORM
-            try:
-                Fm, a, k = self._Forms[self.NEXT_ACTIVE_FORM]
-                self._THISFORM = Fm( parent_app = self, *a, **k )
-            except TypeError:
-                self._THISFORM = self._Forms[self.NEXT_ACTIVE_FORM]
-            self._THISFORM.FORM_NAME = self.NEXT_ACTIVE_FORM
-            self.ACTIVE_FORM_NAME = self.NEXT_ACTIVE_FORM
-            if len(self._FORM_VISIT_LIST) > 0:
-                if self._FORM_VISIT_LIST[-1] != self.NEXT_ACTIVE_FORM:
-                    self._FORM_VISIT_LIST.append(self.NEXT_ACTIVE_FORM)
-            else:
-                self._FORM_VISIT_LIST.append(self.NEXT_ACTIVE_FORM)
-            self._THISFORM._resize()
-            self._THISFORM.activate()
+            self._start_next_form()
             self._THISFORM.edit()
-            self._THISFORM.deactivate()
-
-            self.on_in_main_loop()
+            self._end_form()
         self.on_clean_exit()
 
+    def _start_next_form(self):
+        #Make the Form named by NEXT_ACTIVE_FORM the active Form, ready to edit
+        self._LAST_NEXT_ACTIVE_FORM = self._Forms[self.NEXT_ACTIVE_FORM]
+        self.LAST_ACTIVE_FORM_NAME = self.NEXT_ACTIVE_FORM
+        try:
+            Fm, a, k = self._Forms[self.NEXT_ACTIVE_FORM]
+            self._THISFORM = Fm( parent_app = self, *a, **k )
+        except TypeError:
+            self._THISFORM = self._Forms[self.NEXT_ACTIVE_FORM]
+        self._THISFORM.FORM_NAME = self.NEXT_ACTIVE_FORM
+        self.ACTIVE_FORM_NAME = self.NEXT_ACTIVE_FORM
+        if len(self._FORM_VISIT_LIST) > 0:
+            if self._FORM_VISIT_LIST[-1] != self.NEXT_ACTIVE_FORM:
+                self._FORM_VISIT_LIST.append(self.NEXT_ACTIVE_FORM)
+        else:
+            self._FORM_VISIT_LIST.append(self.NEXT_ACTIVE_FORM)
+        self._THISFORM._resize()
+        self._THISFORM.activate()
+
+    def _end_form(self):
+        #The active Form has finished editing
+        self._THISFORM.deactivate()
+        #Another Form may use the pad while this one is inactive
+        self._THISFORM.release_pad()
+        self.on_in_main_loop()
+
     def on_in_main_loop(self):
         """
         Called between each screen while the application is running. Not called
@@ -249,13 +314,50 @@ args={2}, kwargs={3}'''.format(form_id, form_class, args, kwargs))
 
 class NPSAppAdvanced(NPSApp):
     """
-    EXPERIMENTAL and NOT for use.  This class of application will eventually
-    replace the standard method of user input handling and deal with everything
-    at the application level.
+    An application which handles input for its Forms itself, in a single loop,
+    rather than through the nested edit loops of the Form, its Containers and
+    Widgets.
+
+    Each time input arrives, everything typed is read at once and handed to
+    the focused Widget key by key; focus moves between Widgets as a change of
+    state in a dispatch.FocusPath rather than by returning from one edit loop
+    to another, and the Form is displayed once for the whole batch. The same
+    handlers and edit hooks are called as by the edit loops, however deeply
+    the Widgets are nested, but Widgets overriding `edit` or `edit_loop` are
+    not supported.
     """
 
+    def main(self):
+        self.on_start()
+        while self.NEXT_ACTIVE_FORM is not None:
+            self._start_next_form()
+            self._main_loop()
+            self._end_form()
+        self.on_clean_exit()
+
     def _main_loop(self):
-        pass
+        #Edit the active Form until it is done
+        form = self._THISFORM
+        backend = backends.get_backend()
+        backend.raw()
+        backend.cbreak()
+        backend.meta(1)
+        form.curses_pad.keypad(1)
+
+        self.focus = focus = FocusPath(form, render=False)
+        focus.start()
+        while not focus.done:
+            form.display()
+            form.commit_frame()
+            ch = focus.focus._wait_for_key()
+            if ch == -1:
+                focus.while_waiting()
+                continue
+            focus.dispatch_key(focus.focus._alt_key(ch))
+            #Reading the key read everything else already typed as well
+            focus.dispatch_pending()
+        form.display()
+        form.commit_frame()
 
 App = NPSApp
 AppAdvanced = NPSAppAdvanced
\ No newline at end of file
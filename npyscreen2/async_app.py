@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+
+"""
+An application run by an asyncio event loop.
+
+An NPSApp spends its time blocked in `getch`, waking every `keypress_timeout`
+at best to call `while_waiting`, where data from elsewhere must be polled for.
+An AsyncApp instead watches the terminal with the event loop's `add_reader`,
+handing each key to the focused Widget through a FocusPath, so the same
+handlers and edit hooks are used, and leaves the loop free to run other tasks
+in between. Widget feeds may then be coroutine functions or asynchronous
+generator functions:
+
+    async def tail():
+        async for line in process.stdout:
+            yield line.decode()
+
+    widget.feed = tail
+
+Each value a feed produces becomes the value of its Widget, and the Form is
+drawn once for all of the values which arrive together, as soon as they do.
+Nothing happens while nothing arrives, there is no periodic tick. Threads
+outside the loop change Widgets with `Form.post` and `Widget.post_value`, which
+wake the loop in the same way.
+"""
+
+import asyncio
+import inspect
+import signal
+
+from . import backends
+from . import logs
+from .app import NPSApp
+from .containers import Container
+from .dispatch import FocusPath
+
+import logging
+log = logging.getLogger('npyscreen2.async_app')
+
+__all__ = ['AsyncApp']
+
+
+class AsyncApp(NPSApp):
+    """
+    An NPSApp whose Forms are edited from an asyncio event loop, see the
+    module documentation. `run` starts a new event loop; from a coroutine,
+    await `main_async` instead, inside the backend's wrapper.
+
+    Override `on_start_async` to start tasks of your own, which may use
+    `request_frame` to have the screen redrawn after changing Widgets.
+    """
+    def __init__(self, *args, **kwargs):
+        super(AsyncApp, self).__init__(*args, **kwargs)
+        #The FocusPath of the Form being edited
+        self.focus = None
+        self._loop = None
+        self._done = None
+        self._feed_tasks = {}
+        self._frame_handle = None
+        self._waiting_handle = None
+        self._input_handle = None
+        self._timers_handle = None
+
+    def main(self):
+        return asyncio.run(self.main_async())
+
+    async def main_async(self):
+        """
+        The coroutine version of `main`, editing each Form in turn.
+        """
+        self.on_start()
+        await self.on_start_async()
+        while self.NEXT_ACTIVE_FORM is not None:
+            self._start_next_form()
+            await self.edit_form(self._THISFORM)
+            self._end_form()
+        self.on_clean_exit()
+
+    async def on_start_async(self):
+        """
+        Override this coroutine to perform any asynchronous initialisation; it
+        is awaited after `on_start`.
+        """
+        pass
+
+    async def edit_form(self, form):
+        """
+        Edit `form` until it is done, as its `edit` method would.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._done = self._loop.create_future()
+        backend = backends.get_backend()
+        backend.raw()
+        backend.cbreak()
+        backend.meta(1)
+        form.curses_pad.keypad(1)
+
+        self.focus = FocusPath(form, render=False)
+        self.focus.start()
+        #Results from feeds running in threads are drawn as they arrive
+        executor = form.feed_executor
+        if executor is not None:
+            executor.wakeup = self._wake_threadsafe
+        #As are updates posted to the Form from other threads
+        waker = form.waker
+        self._loop.add_reader(waker.fileno(), self._posted_ready)
+        for widget in _walk(form):
+            if widget.async_feed:
+                self.start_feed(widget)
+
+        fd = backend.input_fd()
+        if fd is not None:
+            self._loop.add_reader(fd, self._input_ready)
+            self._watch_resize(True)
+        else:
+            self._input_handle = self._loop.call_soon(self._read_script)
+        self._settled()
+        try:
+            await self._done
+        finally:
+            if executor is not None:
+                executor.wakeup = None
+            self._loop.remove_reader(waker.fileno())
+            if fd is not None:
+                self._loop.remove_reader(fd)
+                self._watch_resize(False)
+            for handle in (self._input_handle, self._waiting_handle,
+                           self._frame_handle, self._timers_handle):
+                if handle is not None:
+                    handle.cancel()
+            self._input_handle = self._waiting_handle = None
+            self._frame_handle = self._timers_handle = None
+            tasks = list(self._feed_tasks.values())
+            self._feed_tasks.clear()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start_feed(self, widget):
+        """
+        Start running the asynchronous feed of `widget`, for a Widget added or
+        given a feed while its Form is being edited. A feed already running for
+        the Widget is cancelled.
+        """
+        self.stop_feed(widget)
+        task = self._loop.create_task(self._run_feed(widget))
+        self._feed_tasks[id(widget)] = task
+        return task
+
+    def stop_feed(self, widget):
+        task = self._feed_tasks.pop(id(widget), None)
+        if task is not None:
+            task.cancel()
+
+    def request_frame(self):
+        """
+        Draw the Form and update the screen once the current batch of events
+        has been handled. Any number of requests before then make one frame.
+        """
+        if self._frame_handle is None and self._loop is not None:
+            self._frame_handle = self._loop.call_soon(self._draw_frame)
+
+    def _wake_threadsafe(self):
+        #From another thread
+        self._loop.call_soon_threadsafe(self.request_frame)
+
+    def _posted_ready(self):
+        #The Form's Waker, written to by Form.post from another thread
+        self.focus.form.waker.clear()
+        self.request_frame()
+
+    def _draw_frame(self):
+        self._frame_handle = None
+        if self.focus is None or self.focus.done:
+            return
+        try:
+            self.focus.form.display()
+        except Exception as error:
+            self._fail(error)
+            return
+        self.focus.form.commit_frame()
+
+    async def _run_feed(self, widget):
+        #A coroutine function is awaited again for each value, so it should
+        #wait for something, such as data arriving, each time it is called
+        feed = widget.feed_function
+        start = _clock()
+        try:
+            if inspect.isasyncgenfunction(feed):
+                async for value in feed():
+                    self._feed_value(widget, value, start)
+                    start = _clock()
+            else:
+                while True:
+                    value = await feed()
+                    self._feed_value(widget, value, start)
+                    start = _clock()
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            if start is not None and logs.TRACER is not None:
+                logs.TRACER.feed_done(widget, start, error)
+            self._fail(error)
+        widget.live = False
+
+    def _feed_value(self, widget, value, start):
+        if start is not None and logs.TRACER is not None:
+            logs.TRACER.feed_done(widget, start)
+        widget.value = value
+        self.request_frame()
+
+    def _fail(self, error):
+        #An exception in a callback of the loop ends the Form, and is raised
+        #from edit_form
+        if self._done is not None and not self._done.done():
+            self._done.set_exception(error)
+
+    def _settled(self):
+        #After the keys read so far have been handled; they are drawn together
+        try:
+            self.focus.form.display()
+        except Exception as error:
+            self._fail(error)
+            return
+        self.focus.form.commit_frame()
+        if self.focus.done:
+            if not self._done.done():
+                self._done.set_result(None)
+            return
+        #The Form's while_waiting is due when no key arrives in time
+        if self._waiting_handle is not None:
+            self._waiting_handle.cancel()
+            self._waiting_handle = None
+        timeout = self.focus.form.keypress_timeout
+        if timeout:
+            self._waiting_handle = self._loop.call_later(timeout / 10,
+                                                         self._while_waiting)
+        self._schedule_timers()
+
+    def _schedule_timers(self):
+        #Wake when the next of the Form's timers or scheduled feeds is due
+        if self._timers_handle is not None:
+            self._timers_handle.cancel()
+            self._timers_handle = None
+        due = self.focus.form.next_due()
+        if due is not None:
+            self._timers_handle = self._loop.call_later(due, self._run_due)
+
+    def _run_due(self):
+        self._timers_handle = None
+        try:
+            if self.focus.form.run_due():
+                self.request_frame()
+        except Exception as error:
+            self._fail(error)
+            return
+        self._schedule_timers()
+
+    def _while_waiting(self):
+        self._waiting_handle = None
+        try:
+            self.focus.while_waiting()
+        except Exception as error:
+            self._fail(error)
+            return
+        self._settled()
+
+    def _input_ready(self):
+        #The terminal has input; handle everything which has arrived
+        form = self.focus.form
+        try:
+            form.input_reader.drain(form.curses_pad)
+            self.focus.dispatch_pending()
+        except Exception as error:
+            self._fail(error)
+            return
+        self._settled()
+
+    def _read_script(self):
+        #The headless backend is not watched for input, keys are read from its
+        #script one at a time with the other callbacks of the loop in between.
+        #Where the script times out the loop runs for `keypress_timeout` (or a
+        #tenth of a second), so that feeds can make progress
+        self._input_handle = None
+        form = self.focus.form
+        try:
+            event = form.input_reader.read_key(form.curses_pad, halfdelay=1)
+            if event[0] == -1:
+                delay = (form.keypress_timeout or 1) / 10
+                self._input_handle = self._loop.call_later(delay,
+                                                           self._read_script)
+                return
+            self.focus.dispatch_event(event)
+        except Exception as error:
+            self._fail(error)
+            return
+        self._settled()
+        if not self.focus.done:
+            self._input_handle = self._loop.call_soon(self._read_script)
+
+    def _watch_resize(self, watch):
+        #curses only notices a resize in getch, which is not called until the
+        #terminal has input; the loop handles SIGWINCH instead
+        if not hasattr(signal, 'SIGWINCH'):
+            return
+        if watch:
+            try:
+                self._loop.add_signal_handler(signal.SIGWINCH,
+                                              self._terminal_resized)
+            except (NotImplementedError, RuntimeError, ValueError):
+                pass
+        else:
+            self._loop.remove_signal_handler(signal.SIGWINCH)
+
+    def _terminal_resized(self):
+        self.focus.form.terminal_resized()
+        self._input_ready()
+
+
+def _clock():
+    #The time by the tracer's clock, for timing feeds while tracing
+    if logs.TRACER is not None:
+        return logs.TRACER.clock()
+    return None
+
+
+def _walk(widget):
+    #`widget` and every Widget inside it
+    yield widget
+    if isinstance(widget, Container):
+        for contained in widget.contained:
+            for each in _walk(contained):
+                yield each
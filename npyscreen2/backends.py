@@ -0,0 +1,453 @@
+# -*- coding: utf-8 -*-
+
+"""
+Screen backends stand between npyscreen2 and the terminal. Everything which
+npyscreen2 would otherwise ask of the curses module directly (creating pads,
+updating the screen, input modes, colors and the size of the terminal) is asked
+of the current backend instead.
+
+CursesBackend, the default, hands everything to curses. HeadlessBackend keeps
+the screen in memory and reads input from a script, so that applications may
+be run without a terminal, as in tests and benchmarks:
+
+    backend = HeadlessBackend(height=24, width=80, keys=['hello', '^Q'])
+    snapshots = MyApp().run(backend=backend)
+    print('\n'.join(snapshots[-1]))
+"""
+
+import collections
+import curses
+import curses.ascii
+import locale
+import select
+import struct
+import sys
+import termios
+
+#For more complex method of getting the size of screen
+try:
+    import fcntl
+except ImportError:
+    # Win32 platforms do not have fcntl
+    pass
+
+from . import safe_wrapper
+from . import terminal
+from .compositor import CellBuffer, CellWindow
+
+import logging
+log = logging.getLogger('npyscreen2.backends')
+
+__all__ = ['CursesBackend', 'HeadlessBackend', 'ScriptFinished',
+           'get_backend', 'set_backend']
+
+
+def get_backend():
+    return BACKEND
+
+
+def set_backend(backend):
+    global BACKEND
+    BACKEND = backend
+
+
+class CursesBackend(object):
+    """
+    The default backend, drawing on the terminal through curses.
+    """
+    headless = False
+    #Set when the terminal's contents can no longer be trusted, see
+    #invalidate_screen
+    screen_invalid = False
+
+    def invalidate_screen(self):
+        """
+        Have the next frame retransmit the whole terminal rather than only what
+        has changed, as something else has written to it; see
+        Form.commit_frame.
+        """
+        self.screen_invalid = True
+
+    def wrapper(self, call_function, fork=None):
+        """
+        Initializes curses, calls `call_function` with the screen and restores
+        the terminal afterwards; see `safe_wrapper.wrapper`.
+        """
+        if fork is None:
+            return safe_wrapper.wrapper(call_function)
+        else:
+            return safe_wrapper.wrapper(call_function, fork=fork)
+
+    def input_fd(self):
+        """
+        The file descriptor from which keys are read, to be watched by an event
+        loop.
+        """
+        return sys.stdin.fileno()
+
+    def wait_for_input(self, timeout=None, waker=None):
+        """
+        Wait until keys can be read, for at most `timeout` seconds (forever if
+        None), or until `waker` (a timers.Waker) is woken. Returns True if there
+        is input to read.
+        """
+        fd = self.input_fd()
+        fds = [fd]
+        if waker is not None:
+            fds.append(waker.fileno())
+        readable = select.select(fds, [], [], timeout)[0]
+        if waker is not None and waker.fileno() in readable:
+            waker.clear()
+        return fd in readable
+
+    def terminal_size(self):
+        """
+        Ask the terminal for its size.
+        """
+        #On OS X newwin does not correctly get the size of the screen.
+        #let's see how big we could be: create a temp screen
+        #and see the size curses makes it.  No good to keep, though
+        try:
+            max_y, max_x = struct.unpack('hh',
+                                         fcntl.ioctl(sys.stderr.fileno(),
+                                                     termios.TIOCGWINSZ,
+                                                     'xxxx'))
+            if (max_y, max_x) == (0, 0):
+                raise ValueError
+        except (ValueError, NameError):
+            max_y, max_x = curses.newwin(0, 0).getmaxyx()
+        return (max_y, max_x)
+
+    def newpad(self, height, width):
+        return curses.newpad(height, width)
+
+    def doupdate(self):
+        curses.doupdate()
+
+    def raw(self):
+        curses.raw()
+
+    def cbreak(self):
+        curses.cbreak()
+
+    def meta(self, flag):
+        curses.meta(flag)
+
+    def resizeterm(self, height, width):
+        curses.resizeterm(height, width)
+
+    def halfdelay(self, tenths):
+        curses.halfdelay(tenths)
+
+    def curs_set(self, visibility):
+        curses.curs_set(visibility)
+
+    def mousemask(self, mask):
+        curses.mousemask(mask)
+
+    def has_colors(self):
+        return curses.has_colors()
+
+    def color_pairs(self):
+        #Raises AttributeError if curses.start_color has not been called
+        return curses.COLOR_PAIRS
+
+    def init_pair(self, number, fg, bg):
+        curses.init_pair(number, fg, bg)
+
+    def color_pair(self, number):
+        return curses.color_pair(number)
+
+    def use_default_colors(self):
+        curses.use_default_colors()
+
+
+BACKEND = CursesBackend()
+
+
+class ScriptFinished(Exception):
+    """
+    Raised by HeadlessBackend when an application waits for input once all of
+    the scripted keys have been used.
+    """
+
+
+#The characters used by the VT100 line drawing character set, see
+#HeadlessBackend.install_acs
+_ACS = {'ACS_ULCORNER': 'l', 'ACS_LLCORNER': 'm', 'ACS_URCORNER': 'k',
+        'ACS_LRCORNER': 'j', 'ACS_LTEE': 't', 'ACS_RTEE': 'u',
+        'ACS_BTEE': 'v', 'ACS_TTEE': 'w', 'ACS_HLINE': 'q', 'ACS_VLINE': 'x',
+        'ACS_PLUS': 'n', 'ACS_S1': 'o', 'ACS_S9': 's', 'ACS_DIAMOND': '`',
+        'ACS_CKBOARD': 'a', 'ACS_DEGREE': 'f', 'ACS_PLMINUS': 'g',
+        'ACS_BULLET': '~', 'ACS_LARROW': ',', 'ACS_RARROW': '+',
+        'ACS_DARROW': '.', 'ACS_UARROW': '-', 'ACS_BOARD': 'h',
+        'ACS_LANTERN': 'i', 'ACS_BLOCK': '0'}
+
+#How line drawing characters appear in snapshots
+_ACS_TEXT = {'l': '┌', 'm': '└', 'k': '┐', 'j': '┘', 't': '├', 'u': '┤',
+             'v': '┴', 'w': '┬', 'q': '─', 'x': '│', 'n': '┼', '`': '◆',
+             'a': '▒', 'f': '°', 'g': '±', '~': '·', '0': '█'}
+
+
+class HeadlessBackend(object):
+    """
+    A backend which keeps the screen in memory rather than using a terminal.
+
+    `keys` is the script of input for the application. Each entry may be:
+
+      * a str, whose characters are typed (as UTF-8); control characters may
+        be written as in handlers, such as '^Q', when they are the whole entry
+      * an int, such as curses.KEY_DOWN, which is read as it is
+      * None, which is read as a timeout where the application is waiting with
+        a keypress_timeout, so that its `while_waiting` is called
+      * a callable, which is called with the backend when it is reached; see
+        `resize`
+
+    When the script is exhausted, ScriptFinished is raised to end the
+    application. Every update of the screen is recorded in `snapshots` as a
+    tuple of the screen's rows, which `NPSApp.run` returns.
+    """
+    headless = True
+    screen_invalid = False
+
+    def invalidate_screen(self):
+        self.screen_invalid = True
+
+    def __init__(self, height=24, width=80, keys=(), colors=True):
+        self.height = height
+        self.width = width
+        self.colors = colors
+        self.keys = collections.deque()
+        self.feed(keys)
+        self.snapshots = []
+        self.pairs = {}
+        #What has been staged with noutrefresh, and what is "on the screen"
+        self.virtual = CellBuffer(height, width)
+        self.screen = CellBuffer(height, width)
+        #Input modes, see read_key
+        self._halfdelay = False
+        self._delay = -1
+
+    def feed(self, keys):
+        """
+        Add `keys` to the end of the script.
+        """
+        if isinstance(keys, (str, int)) or callable(keys):
+            keys = [keys]
+        for key in keys:
+            if isinstance(key, str):
+                if len(key) == 2 and key[0] == '^':
+                    self.keys.append(ord(curses.ascii.ctrl(key[1])))
+                else:
+                    self.keys.extend(key.encode('utf-8'))
+            else:
+                self.keys.append(key)
+
+    def wrapper(self, call_function, fork=None):
+        """
+        Calls `call_function` with this as the current backend, and returns the
+        snapshots taken while it ran. `fork` is ignored.
+        """
+        locale.setlocale(locale.LC_ALL, '')
+        previous = get_backend()
+        set_backend(self)
+        terminal.invalidate()
+        self.install_acs()
+        try:
+            call_function(None)
+        except ScriptFinished:
+            log.info('HeadlessBackend script finished')
+        finally:
+            set_backend(previous)
+            terminal.invalidate()
+        return self.snapshots
+
+    @staticmethod
+    def install_acs():
+        """
+        curses only defines its ACS_* line drawing characters once initscr has
+        been called; define them as curses would if they are missing.
+        """
+        for name, char in _ACS.items():
+            if not hasattr(curses, name):
+                setattr(curses, name, ord(char) | curses.A_ALTCHARSET)
+
+    def resize(self, height, width):
+        """
+        Change the size of the headless terminal; curses.KEY_RESIZE is read
+        next, as it would be after the terminal window was resized.
+        """
+        self.height = height
+        self.width = width
+        self.virtual = CellBuffer(height, width)
+        self.screen = CellBuffer(height, width)
+        self.keys.appendleft(curses.KEY_RESIZE)
+
+    def read_key(self):
+        """
+        Returns the next key of the script, as HeadlessPad.getch.
+        """
+        #Without a delay an empty script is read as no input, otherwise it
+        #ends the application as nothing more will ever be typed
+        waiting = self._halfdelay or self._delay >= 0
+        while True:
+            if not self.keys:
+                if self._delay == 0:
+                    return -1
+                raise ScriptFinished()
+            if self.keys[0] is None and self._delay == 0 and \
+               not self._halfdelay:
+                #Reads which do not wait leave the timeout to the next which
+                #does, as no time passes for them
+                return -1
+            key = self.keys.popleft()
+            if key is None:
+                if waiting:
+                    return -1
+                continue  # Blocking reads never time out
+            if callable(key):
+                key(self)
+                continue
+            return key
+
+    def snapshot(self):
+        """
+        Returns the rows of the screen as it was at the last update.
+        """
+        return tuple(self.row_text(y) for y in range(self.screen.height))
+
+    def row_text(self, y, buffer=None):
+        if buffer is None:
+            buffer = self.screen
+        chars = []
+        for x in range(buffer.width):
+            code, attr = buffer.cell(y, x)
+            char = chr(code)
+            if attr & curses.A_ALTCHARSET:
+                char = _ACS_TEXT.get(char, char)
+            chars.append(char)
+        return ''.join(chars)
+
+    def cell(self, y, x):
+        """
+        Returns the character and attributes at (y, x) on the screen.
+        """
+        code, attr = self.screen.cell(y, x)
+        return chr(code), attr
+
+    def input_fd(self):
+        #There is nothing to watch, keys are read from the script
+        return None
+
+    def wait_for_input(self, timeout=None, waker=None):
+        #The script is always ready to be read
+        return True
+
+    def terminal_size(self):
+        return (self.height, self.width)
+
+    def newpad(self, height, width):
+        return HeadlessPad(self, height, width)
+
+    def doupdate(self):
+        self.screen.chars[:] = self.virtual.chars
+        self.screen.attrs[:] = self.virtual.attrs
+        self.snapshots.append(self.snapshot())
+
+    def raw(self):
+        pass
+
+    def cbreak(self):
+        self._halfdelay = False
+
+    def meta(self, flag):
+        pass
+
+    def resizeterm(self, height, width):
+        pass
+
+    def halfdelay(self, tenths):
+        self._halfdelay = True
+
+    def curs_set(self, visibility):
+        pass
+
+    def mousemask(self, mask):
+        pass
+
+    def has_colors(self):
+        return self.colors
+
+    def color_pairs(self):
+        return 256
+
+    def init_pair(self, number, fg, bg):
+        self.pairs[number] = (fg, bg)
+
+    def color_pair(self, number):
+        return (number << 8) & curses.A_COLOR
+
+    def use_default_colors(self):
+        pass
+
+
+class HeadlessPad(CellWindow):
+    """
+    An in-memory stand-in for a curses pad, made by HeadlessBackend.newpad. It
+    supports drawing, refreshing to the backend's screen and reading input from
+    the backend's script.
+    """
+    def __init__(self, backend, height, width):
+        super(HeadlessPad, self).__init__()
+        self.backend = backend
+        self.allocate(height, width)
+
+    def getmaxyx(self):
+        return (self.cells.height, self.cells.width)
+
+    def resize(self, height, width):
+        old = self.cells
+        self.allocate(height, width)
+        count = min(old.width, width)
+        for y in range(min(old.height, height)):
+            src, dst = y * old.width, y * width
+            self.cells.chars[dst:dst + count] = old.chars[src:src + count]
+            self.cells.attrs[dst:dst + count] = old.attrs[src:src + count]
+
+    def move(self, y, x):
+        self._check(y, x)
+
+    def noutrefresh(self, pminrow, pmincol, sminrow, smincol, smaxrow, smaxcol):
+        virtual = self.backend.virtual
+        cells = self.cells
+        rows = min(smaxrow, virtual.height - 1) - sminrow + 1
+        cols = min(smaxcol, virtual.width - 1) - smincol + 1
+        rows = min(rows, cells.height - pminrow)
+        cols = min(cols, cells.width - pmincol)
+        for i in range(rows):
+            src = (pminrow + i) * cells.width + pmincol
+            dst = (sminrow + i) * virtual.width + smincol
+            virtual.chars[dst:dst + cols] = cells.chars[src:src + cols]
+            virtual.attrs[dst:dst + cols] = cells.attrs[src:src + cols]
+
+    def refresh(self, *args):
+        self.noutrefresh(*args)
+        self.backend.doupdate()
+
+    def redrawwin(self):
+        pass
+
+    def clearok(self, flag):
+        pass
+
+    def keypad(self, flag):
+        pass
+
+    def timeout(self, delay):
+        self.backend._delay = delay
+
+    def nodelay(self, flag):
+        self.backend._delay = 0 if flag else -1
+
+    def getch(self):
+        return self.backend.read_key()
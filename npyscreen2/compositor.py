@@ -0,0 +1,391 @@
+# -*- coding: utf-8 -*-
+
+"""
+The compositor is an optional drawing mode for Forms. Instead of drawing
+directly on the curses pad, Widgets draw into a CellBuffer which records the
+character and attribute of each cell. When the Form is refreshed, the buffer is
+compared against the previous frame and only the runs of cells which actually
+changed are written to the curses pad.
+
+Widgets frequently redraw content identical to what is already on the screen, a
+Gauge whose value did not move for instance, so a steady-state Form will send
+little or nothing to curses. The number of cells which changed in the most
+recent frame is available as `Compositor.changed_cells`.
+
+Cells hold one code point each, so double-width characters are not accounted
+for when working out which cells changed.
+"""
+
+import array
+import curses
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import logging
+log = logging.getLogger('npyscreen2.compositor')
+
+__all__ = ['CellBuffer', 'CellWindow', 'Compositor']
+
+
+#Holds no character, so a cell holding it always differs from a real one
+_INVALID = 0x110000
+
+
+class CellBuffer(object):
+    """
+    A grid of `height` rows and `width` columns, each cell holding the code
+    point of a character and its attribute word. The two are kept in flat
+    arrays in row-major order, using NumPy arrays if `use_numpy` is True or the
+    standard library's array module otherwise.
+    """
+    def __init__(self, height, width, use_numpy=False):
+        if use_numpy and numpy is None:
+            raise ImportError('NumPy is not available')
+        self.height = height
+        self.width = width
+        self.use_numpy = use_numpy
+        size = height * width
+        if use_numpy:
+            self.chars = numpy.full(size, ord(' '), dtype=numpy.uint32)
+            self.attrs = numpy.zeros(size, dtype=numpy.uint64)
+        else:
+            self.chars = array.array('L', [ord(' ')]) * size
+            self.attrs = array.array('L', [0]) * size
+
+    def fill(self, char, attr, start=0, stop=None):
+        """
+        Sets the cells from flat index `start` up to `stop` to `char` and
+        `attr`.
+        """
+        if stop is None:
+            stop = self.height * self.width
+        if self.use_numpy:
+            self.chars[start:stop] = char
+            self.attrs[start:stop] = attr
+        else:
+            count = stop - start
+            self.chars[start:stop] = array.array('L', [char]) * count
+            self.attrs[start:stop] = array.array('L', [attr]) * count
+
+    def cell(self, y, x):
+        i = y * self.width + x
+        return int(self.chars[i]), int(self.attrs[i])
+
+    def row_text(self, y):
+        """
+        Returns the characters of row `y` as a string.
+        """
+        start = y * self.width
+        return ''.join(map(chr, self.chars[start:start + self.width]))
+
+    def changed_columns(self, other, y):
+        """
+        Returns the columns of row `y` in which this buffer differs from
+        `other`, in increasing order.
+        """
+        start = y * self.width
+        stop = start + self.width
+        if self.use_numpy:
+            diff = ((self.chars[start:stop] != other.chars[start:stop]) |
+                    (self.attrs[start:stop] != other.attrs[start:stop]))
+            return numpy.flatnonzero(diff).tolist()
+        chars, attrs = self.chars, self.attrs
+        o_chars, o_attrs = other.chars, other.attrs
+        #Comparing whole rows is done in C, most rows are skipped here
+        if chars[start:stop] == o_chars[start:stop] and \
+           attrs[start:stop] == o_attrs[start:stop]:
+            return []
+        return [i - start for i in range(start, stop)
+                if chars[i] != o_chars[i] or attrs[i] != o_attrs[i]]
+
+
+def _split_ch(ch, attr):
+    #Separates a character given as a str or a curses chtype into its code
+    #point and attributes
+    if isinstance(ch, int):
+        return ch & curses.A_CHARTEXT, attr | (ch & curses.A_ATTRIBUTES)
+    return ord(ch), attr
+
+
+class CellWindow(object):
+    """
+    Implements the subset of the curses window API used in drawing on top of
+    a CellBuffer. Attributes are combined with the window attributes and the
+    background as curses does.
+    """
+    def __init__(self, use_numpy=False):
+        self.use_numpy = use_numpy
+        self.cells = None
+        #Rows drawn to since they were last looked at, see Compositor.flush
+        self._touched = bytearray()
+        self._attrs = 0
+        self._bkgd_char = ord(' ')
+        self._bkgd_attr = 0
+
+    def allocate(self, height, width):
+        """
+        Replace the cells with a blank CellBuffer of the given size.
+        """
+        self.cells = CellBuffer(height, width, self.use_numpy)
+        self._touched = bytearray(b'\x01') * height
+
+    def _render(self, attr, use_window=True):
+        #Combine attr with the window attributes and the background as curses
+        #does; the color pair of attr takes precedence over the others
+        if use_window:
+            window = self._attrs
+            if attr & curses.A_COLOR:
+                window &= ~curses.A_COLOR
+            attr |= window
+        bkgd = self._bkgd_attr
+        if attr & curses.A_COLOR:
+            bkgd &= ~curses.A_COLOR
+        return attr | bkgd
+
+    def _check(self, y, x):
+        if y < 0 or x < 0 or y >= self.cells.height or x >= self.cells.width:
+            raise curses.error('{0}: ({1}, {2}) is outside the window'.format(self.__class__.__name__, y, x))
+
+    def _put(self, y, x, codes, attr):
+        #Writes the code points at (y, x), clipped at the right edge
+        cells = self.cells
+        start = y * cells.width + x
+        stop = min(start + len(codes), (y + 1) * cells.width)
+        count = stop - start
+        if count <= 0:
+            return
+        if cells.use_numpy:
+            cells.chars[start:stop] = codes[:count]
+            cells.attrs[start:stop] = attr
+        else:
+            cells.chars[start:stop] = array.array('L', codes[:count])
+            cells.attrs[start:stop] = array.array('L', [attr]) * count
+        self._touched[y] = 1
+
+    #The subset of the curses window API used in drawing
+
+    def addstr(self, y, x, string, attr=0):
+        self._check(y, x)
+        self._put(y, x, [ord(c) for c in string], self._render(attr, False))
+
+    def addch(self, y, x, ch, attr=0):
+        self._check(y, x)
+        code, attr = _split_ch(ch, attr)
+        self._put(y, x, [code], self._render(attr))
+
+    def hline(self, y, x, ch, n, attr=0):
+        self._check(y, x)
+        code, attr = _split_ch(ch, attr)
+        self._put(y, x, [code] * n, self._render(attr))
+
+    def vline(self, y, x, ch, n, attr=0):
+        self._check(y, x)
+        code, attr = _split_ch(ch, attr)
+        attr = self._render(attr)
+        for row in range(y, min(y + n, self.cells.height)):
+            self._put(row, x, [code], attr)
+
+    def inch(self, y, x):
+        self._check(y, x)
+        code, attr = self.cells.cell(y, x)
+        return code | attr if code < 256 else code
+
+    def attrset(self, attr):
+        self._attrs = attr
+
+    def attron(self, attr):
+        self._attrs |= attr
+
+    def attroff(self, attr):
+        self._attrs &= ~attr
+
+    def bkgdset(self, ch, attr=0):
+        self._bkgd_char, self._bkgd_attr = _split_ch(ch, attr)
+
+    def erase(self):
+        self.cells.fill(self._bkgd_char, self._bkgd_attr)
+        self._touched[:] = b'\x01' * len(self._touched)
+
+    def clear(self):
+        self.erase()
+
+    def subpad(self, nlines, ncols, begin_y, begin_x):
+        self._check(begin_y, begin_x)
+        return _Region(self, nlines, ncols, begin_y, begin_x)
+
+
+class Compositor(CellWindow):
+    """
+    Stands in for a Form's curses pad, recording what is drawn in a CellBuffer.
+    The methods used in drawing are implemented here; all others, such as those
+    for input, are passed on to the real pad.
+
+    Calling `noutrefresh` (as `Form.refresh` does) writes the cells which have
+    changed since the previous frame to the real pad before refreshing it.
+    Since attributes are combined as curses would combine them, what is written
+    to the real pad is exactly what would have been drawn without the
+    compositor.
+    """
+    def __init__(self, use_numpy=False):
+        super(Compositor, self).__init__(use_numpy)
+        self.pad = None
+        self.previous = None
+
+        #The number of cells written to the pad in the most recent frame
+        self.changed_cells = 0
+        self.frames = 0
+        self.total_changed_cells = 0
+
+    def attach(self, pad, height, width):
+        """
+        Draw to the real curses `pad`, of which the compositor will use
+        `height` rows and `width` columns. The buffers are reallocated if the
+        size has changed, and the next frame will be written out in full.
+        """
+        if self.cells is None or \
+           (self.cells.height, self.cells.width) != (height, width):
+            self.allocate(height, width)
+            self.previous = CellBuffer(height, width, self.use_numpy)
+        self.pad = pad
+        self.invalidate()
+
+    def detach(self):
+        self.pad = None
+
+    def invalidate(self):
+        """
+        Forget what is on the real pad, so that the next frame is written out
+        in full.
+        """
+        self.previous.fill(_INVALID, 0)
+        self._touched[:] = b'\x01' * len(self._touched)
+
+    def __getattr__(self, name):
+        #Only called for names not found on the Compositor
+        pad = self.__dict__.get('pad')
+        if pad is None:
+            raise AttributeError(name)
+        return getattr(pad, name)
+
+    def clear(self):
+        #Like erase, but the terminal will also be redrawn from scratch
+        self.erase()
+        self.pad.clear()
+        self.invalidate()
+
+    def noutrefresh(self, *args):
+        self.flush()
+        self.pad.noutrefresh(*args)
+
+    def refresh(self, *args):
+        self.flush()
+        self.pad.refresh(*args)
+
+    def flush(self):
+        """
+        Write the cells which differ from the previous frame to the real pad.
+        Consecutive changed cells sharing an attribute are written together.
+        """
+        cells, previous, pad = self.cells, self.previous, self.pad
+        touched = self._touched
+        changed = 0
+        for y in range(cells.height):
+            if not touched[y]:
+                continue
+            touched[y] = 0
+            columns = cells.changed_columns(previous, y)
+            if not columns:
+                continue
+            changed += len(columns)
+            row = y * cells.width
+            run_start = columns[0]
+            run_attr = cells.attrs[row + run_start]
+            last = run_start
+            for x in columns[1:]:
+                if x != last + 1 or cells.attrs[row + x] != run_attr:
+                    self._emit(pad, y, run_start, last + 1)
+                    run_start, run_attr = x, cells.attrs[row + x]
+                last = x
+            self._emit(pad, y, run_start, last + 1)
+            start = row + columns[0]
+            stop = row + columns[-1] + 1
+            previous.chars[start:stop] = cells.chars[start:stop]
+            previous.attrs[start:stop] = cells.attrs[start:stop]
+        self.changed_cells = changed
+        self.total_changed_cells += changed
+        self.frames += 1
+
+    def _emit(self, pad, y, start, stop):
+        #Writes the cells of row y from column start up to stop, which share
+        #one attribute, to the real pad
+        cells = self.cells
+        row = y * cells.width
+        attr = int(cells.attrs[row + start])
+        codes = [int(c) for c in cells.chars[row + start:row + stop]]
+        try:
+            if attr & curses.A_ALTCHARSET or max(codes) > 0xFFFF:
+                #Line drawing characters only survive as chtypes
+                for x, code in enumerate(codes, start):
+                    if code < 256:
+                        pad.addch(y, x, code | attr)
+                    else:
+                        pad.addstr(y, x, chr(code), attr)
+            else:
+                pad.addstr(y, start, ''.join(map(chr, codes)), attr)
+        except curses.error:
+            #Writing to the bottom right corner of a pad is an error, though
+            #the character is still drawn
+            pass
+
+
+class _Region(object):
+    """
+    A rectangle of a CellWindow, standing in for a window made by `subpad`.
+    """
+    def __init__(self, window, nlines, ncols, begin_y, begin_x):
+        self.window = window
+        self.top = begin_y
+        self.left = begin_x
+        self.height = min(nlines, window.cells.height - begin_y)
+        self.width = min(ncols, window.cells.width - begin_x)
+        #A derived window starts with the background of its parent
+        self._bkgd_char = window._bkgd_char
+        self._bkgd_attr = window._bkgd_attr
+
+    def bkgdset(self, ch, attr=0):
+        self._bkgd_char, self._bkgd_attr = _split_ch(ch, attr)
+
+    def erase(self):
+        cells = self.window.cells
+        for y in range(self.top, self.top + self.height):
+            start = y * cells.width + self.left
+            cells.fill(self._bkgd_char, self._bkgd_attr,
+                       start, start + self.width)
+            self.window._touched[y] = 1
+
+    def border(self, ls=0, rs=0, ts=0, bs=0, tl=0, tr=0, bl=0, br=0):
+        comp = self.window
+        top, left = self.top, self.left
+        bottom = top + self.height - 1
+        right = left + self.width - 1
+        ls = ls or curses.ACS_VLINE
+        rs = rs or curses.ACS_VLINE
+        ts = ts or curses.ACS_HLINE
+        bs = bs or curses.ACS_HLINE
+        if self.width > 2:
+            comp.hline(top, left + 1, ts, self.width - 2)
+            comp.hline(bottom, left + 1, bs, self.width - 2)
+        if self.height > 2:
+            comp.vline(top + 1, left, ls, self.height - 2)
+            comp.vline(top + 1, right, rs, self.height - 2)
+        comp.addch(top, left, tl or curses.ACS_ULCORNER)
+        comp.addch(top, right, tr or curses.ACS_URCORNER)
+        comp.addch(bottom, left, bl or curses.ACS_LLCORNER)
+        comp.addch(bottom, right, br or curses.ACS_LRCORNER)
+
+    def syncup(self):
+        #Cells are shared with the window, there is nothing to do
+        pass
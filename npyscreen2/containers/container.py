@@ -5,7 +5,10 @@ from itertools import chain
 import weakref
 
 from . import Indexable
+from .spatial_index import SpatialIndex
 
+from .. import logs
+from ..profiler import profiled
 from ..widgets import Widget
 
 import logging
@@ -39,6 +42,17 @@ class Container(Widget):
         self.contained_map = {}
         self._default_widget_id = 0
 
+        #The rectangles of the contained Widgets are kept in a spatial index so
+        #that drawing and visibility checks only visit Widgets in view. The
+        #index is rebuilt lazily after contained Widgets move or change size
+        self._spatial_index = SpatialIndex()
+        self._spatial_index_stale = True
+        #Widgets to be re-examined by the next visibility check besides those
+        #in view: those left visible by the last check, and those that have
+        #changed position, size or visibility since
+        self._visible_autoables = set()
+        self._geometry_changed = set()
+
         self.diagnostic = diagnostic
         self.hide_partially_visible = hide_partially_visible
 
@@ -102,10 +116,6 @@ class Container(Widget):
         hashable value, then the widget instance will also be placed in the
         `self.contained_map` dictionary.
         """
-        log.debug('''Container.add_widget method called: widget_class={0}, \
-widget_id={1}, rely={2}, relx={3}, max_height={4}, max_width={5}, args={6}, \
-kwargs={7}'''.format(widget_class, widget_id, rely, relx, max_height,
-                     max_width, args, kwargs))
         #Should consider scenarios where certain keyword arguments should be
         #inherited from the parent Container unless overridden. I suppose this
         #was the impetus for _passon in some npyscreen library classes
@@ -132,14 +142,14 @@ kwargs={7}'''.format(widget_class, widget_id, rely, relx, max_height,
                               **kwargs)
 
         self.contained.append(widget)
-        log.debug('Widget/Container added: contained={0}'.format(self.contained))
+        self.contained_geometry_changed(widget)
 
         widget_proxy = weakref.proxy(widget)
-        if widget_id is not None:
-            self.contained_map[widget_id] = widget_proxy
-        else:
-            self.contained_map[self._default_widget_id] = widget_proxy
+        if widget_id is None:
+            widget_id = self._default_widget_id
             self._default_widget_id += 1
+        self.contained_map[widget_id] = widget_proxy
+        widget.widget_id = widget_id
 
         return widget_proxy
 
@@ -163,17 +173,20 @@ kwargs={7}'''.format(widget_class, widget_id, rely, relx, max_height,
             if widget_id not in self.contained_map:
                 return False
             widget = self.contained_map[widget_id]
-            self.contained.remove(widget)
+            #contained_map holds proxies, keep the Widget itself
+            widget = self.contained.pop(self.contained.index(widget))
             del self.contained_map[widget_id]
+            self._forget_geometry(widget)
             self.resize()
             return True
 
         #By widget reference
         try:
-            self.contained.remove(widget)
+            index = self.contained.index(widget)
         except ValueError:  # Widget not a member in this container
             return False
         else:
+            removed = self.contained.pop(index)
             #Looking for values in a dict is weird, but seems necessary
             map_key = None
             for key, val in self.contained_map.items():
@@ -182,9 +195,19 @@ kwargs={7}'''.format(widget_class, widget_id, rely, relx, max_height,
                     break
             if map_key is not None:
                 del self.contained_map[map_key]
+            self._forget_geometry(removed)
             self.resize()
             return True
 
+    def _forget_geometry(self, widget):
+        """
+        Drop a removed Widget from the records used for visibility checks.
+        """
+        self._visible_autoables.discard(widget)
+        self._geometry_changed.discard(widget)
+        self._spatial_index_stale = True
+        self.mark_dirty()
+
     def next_rely_relx(self):
         """
         This method is used by `add_widget` to determine where a widget should
@@ -396,6 +419,8 @@ kwargs={7}'''.format(widget_class, widget_id, rely, relx, max_height,
             self.while_editing(selected)
             if not self.editing:  # Because this may change in while_editing
                 break
+            if logs.TRACER is not None:
+                logs.TRACER.focus(self, self.edit_index, selected)
             selected.edit()
             selected.display()
 
@@ -459,6 +484,7 @@ kwargs={7}'''.format(widget_class, widget_id, rely, relx, max_height,
         """
         pass
 
+    @profiled
     def _resize(self, inpt=None):
         """
         It is taken as a general contract that when a Container is resized then
@@ -542,12 +568,25 @@ kwargs={7}'''.format(widget_class, widget_id, rely, relx, max_height,
         If self.hide_partially_visible is True, then this will set Widgets whose
         bounds are only partly inside the Container to be hidden, otherwise it
         will not modify them.
+
+        Only Widgets that are in view, that were visible after the previous
+        check, or that have moved, changed size or been shown or hidden since
+        are examined; the rest are known to still be hidden.
         """
         c_y_t = self.rely + self.top_margin  # container_y_top
         c_y_b = self.rely + self.height - self.bottom_margin - 1  # container_y_bottom
         c_x_l = self.relx + self.left_margin  # container_x_left
         c_x_r = self.relx + self.width - self.left_margin - 1  # container_x_right
-        for widget in self.autoables:
+
+        self._ensure_spatial_index()
+        candidates = set(self._spatial_index.query(c_y_t, c_y_b, c_x_l, c_x_r))
+        candidates.update(self._visible_autoables)
+        candidates.update(self._geometry_changed)
+
+        visible = set()
+        for widget in candidates:
+            if not widget.auto_manage:
+                continue
             #widget_y_top, widget_y_bottom
             w_y_t, w_y_b = widget.rely, widget.rely + widget.height - 1
             #widget_x_left, widget_x_right
@@ -567,6 +606,11 @@ kwargs={7}'''.format(widget_class, widget_id, rely, relx, max_height,
                     widget.hidden = True
                 else:
                     widget.hidden = False
+            if not widget.hidden:
+                visible.add(widget)
+
+        self._visible_autoables = visible
+        self._geometry_changed = set()
 
         self.after_resizing_contained()
 
@@ -597,21 +641,68 @@ kwargs={7}'''.format(widget_class, widget_id, rely, relx, max_height,
         """
         pass
 
+    @profiled
     def _update(self, clear=True):
         if clear:
             self.clear()
 
         if self.hidden:
+            self._dirty = False
             return True
 
         self.update()
+        self.form.widgets_redrawn += 1
 
         #if self.diagnostic:
             #self.parent.curses_pad.addch(self.rely, self.relx, self.diagnostic)
 
-        for contained_widget in self.not_hiddens:
+        for contained_widget in self.visible_contained():
             contained_widget._update(clear=clear)
 
+        self._dirty = False
+        self._dirty_descendants = False
+
+    def _update_damaged(self):
+        """
+        If the Container itself is dirty, then it is redrawn along with
+        everything it contains. Otherwise only the dirty parts of the contained
+        Widgets and Containers will be redrawn.
+        """
+        if self._dirty:
+            self._update()
+        elif self._dirty_descendants:
+            for contained_widget in self.visible_contained():
+                contained_widget._update_damaged()
+            self._dirty_descendants = False
+
+    def contained_geometry_changed(self, widget):
+        """
+        Called when a contained Widget changes position, size or visibility.
+        The Container is marked for redrawing, since the Widget may have left
+        stale characters behind, and its spatial index is rebuilt before next
+        use.
+        """
+        self._spatial_index_stale = True
+        self._geometry_changed.add(widget)
+        self.mark_dirty()
+
+    def _ensure_spatial_index(self):
+        if self._spatial_index_stale:
+            self._spatial_index.rebuild(self.contained)
+            self._spatial_index_stale = False
+
+    def visible_contained(self):
+        """
+        Returns a list of the contained Widgets that are not hidden and that
+        intersect the area of the Container, in the order they are contained.
+        """
+        self._ensure_spatial_index()
+        in_view = self._spatial_index.query(self.rely,
+                                            self.rely + self.height - 1,
+                                            self.relx,
+                                            self.relx + self.width - 1)
+        return [widget for widget in in_view if not widget.hidden]
+
     def iter_contained(self):
         """
         A simple generator for iterating over self.contained, may be useful for
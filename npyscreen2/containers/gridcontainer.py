@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from . import Container
+from ..profiler import profiled
 
 #import curses
 
@@ -31,10 +32,6 @@ class GridContainer(Container):
         self.fill_rows_first = fill_rows_first
         self.grid_edit_indices = (0, 0)
 
-        log.debug('''\
-{} created with rows={}. cols={}, fill_rows_first={}\
-'''.format(self.__class__, rows, cols, fill_rows_first))
-
         self.initiate_grid()
 
     def add_widget(self, *args, **kwargs):
@@ -64,6 +61,7 @@ class GridContainer(Container):
         else:
             return col_index * self.rows + row_index
 
+    @profiled
     def _resize(self):
         self.resize_grid_coords()
 
@@ -132,7 +130,6 @@ class GridContainer(Container):
                             (self.grid_coords[col][row][1] + self.right_margin)
                 else:
                     width = self.grid_coords[col + 1][row][1] - self.grid_coords[col][row][1]
-                log.debug('grid col={}, row={}, height={}, width={}'.format(col, row, height, width))
                 self.grid_dim_hw[col][row] = [height, width]
 
     def set_up_exit_condition_handlers(self):
@@ -44,7 +44,7 @@ class SmartContainer(Container):
                            'ffdh-bottom': self.ffdh_bottom,
                            }
         self.scheme = scheme
-        log.debug('SmartContainer.scheme is {}'.format(self.scheme))
+        log.debug('SmartContainer.scheme is %s', self.scheme)
 
         super(SmartContainer, self).__init__(form,
                                              parent,
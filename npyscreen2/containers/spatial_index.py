@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""
+A spatial index over the rectangles occupied by contained Widgets, letting a
+Container find the Widgets within a region without testing every one of them.
+"""
+
+import logging
+log = logging.getLogger('npyscreen2.containers.spatial_index')
+
+__all__ = ['SpatialIndex']
+
+
+class SpatialIndex(object):
+    """
+    Buckets items into a uniform grid of cells over screen coordinates. An item
+    is placed in every cell its rectangle touches, so a query only needs to
+    look at the cells overlapping the region of interest.
+
+    Items are registered with an `order` value; queries return items sorted by
+    it, which Containers use to preserve drawing order.
+    """
+
+    def __init__(self, bucket_height=16, bucket_width=64):
+        self.bucket_height = bucket_height
+        self.bucket_width = bucket_width
+        self.clear()
+
+    def clear(self):
+        self._buckets = {}
+        self._rects = {}
+        self._items = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def insert(self, item, order, top, bottom, left, right):
+        """
+        Add `item` occupying the rows `top` to `bottom` and the columns `left`
+        to `right`, inclusive.
+        """
+        self._rects[order] = (top, bottom, left, right)
+        self._items[order] = item
+        bh, bw = self.bucket_height, self.bucket_width
+        for by in range(top // bh, bottom // bh + 1):
+            for bx in range(left // bw, right // bw + 1):
+                try:
+                    self._buckets[(by, bx)].append(order)
+                except KeyError:
+                    self._buckets[(by, bx)] = [order]
+
+    def rebuild(self, widgets):
+        """
+        Replace the contents of the index with the rectangles of `widgets`, in
+        the order given. Widgets with no height or width are indexed as though
+        they occupy a single cell at their position.
+        """
+        self.clear()
+        for order, widget in enumerate(widgets):
+            top, left = widget.rely, widget.relx
+            self.insert(widget,
+                        order,
+                        top,
+                        top + max(widget.height, 1) - 1,
+                        left,
+                        left + max(widget.width, 1) - 1)
+
+    def query(self, top, bottom, left, right):
+        """
+        Returns a list of the items whose rectangles intersect the given region,
+        sorted by their order.
+        """
+        bh, bw = self.bucket_height, self.bucket_width
+        buckets = self._buckets
+        candidates = set()
+        for by in range(top // bh, bottom // bh + 1):
+            for bx in range(left // bw, right // bw + 1):
+                if (by, bx) in buckets:
+                    candidates.update(buckets[(by, bx)])
+
+        rects = self._rects
+        found = []
+        for order in candidates:
+            i_top, i_bottom, i_left, i_right = rects[order]
+            if i_top > bottom or i_bottom < top or \
+               i_left > right or i_right < left:
+                continue
+            found.append(order)
+        found.sort()
+        items = self._items
+        return [items[order] for order in found]
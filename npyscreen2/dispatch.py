@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+"""
+Editing a Form without nested loops.
+
+A Form is normally edited by a nest of loops: the Form's edit loop calls the
+`edit` method of the selected Widget, which (for a Container) calls that of its
+selected Widget in turn, down to the Widget whose loop waits for keys. While
+one of these loops runs, nothing else can.
+
+A FocusPath keeps the same nest as state instead, a stack of the Widgets being
+edited from the Form down to the one receiving keys, so that keys can be handed
+to it one at a time by a loop that does other things besides, such as the event
+loop of an AsyncApp. It calls the same methods as the edit loops, in the same
+order (`_pre_edit`, `enter_edit_loop`, `while_editing`, `use_key_press`,
+`handle_exiting_widgets`, `_post_edit` and so on), so Widgets and Containers
+behave as they do in their own loops, unless they override `edit` or
+`edit_loop`.
+
+The edit loops display the Form each time a Widget exits, at every level; a
+FocusPath made with `render=False` leaves that to its caller, which can then
+display the Form once for any number of keys.
+"""
+
+from .containers import Container
+from . import logs
+
+import logging
+log = logging.getLogger('npyscreen2.dispatch')
+
+__all__ = ['FocusPath']
+
+
+class FocusPath(object):
+    """
+    The Widgets being edited on `form`. Call `start` to begin editing the Form,
+    then `dispatch_key` with each key until `done`. With `render` False the
+    Form is not displayed meanwhile; display it after each batch of keys.
+    """
+    def __init__(self, form, render=True):
+        self.form = form
+        self.render = render
+        #Entries of [widget, receives keys, set its parent editing]; the same
+        #Container appears twice while it is being edited as a Widget
+        self.stack = []
+
+    @property
+    def focus(self):
+        """
+        The Widget receiving keys, or None when editing has finished.
+        """
+        if not self.stack:
+            return None
+        return self.stack[-1][0]
+
+    @property
+    def done(self):
+        return not self.stack
+
+    def start(self):
+        self._enter(self.form)
+        self.settle()
+
+    def dispatch_key(self, ch):
+        """
+        Hand the key `ch` to the focused Widget, as its edit loop would.
+        """
+        widget = self.focus
+        widget.use_key_press(ch)
+        if self.render:
+            widget.display()
+        self.settle()
+
+    def dispatch_event(self, event):
+        """
+        Hand the key event `event`, a (key, is_unicode) pair read from the
+        Form's InputReader, to the focused Widget.
+        """
+        ch, is_unicode = event
+        widget = self.focus
+        widget._last_get_ch_was_unicode = is_unicode
+        self.dispatch_key(widget._alt_key(ch))
+
+    def dispatch_pending(self):
+        """
+        Hand every key event waiting in the Form's InputReader to the focused
+        Widget in turn, until there are none left or the Form is done.
+        """
+        reader = self.form.input_reader
+        while reader.queue and self.stack:
+            self.dispatch_event(reader.queue.popleft())
+
+    def while_waiting(self):
+        """
+        Call the Form's `while_waiting`, as its edit loop would when no key is
+        pressed within its `keypress_timeout`.
+        """
+        self.form.while_waiting()
+        if self.render:
+            self.focus.display()
+        self.settle()
+
+    def _enter(self, widget):
+        #Widget.edit, and the start of its edit loop
+        widget.editing = True
+        widget._pre_edit()
+        if isinstance(widget, Container):
+            if self.render:
+                widget.display()
+            widget.edit_index = widget.enter_edit_loop()
+            if widget.edit_index is None and not widget.container_selected:
+                widget.editing = False
+            self.stack.append([widget, False, False])
+        else:
+            self._receive_keys(widget)
+
+    def _receive_keys(self, widget):
+        #The start of Widget.edit_loop
+        parent = widget.parent
+        set_parent = not parent.editing
+        if set_parent:
+            parent.editing = True
+        self.stack.append([widget, True, set_parent])
+
+    def _exited(self, widget):
+        #What a Container's edit loop does when the `edit` of its selected
+        #Widget returns
+        if self.stack:
+            if self.render:
+                widget.display()
+            self.stack[-1][0].handle_exiting_widgets(widget.how_exited)
+
+    def settle(self):
+        """
+        Advance the edit loops until a Widget is waiting for keys, or the Form
+        is done.
+        """
+        while self.stack:
+            widget, receives_keys, set_parent = self.stack[-1]
+            if receives_keys:
+                if widget.editing and widget.parent.editing:
+                    return
+                #The end of Widget.edit_loop
+                self.stack.pop()
+                if set_parent:
+                    widget.parent.editing = False
+                if widget.editing:
+                    widget.editing = False
+                    widget.how_exited = True
+                if self.stack and self.stack[-1][0] is widget:
+                    #A Container which was being edited as a Widget
+                    widget.editing = True
+                    if self.render:
+                        widget.display()
+                    widget.handle_exiting_widgets(widget.how_exited)
+                    continue
+                widget._post_edit()
+                self._exited(widget)
+                continue
+
+            container = widget
+            if not container.editing:
+                self.stack.pop()
+                container._post_edit()
+                self._exited(container)
+            elif container.container_editable_as_widget and \
+                 container.container_selected:
+                self._receive_keys(container)
+            elif container.edit_index is None:
+                #Container.edit_loop would wait for something to select a
+                #Widget, but nothing could while it waits
+                container.editing = False
+            else:
+                selected = container.contained[container.edit_index]
+                container.bring_into_view()
+                container.while_editing(selected)
+                if container.editing:
+                    if logs.TRACER is not None:
+                        logs.TRACER.focus(container, container.edit_index,
+                                          selected)
+                    self._enter(selected)
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+
+"""
+Running Widget feeds away from the user interface.
+
+A feed is normally called by `Widget.call_feed` on the thread running the
+application, so a feed which blocks (on a disk, a socket or another process)
+stops keys from being handled until it returns. Given a FeedExecutor, a Form
+instead submits its feeds to a pool of threads and carries on; each result is
+applied to its Widget on the application's thread, when the Form is next
+displayed:
+
+    app = MyApp(feed_executor=FeedExecutor(max_workers=4, timeout=2))
+
+A Widget has at most one call of its feed in flight; `call_feed` does nothing
+for a Widget whose previous call has neither been applied nor timed out, so a
+slow feed is not piled up on. How long each Widget's feed takes is kept in its FeedStats.
+
+Exceptions raised by a feed are raised again from `apply_results`, as they
+would have been from `call_feed`.
+
+Feeds may also be called without the application's help. A Widget given a
+`feed_interval` (in seconds) has its feed called by its Form's FeedScheduler
+that often, while the Form waits for keys; each Widget keeps its own cadence,
+and only the feeds which are due are called. The feed of a hidden Widget is not
+called at all, and that of a Widget scrolled out of view is called less often.
+"""
+
+import collections
+import concurrent.futures
+import heapq
+import itertools
+import time
+import weakref
+
+from . import logs
+
+import logging
+log = logging.getLogger('npyscreen2.feeds')
+
+__all__ = ['FeedExecutor', 'FeedStats', 'FeedScheduler']
+
+
+class FeedStats(object):
+    """
+    Figures for the feed of one Widget. Latencies are in seconds, from the
+    call being submitted to its result being ready.
+
+        calls       calls submitted
+        completed   calls which returned a value in time
+        skipped     calls not made as the previous one was still in flight
+        errors      calls which raised an exception
+        timeouts    calls which took longer than the executor's timeout
+    """
+    __slots__ = ('calls', 'completed', 'skipped', 'errors', 'timeouts',
+                 'last_latency', 'max_latency', 'total_latency')
+
+    def __init__(self):
+        self.calls = 0
+        self.completed = 0
+        self.skipped = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.last_latency = None
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    @property
+    def mean_latency(self):
+        finished = self.completed + self.errors + self.timeouts
+        if not finished:
+            return None
+        return self.total_latency / finished
+
+    def add_latency(self, latency):
+        self.last_latency = latency
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def __repr__(self):
+        fields = ('{0}={1!r}'.format(name, getattr(self, name))
+                  for name in self.__slots__)
+        return 'FeedStats({0})'.format(', '.join(fields))
+
+
+class FeedExecutor(object):
+    """
+    Runs Widget feeds in a ThreadPoolExecutor of `max_workers` threads. A call
+    still running `timeout` seconds (if given) after it was submitted is
+    counted as timed out, when the Form next runs what is due (see `expire`),
+    and abandoned: the Widget's feed may be called again, and the result of the
+    abandoned call is discarded if it ever arrives. Threads cannot be
+    interrupted, so an abandoned call keeps its worker thread until it returns;
+    `abandoned` is the number of those.
+
+    `wakeup`, if set, is called from the worker thread each time a result is
+    ready, so that an application waiting for input can display it sooner.
+    """
+    def __init__(self, max_workers=4, timeout=None, clock=time.monotonic):
+        self.timeout = timeout
+        self.clock = clock
+        self.wakeup = None
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='npyscreen2-feed')
+        #The calls in flight as (weakref to the Widget, future, time submitted)
+        #by the Widget's id, the futures of abandoned calls, and the results
+        #which have arrived; only the deque is touched by the worker threads
+        self._in_flight = {}
+        self._abandoned = set()
+        self._results = collections.deque()
+        self.stats = weakref.WeakKeyDictionary()
+
+    def stats_for(self, widget):
+        """
+        Returns the FeedStats of `widget`.
+        """
+        try:
+            return self.stats[widget]
+        except KeyError:
+            stats = self.stats[widget] = FeedStats()
+            return stats
+
+    def __len__(self):
+        return len(self._in_flight)
+
+    def in_flight(self, widget):
+        return id(widget) in self._in_flight
+
+    @property
+    def abandoned(self):
+        """
+        The number of calls which timed out and are still running.
+        """
+        return len(self._abandoned)
+
+    def submit(self, widget, func):
+        """
+        Call `func` in a worker thread, to become the value of `widget`.
+        Returns False, doing nothing, if a call for `widget` is in flight.
+        """
+        stats = self.stats_for(widget)
+        key = id(widget)
+        if key in self._in_flight:
+            self.expire()
+            if key in self._in_flight:
+                stats.skipped += 1
+                return False
+        stats.calls += 1
+        start = self.clock()
+        trace_start = logs.TRACER.clock() if logs.TRACER is not None else None
+        future = self._pool.submit(func)
+        self._in_flight[key] = (weakref.ref(widget), future, start)
+        future.add_done_callback(
+            lambda future: self._finished(key, future, start, trace_start))
+        return True
+
+    def _finished(self, key, future, start, trace_start):
+        #In the worker thread
+        self._results.append((key, future, self.clock() - start, trace_start))
+        if self.wakeup is not None:
+            self.wakeup()
+
+    def next_due(self):
+        """
+        Returns the number of seconds until the next call in flight times out
+        (0 if one has), or None if there is no timeout or call in flight.
+        """
+        if self.timeout is None or not self._in_flight:
+            return None
+        first = min(start for ref, future, start in self._in_flight.values())
+        return max(first + self.timeout - self.clock(), 0)
+
+    def expire(self):
+        """
+        Abandon the calls still running `timeout` seconds after they were
+        submitted, counting them as timed out, and returns how many there
+        were. This is called by the Form whenever it runs what is due.
+        """
+        if self.timeout is None:
+            return 0
+        now = self.clock()
+        expired = [key for key, (ref, future, start) in self._in_flight.items()
+                   if now - start > self.timeout and not future.done()]
+        for key in expired:
+            ref, future, start = self._in_flight.pop(key)
+            #A call still waiting for a thread need never run
+            if not future.cancel():
+                self._abandoned.add(future)
+            widget = ref()
+            if widget is not None:
+                stats = self.stats_for(widget)
+                stats.timeouts += 1
+                stats.add_latency(now - start)
+        return len(expired)
+
+    @property
+    def pending(self):
+        """
+        True if there are results waiting to be applied.
+        """
+        return bool(self._results)
+
+    def apply_results(self):
+        """
+        Give the results which have arrived to their Widgets. This is called
+        by the Form before it is displayed.
+        """
+        error = None
+        while self._results:
+            key, future, latency, trace_start = self._results.popleft()
+            #The result of an abandoned call is discarded
+            if future in self._abandoned or future.cancelled():
+                self._abandoned.discard(future)
+                continue
+            widget = self._in_flight.pop(key)[0]()
+            if widget is None:
+                continue
+            stats = self.stats_for(widget)
+            stats.add_latency(latency)
+            exception = future.exception()
+            if self.timeout is not None and latency > self.timeout:
+                stats.timeouts += 1
+            elif exception is not None:
+                stats.errors += 1
+                if error is None:
+                    error = exception
+            else:
+                stats.completed += 1
+                widget.value = future.result()
+            if trace_start is not None and logs.TRACER is not None:
+                logs.TRACER.feed_done(widget, trace_start, exception)
+        if error is not None:
+            raise error
+
+    def shutdown(self, wait=True):
+        """
+        Stop the worker threads once the calls in flight have finished.
+        """
+        self._pool.shutdown(wait=wait)
+
+
+class FeedScheduler(object):
+    """
+    Calls the feeds of Widgets at their `feed_interval`. The Widgets are kept
+    in a heap by the time their feed is next due, so that finding the feeds to
+    call, and how long until the next, does not visit the others.
+
+    The feed of a Widget hidden by the application is skipped until it is
+    shown again, and that of a Widget out of view of any Container holding it
+    is called `offscreen_factor` times less often.
+    """
+    def __init__(self, clock=time.monotonic, offscreen_factor=4):
+        self.clock = clock
+        self.offscreen_factor = offscreen_factor
+        #Entries are (due, sequence number, weakref to the Widget); an entry
+        #is current if its number is the Widget's in _entries, others are
+        #discarded when they reach the top of the heap
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        #Totals for the feeds called, skipped as hidden, and slowed down
+        self.calls = 0
+        self.skipped = 0
+        self.slowed = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def schedule(self, widget, delay=0):
+        """
+        Call the feed of `widget` in `delay` seconds, then every
+        `widget.feed_interval` seconds. Replaces any earlier schedule.
+        """
+        number = next(self._counter)
+        self._entries[id(widget)] = number
+        heapq.heappush(self._heap,
+                       (self.clock() + delay, number, weakref.ref(widget)))
+
+    def unschedule(self, widget):
+        self._entries.pop(id(widget), None)
+
+    def _is_current(self, entry):
+        widget = entry[2]()
+        if widget is None or self._entries.get(id(widget)) != entry[1]:
+            return None
+        if widget.feed_interval is None or not widget.live:
+            del self._entries[id(widget)]
+            return None
+        return widget
+
+    def next_due(self):
+        """
+        Returns the number of seconds until the next feed is due (0 if one is
+        overdue), or None if no feeds are scheduled.
+        """
+        heap = self._heap
+        while heap and self._is_current(heap[0]) is None:
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        return max(heap[0][0] - self.clock(), 0)
+
+    def run_due(self):
+        """
+        Call the feeds which are due, and returns how many were called.
+        """
+        heap = self._heap
+        now = self.clock()
+        called = 0
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            widget = self._is_current(entry)
+            if widget is None:
+                continue
+            interval = widget.feed_interval
+            shown = _shown(widget)
+            if shown is None:
+                self.skipped += 1
+            elif not shown:
+                self.slowed += 1
+                interval *= self.offscreen_factor
+            #Keep to the Widget's cadence, unless it has fallen behind
+            due = entry[0] + interval
+            if due <= now:
+                due = now + interval
+            heapq.heappush(heap, (due, entry[1], entry[2]))
+            if shown is not None:
+                self.calls += 1
+                called += 1
+                widget.call_feed()
+        return called
+
+
+def _shown(widget):
+    #None if the Widget or a Container holding it has been hidden, False if it
+    #lies outside the area of a Container holding it, and True otherwise.
+    #Containers hide the auto-managed Widgets which are out of their view, so
+    #those are only out of view rather than hidden
+    shown = True
+    while True:
+        if widget.hidden:
+            if not widget.auto_manage:
+                return None
+            shown = False
+        if widget.is_form():
+            return shown
+        parent = widget.parent
+        if widget.rely + widget.height <= parent.rely or \
+           widget.rely >= parent.rely + parent.height or \
+           widget.relx + widget.width <= parent.relx or \
+           widget.relx >= parent.relx + parent.width:
+            shown = False
+        widget = parent
@@ -1,25 +1,26 @@
 # -*- coding: utf-8 -*-
 
+import collections
 import curses
 import curses.panel
-import struct
-import sys
-import termios
 import weakref
 
+from .. import backends
+from .. import feeds
 from .. import global_options
+from .. import logs
 from .. import pmfuncs
+from .. import profiler
+from .. import pad_pool
+from .. import terminal
 from .. import theme_managers
+from .. import timers
 
+from ..compositor import Compositor
+from ..input_reader import InputReader
+from ..sources import SourceRegistry
 from ..containers import Container
 
-#For more complex method of getting the size of screen
-try:
-    import fcntl
-except ImportError:
-    # Win32 platforms do not have fcntl
-    pass
-
 import logging
 log = logging.getLogger('npyscreen2.forms.form')
 
@@ -30,6 +31,11 @@ __all__ = ['Form', 'get_theme', 'set_theme']
 
 
 def set_theme(theme):
+    """
+    Instantiates the ThemeManager subclass `theme` and makes it the theme of
+    every Form in the application. This may be done while the application is
+    running, Forms will be redrawn with the new theme on their next display.
+    """
     global APPLICATION_THEME_MANAGER
     APPLICATION_THEME_MANAGER = theme()
 
@@ -38,6 +44,14 @@ def get_theme():
     return APPLICATION_THEME_MANAGER
 
 
+def _application_theme_manager():
+    #The default theme is created on first use, once for the application
+    global APPLICATION_THEME_MANAGER
+    if APPLICATION_THEME_MANAGER is None:
+        APPLICATION_THEME_MANAGER = theme_managers.ThemeManager()
+    return APPLICATION_THEME_MANAGER
+
+
 class Form(Container):
     """
     The Form class is an extension of the Container class (which is in turn an
@@ -54,6 +68,31 @@ class Form(Container):
     their special status as root Widget and loop object.
     """
 
+    #The number of Widgets (Containers included) drawn during the most recent
+    #call to display; the rest of the Form was left as it was
+    widgets_redrawn = 0
+    #A ThemeManager specific to this Form, otherwise the application's is used
+    _theme_manager = None
+    #The Compositor standing in for the pad, if compositor mode is enabled
+    compositor = None
+    #The compiled handlers of the Widget last given input, see KeyMap
+    _keymap = None
+    #Widgets with changes from their models to be applied before the next
+    #frame, see model_changed
+    _model_changed_widgets = None
+    #The FeedExecutor running the feeds of the Form's Widgets, if any, and the
+    #FeedScheduler calling those with a feed_interval
+    feed_executor = None
+    feed_scheduler = None
+    #The SourceRegistry of the DataSources the Form's Widgets subscribe to
+    sources = None
+    #The Form's timers (see call_later), made when first needed
+    _timers = None
+
+    #True when output has been staged by refresh but not yet sent to the
+    #terminal by commit_frame
+    frame_pending = False
+
     #A Form's dimensions are not constrained to the physical size of the screen,
     #though the default (so long as max_height/width are not used during
     #instantiation) mode is such. If the dimensions are specified, then the
@@ -109,6 +148,9 @@ class Form(Container):
                  max_width=None,
                  color='FORMDEFAULT',
                  keypress_timeout=None,
+                 compositor=False,
+                 feed_executor=None,
+                 sources=None,
                  #widget_list=None,
                  #cycle_widgets=False,
                  *args,
@@ -148,26 +190,82 @@ class Form(Container):
         #Indicates that the entire pad is visible on screen
         #self.ALL_SHOWN = False
 
-        global APPLICATION_THEME_MANAGER
-        if APPLICATION_THEME_MANAGER is None:
-            self.theme_manager = theme_managers.ThemeManager()
-        else:
-            self.theme_manager = APPLICATION_THEME_MANAGER
+        #The ThemeManager in use at the last display, and its generation; see
+        #display
+        self._displayed_theme_manager = None
+        self._displayed_theme_generation = None
 
         self.keypress_timeout = keypress_timeout
+        #Feeds run in the application's FeedExecutor unless the Form has its
+        #own, and on this thread if there is none; see the feeds module
+        if feed_executor is None:
+            feed_executor = getattr(parent_app, 'feed_executor', None)
+        self.feed_executor = feed_executor
+        #Likewise the application's DataSources, see the sources module
+        if sources is None:
+            sources = getattr(parent_app, 'sources', None)
+        self.sources = sources
+        #Keys are read for all of the Form's Widgets through one InputReader,
+        #the application's, so that keys read ahead are kept for the next Form
+        input_reader = getattr(parent_app, 'input_reader', None)
+        if input_reader is None:
+            input_reader = InputReader()
+        self.input_reader = input_reader
+        #Updates posted from other threads, see post; only appending and
+        #popping are done, which deques do atomically, so no lock is needed
+        self._posted = collections.deque()
+
+        #When set, the next full redraw will use curses' clear instead of erase
+        #so that the entire terminal is retransmitted; see clear_screen
+        self._clear_screen = False
 
         self.show_from_y = 0
         self.show_from_x = 0
         self.show_aty = 0
         self.show_atx = 0
 
+        #In compositor mode Widgets draw into a cell buffer which stands in for
+        #the pad, and only changed cells reach the pad; compositor may be True
+        #or 'numpy' to hold the cells in NumPy arrays
+        if compositor:
+            self.compositor = Compositor(use_numpy=compositor == 'numpy')
+        else:
+            self.compositor = None
+
+        #Pads are shared by the Forms of an application
+        try:
+            self.pad_pool = self.parent_app.pad_pool
+        except AttributeError:
+            self.pad_pool = pad_pool.PadPool()
+        self.curses_pad = None
         self.create_pad()
 
     def set_up_handlers(self):
         self.complex_handlers = []
-        self.handlers = {curses.KEY_RESIZE: self._resize}
+        self.handlers = {curses.KEY_RESIZE: self.h_resize}
+
+    @property
+    def theme_manager(self):
+        """
+        The ThemeManager used to draw the Form. Unless one has been assigned to
+        this Form, this is the application-wide ThemeManager (see set_theme) so
+        that all Forms share a single compiled theme.
+        """
+        if self._theme_manager is not None:
+            return self._theme_manager
+        return _application_theme_manager()
+
+    @theme_manager.setter
+    def theme_manager(self, val):
+        self._theme_manager = val
+        self.mark_dirty()
 
     def create_pad(self):
+        """
+        Makes sure that the Form has a pad large enough for its dimensions. The
+        current pad is kept if it is big enough, otherwise one is obtained
+        from (or grown by) the pad pool.
+        """
         #Safety margin by adding 1; avoids issues, like putting a character in
         #the bottom right corner which causes an error as scrolling is not set
         pad_height = self.max_height + 1
@@ -181,17 +279,33 @@ class Form(Container):
         self.pad_height = pad_height
         self.pad_width = pad_width
 
-        log.debug('''\
-creating new curses_pad: pad_height={0}, form.max_height={1}, \
-form.min_height={2}; pad_width={3}, form.max_width={4}, form.min_width={5}\
-'''.format(pad_height, self.max_height, self.min_height,
-           pad_width, self.max_width, self.min_width))
-
         #self.area = curses.newpad(self.lines, self.columns)
-        self.curses_pad = curses.newpad(pad_height, pad_width)
+        if self.compositor is None:
+            self.curses_pad = self.pad_pool.acquire(pad_height,
+                                                    pad_width,
+                                                    self.curses_pad)
+        else:
+            pad = self.pad_pool.acquire(pad_height,
+                                        pad_width,
+                                        self.compositor.pad)
+            self.compositor.attach(pad, pad_height, pad_width)
+            self.curses_pad = self.compositor
         #self.max_y, self.max_x = self.lines, self.columns
         #self.max_y, self.max_x = self.curses_pad.getmaxyx()
 
+    def release_pad(self):
+        """
+        Give the Form's pad back to the pad pool so that other Forms may use
+        it. The Form must not be drawn again until `create_pad` is called, which
+        happens when it is resized.
+        """
+        if self.compositor is not None and self.compositor.pad is not None:
+            self.pad_pool.release(self.compositor.pad)
+            self.compositor.detach()
+        elif self.compositor is None and self.curses_pad is not None:
+            self.pad_pool.release(self.curses_pad)
+        self.curses_pad = None
+
     def create(self):
         """
         Called at the end of Form instantiation. Overriding this method is a
@@ -201,28 +315,10 @@ form.min_height={2}; pad_width={3}, form.max_width={4}, form.min_width={5}\
 
     def max_physical(self):
         """
-        Returns the height and width of the physical screen.
+        Returns the height and width of the physical screen. The size is cached
+        by the `terminal` module, so this is cheap to call.
         """
-        #On OS X newwin does not correctly get the size of the screen.
-        #let's see how big we could be: create a temp screen
-        #and see the size curses makes it.  No good to keep, though
-        try:
-            max_y, max_x = struct.unpack('hh',
-                                         fcntl.ioctl(sys.stderr.fileno(),
-                                                     termios.TIOCGWINSZ,
-                                                     'xxxx'))
-            if (max_y, max_x) == (0, 0):
-                raise ValueError
-        except (ValueError, NameError):
-            max_y, max_x = curses.newwin(0, 0).getmaxyx()
-
-        #return safe values, i.e. slightly smaller.
-        #I think the -1 is to account for 0-index: e.g. 10th columnn is col[9]
-        #If this is the case, I may want to remove this subtraction
-        #return (max_y - 1, max_x - 1)
-        log.info('''\
-max_physical reports; height/lines={0}, width/cols={1}'''.format(max_y, max_x))
-        return (max_y, max_x)
+        return terminal.size()
 
     def exit_editing(self, *args, **keywords):
         self.editing = False
@@ -238,6 +334,15 @@ max_physical reports; height/lines={0}, width/cols={1}'''.format(max_y, max_x))
     def resize(self):
         pass
 
+    def h_resize(self, inpt=None):
+        """
+        Handles curses.KEY_RESIZE; the terminal size has changed, so the cached
+        size is discarded before resizing the Form.
+        """
+        terminal.invalidate()
+        self._resize()
+
+    @profiler.profiled
     def _resize(self, inpt=None):
         #This logic is arranged to ensure at most one call to max_physical
         if self.auto_max_height and self.auto_max_width:
@@ -250,6 +355,9 @@ max_physical reports; height/lines={0}, width/cols={1}'''.format(max_y, max_x))
         self.height = self.max_height
         self.width = self.max_width
 
+        if logs.TRACER is not None:
+            logs.TRACER.resize(self, self.height, self.width)
+
         self.create_pad()
         self.resize()
         #Originally there was a call to parent_app.resize, I am not sure if this
@@ -265,30 +373,251 @@ max_physical reports; height/lines={0}, width/cols={1}'''.format(max_y, max_x))
         #I'm not sure if this is the desired effect.
         #self.curses_pad.redrawwin()  # Touches window, so draws again on refresh
         self.erase()  # Window is completely cleared
+        self.mark_dirty()
         self.display()
         #self.display(clear=False)
         if self.editing and self.edit_index is not None:
             self.contained[self.edit_index].display()
 
+    @profiler.profiled
     def _update(self, clear=True):
-        if curses.has_colors() and not global_options.DISABLE_ALL_COLORS:
+        if not global_options.DISABLE_ALL_COLORS and \
+           backends.get_backend().has_colors():
             self.curses_pad.attrset(0)
             color_attribute = self.theme_manager.find_pair(self, self.color)
             self.curses_pad.bkgdset(' ', color_attribute)
             self.curses_pad.attron(color_attribute)
         if clear:
-            self.curses_pad.clear()
+            #erase only blanks the pad, clear would also force curses to
+            #retransmit the whole terminal on the next update
+            if self._clear_screen:
+                self.curses_pad.clear()
+                self._clear_screen = False
+            else:
+                self.curses_pad.erase()
         #if self.hidden:
             #return True
 
         self.update()
+        self.widgets_redrawn += 1
 
-        for contained in self.contained:
-            if contained.hidden:
-                continue
+        for contained in self.visible_contained():
             contained._update(clear=clear)
 
+        self._dirty = False
+        self._dirty_descendants = False
+
+    def display(self, clear=True):
+        """
+        Redraw the parts of the Form that have been marked as dirty and refresh
+        the screen. If the Form itself is dirty, then everything is redrawn.
+
+        After this call, `widgets_redrawn` holds the number of Widgets that were
+        drawn.
+        """
+        self.widgets_redrawn = 0
+        if self._posted:
+            self.apply_posted()
+        if self.feed_executor is not None:
+            self.feed_executor.apply_results()
+        self.deliver_model_changes()
+        #A change of theme since the last display, or a recompilation of the
+        #theme, requires a full redraw
+        theme_manager = self.theme_manager
+        if self._displayed_theme_manager is not theme_manager or \
+           self._displayed_theme_generation != theme_manager.generation:
+            self._displayed_theme_manager = theme_manager
+            self._displayed_theme_generation = theme_manager.generation
+            self.mark_dirty()
+        self._update_damaged()
+        self.refresh()
+        if logs.TRACER is not None:
+            logs.TRACER.frame(self, self.widgets_redrawn)
+        if profiler.PROFILER is not None:
+            profiler.PROFILER.end_frame()
+
+    @property
+    def timers(self):
+        if self._timers is None:
+            self._timers = timers.TimerQueue()
+        return self._timers
+
+    @property
+    def waker(self):
+        """
+        The timers.Waker interrupting the Form's wait for input, which is the
+        application's; see NPSApp.waker.
+        """
+        return self.parent_app.waker
+
+    def post(self, callback):
+        """
+        Call `callback` with no arguments on the application's thread, before
+        the Form is next displayed, which happens promptly. This may be called
+        from any thread; it is the way for other threads to change Widgets.
+        """
+        self._post((None, callback))
+
+    def post_value(self, widget, value):
+        """
+        Set the value of `widget` to `value` before the Form is next displayed,
+        from any thread. Of several values posted for the same Widget before
+        then, only the last is set.
+        """
+        self._post((widget, value))
+
+    def _post(self, update):
+        self._posted.append(update)
+        #Woken every time: whether a wake is still pending cannot be known
+        #without a lock, and waking a Waker which is awake already is harmless
+        self.waker.wake()
+
+    @property
+    def posted_pending(self):
+        """
+        True if there are posted updates waiting to be applied.
+        """
+        return bool(self._posted)
+
+    def apply_posted(self):
+        """
+        Apply the updates posted from other threads, in the order they were
+        posted. This is called by the Form before it is displayed.
+        """
+        posted = self._posted
+        updates = []
+        while posted:
+            updates.append(posted.popleft())
+        if not updates:
+            return
+        #Only the last value posted for each Widget is set
+        last = {}
+        for index, (widget, value) in enumerate(updates):
+            if widget is not None:
+                last[id(widget)] = index
+        for index, (widget, value) in enumerate(updates):
+            if widget is None:
+                value()
+            elif last[id(widget)] == index:
+                widget.value = value
+
+    def call_later(self, delay, callback):
+        """
+        Call `callback` in `delay` seconds, while the Form is waiting for input.
+        Returns a timers.Timer, which may be cancelled.
+        """
+        return self.timers.call_later(delay, callback)
+
+    def call_every(self, interval, callback, delay=None):
+        """
+        Call `callback` every `interval` seconds while the Form is waiting for
+        input. Returns a timers.Timer, which may be cancelled.
+        """
+        return self.timers.call_every(interval, callback, delay)
+
+    def next_due(self):
+        """
+        Returns the number of seconds until the next timer, scheduled feed or
+        DataSource is due, or feed in flight times out, or None if there are
+        none.
+        """
+        due = None
+        for queue in (self._timers, self.feed_scheduler, self.sources,
+                      self.feed_executor):
+            if queue:
+                when = queue.next_due()
+                if when is not None and (due is None or when < due):
+                    due = when
+        return due
+
+    def run_due(self):
+        """
+        Call the timers and feeds which are due, publish the DataSources which
+        are and abandon the feeds in flight which have timed out; returns how
+        many timers and feeds were called and Widgets given new values by the
+        sources, so 0 if nothing needs displaying.
+        """
+        called = 0
+        #Feeds which have timed out change nothing to display, but may be
+        #called again
+        if self.feed_executor:
+            self.feed_executor.expire()
+        if self._timers:
+            called += self._timers.run_due()
+        if self.feed_scheduler:
+            called += self.feed_scheduler.run_due()
+        if self.sources:
+            called += self.sources.run_due()
+        return called
+
+    def terminal_resized(self):
+        """
+        Queue curses.KEY_RESIZE to be read next, as curses would on a resize of
+        the terminal when its own SIGWINCH handler is in place; for loops which
+        watch the terminal themselves and have replaced it.
+        """
+        terminal.invalidate()
+        backends.get_backend().resizeterm(*terminal.size())
+        self.input_reader.drain(self.curses_pad)
+        if (curses.KEY_RESIZE, False) not in self.input_reader.queue:
+            self.input_reader.queue.append((curses.KEY_RESIZE, False))
+
+    def schedule_feed(self, widget):
+        """
+        Have the feed of `widget` called every `widget.feed_interval` seconds,
+        starting now.
+        """
+        if self.feed_scheduler is None:
+            self.feed_scheduler = feeds.FeedScheduler()
+        self.feed_scheduler.schedule(widget)
+
+    def subscribe(self, widget, source, selector=None):
+        """
+        Subscribe `widget` to `source`, a sources.DataSource or the name of one
+        in the Form's SourceRegistry; see DataSource.subscribe.
+        """
+        if self.sources is None:
+            self.sources = SourceRegistry()
+        return self.sources.subscribe(widget, source, selector)
+
+    def model_changed(self, widget):
+        """
+        Called by a Widget the first time its model changes after a frame, so
+        that all of the changes are applied together before the next.
+        """
+        if self._model_changed_widgets is None:
+            self._model_changed_widgets = []
+        self._model_changed_widgets.append(widget)
+
+    def deliver_model_changes(self):
+        """
+        Apply the changes to models made since the last frame to the Widgets
+        bound to them.
+        """
+        #Applying changes may change other models in turn
+        while self._model_changed_widgets:
+            widgets, self._model_changed_widgets = self._model_changed_widgets, None
+            for widget in widgets:
+                widget.deliver_deltas()
+
+    def clear_screen(self):
+        """
+        Request that the next display of the Form redraws the entire terminal
+        from scratch rather than only sending what has changed, redrawing every
+        Widget as well. `pmfuncs.call_subshell` does not need this, as it
+        has the terminal retransmitted itself.
+        """
+        self._clear_screen = True
+        self.mark_dirty()
+
     def refresh(self):
+        """
+        Stage the contents of the pad for output to the physical screen.
+
+        Nothing is sent to the terminal until `commit_frame` is called, so any
+        number of calls to `display` or `refresh` made while handling a single
+        input will result in only one update of the terminal.
+        """
         pmfuncs.hide_cursor()
         max_y, max_x = self.max_physical()
         self.curses_pad.move(0, 0)
@@ -309,14 +638,15 @@ max_physical reports; height/lines={0}, width/cols={1}'''.format(max_y, max_x))
             #It seems to me that by using show_from_y/x as a sort of index
             #rectifier to be applied to contained widgets, I have essentially
             #virtualized a lot of the curses pad stuff...
-            self.curses_pad.refresh(0,
-                                    0,
-                                    0,
-                                    0,
-                                    max_y - 1,
-                                    max_x - 1)
+            self.curses_pad.noutrefresh(0,
+                                        0,
+                                        0,
+                                        0,
+                                        max_y - 1,
+                                        max_x - 1)
         except curses.error:
             pass
+        self.frame_pending = True
 
         #if self.show_from_y is 0 and self.show_from_x is 0 and \
         #(max_y >= self.pad_height) and (max_x >= self.pad_width):
@@ -325,6 +655,25 @@ max_physical reports; height/lines={0}, width/cols={1}'''.format(max_y, max_x))
         #else:
             #self.ALL_SHOWN = False
 
+    def commit_frame(self):
+        """
+        Send all output staged by `refresh` to the terminal with a single
+        update. This is called once per input cycle, immediately before waiting
+        for the next input.
+
+        If the backend's screen has been invalidated (see
+        `CursesBackend.invalidate_screen`), the whole terminal is retransmitted
+        from the pad, whether or not anything has changed.
+        """
+        backend = backends.get_backend()
+        if backend.screen_invalid:
+            backend.screen_invalid = False
+            self.curses_pad.clearok(True)
+            self.refresh()
+        if self.frame_pending:
+            backend.doupdate()
+            self.frame_pending = False
+
     def erase(self):
         self.curses_pad.erase()
         self.refresh()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+"""
+Reads keys from the terminal for a Form.
+
+curses delivers input a byte at a time, so multi-byte UTF-8 characters used to
+cost several calls to getch per character (and a query of the locale for each
+one). The InputReader instead waits for the first byte of some input and then
+drains everything else that is already pending, decoding it with an
+incremental decoder into a queue of key events. Pasted or quickly typed text is
+thus read in one go and handed out a key at a time.
+"""
+
+import codecs
+import collections
+import locale
+
+from . import backends
+
+import logging
+log = logging.getLogger('npyscreen2.input_reader')
+
+__all__ = ['InputReader']
+
+
+def _locale_is_utf8():
+    encoding = locale.getpreferredencoding(False)
+    return codecs.lookup(encoding).name == 'utf-8'
+
+
+class InputReader(object):
+    """
+    Produces key events as (key, is_unicode) pairs. `key` is an int for ASCII,
+    control characters and curses key codes (curses.KEY_*), or a str holding a
+    single decoded character, in which case `is_unicode` is True.
+
+    Whether input is decoded as UTF-8 is decided once, when the reader is made,
+    from the locale (or by passing `utf8`).
+    """
+    def __init__(self, utf8=None):
+        if utf8 is None:
+            utf8 = _locale_is_utf8()
+        self.utf8 = utf8
+        self.queue = collections.deque()
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def read_key(self, pad, halfdelay=None):
+        """
+        Returns the next key event, waiting for input if there is none queued.
+        If `halfdelay` is given, wait at most that many tenths of a second, and
+        return (-1, False) if nothing is typed.
+        """
+        if self.queue:
+            return self.queue.popleft()
+        backend = backends.get_backend()
+        if halfdelay:
+            backend.halfdelay(halfdelay)
+        else:
+            backend.cbreak()
+            pad.timeout(-1)
+        ch = pad.getch()
+        if ch == -1:
+            return (-1, False)
+        self._accept(ch)
+        self.drain(pad)
+        #Only part of a character has arrived, the rest will follow
+        while not self.queue:
+            pad.timeout(-1)
+            self._accept(pad.getch())
+            self.drain(pad)
+        return self.queue.popleft()
+
+    def drain(self, pad):
+        """
+        Read everything pending on `pad` into the queue without waiting.
+        """
+        #halfdelay would make every read wait, cbreak turns it off
+        backends.get_backend().cbreak()
+        pad.nodelay(1)
+        try:
+            while True:
+                ch = pad.getch()
+                if ch == -1:
+                    break
+                self._accept(ch)
+        finally:
+            pad.nodelay(0)
+
+    def pending(self):
+        """
+        Returns the next queued key event without waiting, or None.
+        """
+        if self.queue:
+            return self.queue.popleft()
+        return None
+
+    def unread(self, event):
+        """
+        Put a key event back at the front of the queue.
+        """
+        self.queue.appendleft(event)
+
+    def _partial(self):
+        return bool(self._decoder.getstate()[0])
+
+    def _flush_decoder(self):
+        for char in self._decoder.decode(b'', final=True):
+            self.queue.append((char, True))
+        self._decoder.reset()
+
+    def _accept(self, ch):
+        if not self.utf8 or ch > 255:
+            if self._partial():
+                self._flush_decoder()
+            self.queue.append((ch, False))
+            return
+        if self._partial():
+            if 128 <= ch <= 191:  # Continues the character
+                for char in self._decoder.decode(bytes((ch,))):
+                    self.queue.append((char, True))
+                return
+            self._flush_decoder()
+        if ch <= 193 or ch >= 245:
+            #ASCII and control characters, or bytes which cannot begin a UTF-8
+            #sequence, are handed out as they are
+            self.queue.append((ch, False))
+            return
+        self._decoder.decode(bytes((ch,)))
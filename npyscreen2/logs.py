@@ -1,10 +1,26 @@
 # -*- coding: utf-8 -*-
 """
+Logging for npyscreen2, and the tracing of events.
+
+Tracing records what happens in an application (keypresses, frames drawn,
+resizes, changes of focus and feed calls) as typed events in a ring buffer of
+fixed size, so that it may be left running to find out what led up to a
+problem:
+
+    tracer = logs.enable_tracing(size=10000, crash_file='crash.trace')
+    ... run the application; the trace is written to crash.trace if it dies ...
+    tracer.dump()  # or write the recent events at any time
+
+Unlike log messages, nothing is formatted when events are recorded, and while
+tracing is disabled the cost to the code which would record them is the check
+of `logs.TRACER`.
 """
 
+import collections
 import logging
 import logging.handlers
 import sys
+import time
 
 STANDARD_FORMAT = '%(name)s [%(levelname)s] %(message)s'
 MESSAGE_ONLY_FORMAT = '%(message)s'
@@ -62,5 +78,152 @@ def add_rotating_file_handler(filename,
 
     log.addHandler(handler)
 
+
+KeyPress = collections.namedtuple('KeyPress', 'time widget key')
+Frame = collections.namedtuple('Frame', 'time form drawn')
+Resize = collections.namedtuple('Resize', 'time widget height width')
+Focus = collections.namedtuple('Focus', 'time container index widget')
+Feed = collections.namedtuple('Feed', 'time widget seconds error')
+
+
+#The Tracer in use, None while tracing is disabled
+TRACER = None
+
+
+def enable_tracing(size=4096, crash_file=None):
+    """
+    Start tracing and return the Tracer. The last `size` events are kept; if
+    `crash_file` is given, they are written to it should the application exit
+    with an exception.
+    """
+    global TRACER
+    TRACER = Tracer(size, crash_file=crash_file)
+    return TRACER
+
+
+def disable_tracing():
+    """
+    Stop tracing. Returns the Tracer that was in use, its events are kept.
+    """
+    global TRACER
+    tracer, TRACER = TRACER, None
+    return tracer
+
+
+def get_tracer():
+    return TRACER
+
+
+def crash_dump():
+    """
+    Write the trace to the crash file of the Tracer, if there is one. Called by
+    NPSApp.run when the application raises an exception.
+    """
+    if TRACER is not None and TRACER.crash_file is not None:
+        TRACER.write(TRACER.crash_file)
+
+
+def widget_name(widget):
+    """
+    Returns the name by which `widget` is recorded: its class, followed by its
+    widget_id or, for a Form, its name.
+    """
+    if widget.is_form():
+        ident = getattr(widget, 'FORM_NAME', None) or widget.name
+    else:
+        ident = widget.widget_id
+    if ident is None:
+        return widget.__class__.__name__
+    return '{0}({1})'.format(widget.__class__.__name__, ident)
+
+
+class Tracer(object):
+    """
+    Records events in a ring buffer of `size` entries. Widgets are recorded by
+    their class and widget_id (or Form name), times are those of `clock`.
+    """
+    def __init__(self, size=4096, clock=time.monotonic, crash_file=None):
+        self.size = size
+        self.clock = clock
+        self.crash_file = crash_file
+        self.buffer = [None] * size
+        #The number of events ever recorded
+        self.count = 0
+
+    def record(self, event):
+        self.buffer[self.count % self.size] = event
+        self.count += 1
+
+    def keypress(self, widget, key):
+        self.record(KeyPress(self.clock(), widget_name(widget), key))
+
+    def frame(self, form, drawn):
+        self.record(Frame(self.clock(), widget_name(form), drawn))
+
+    def resize(self, widget, height, width):
+        self.record(Resize(self.clock(), widget_name(widget), height, width))
+
+    def focus(self, container, index, widget):
+        self.record(Focus(self.clock(), widget_name(container), index, widget_name(widget)))
+
+    def feed(self, widget, func, *args, **kwargs):
+        """
+        Calls the feed function `func` and records how long it took, and the
+        exception it raised, if any.
+        """
+        start = self.clock()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            self.feed_done(widget, start, error)
+            raise
+        self.feed_done(widget, start)
+        return result
+
+    def feed_done(self, widget, start, error=None):
+        """
+        Record a feed call which began at `start`, for feeds which are not
+        simply called, such as those of an AsyncApp.
+        """
+        if error is not None:
+            error = repr(error)
+        self.record(Feed(start, widget_name(widget), self.clock() - start, error))
+
+    @property
+    def dropped(self):
+        """
+        The number of events which have been overwritten.
+        """
+        return max(self.count - self.size, 0)
+
+    def events(self):
+        """
+        Returns the events in the buffer, oldest first.
+        """
+        if self.count <= self.size:
+            return self.buffer[:self.count]
+        split = self.count % self.size
+        return self.buffer[split:] + self.buffer[:split]
+
+    def clear(self):
+        self.buffer = [None] * self.size
+        self.count = 0
+
+    def dump(self, out=None):
+        """
+        Write the events, one per line, to the file object `out` (by default
+        sys.stderr).
+        """
+        if out is None:
+            out = sys.stderr
+        if self.dropped:
+            out.write('({0} earlier events dropped)\n'.format(self.dropped))
+        for event in self.events():
+            out.write('{0!r}\n'.format(event))
+
+    def write(self, filename):
+        with open(filename, 'w') as out:
+            self.dump(out)
+
 #def deactivate_logging():
     #log = logging.getLogger('npyscreen2')
@@ -0,0 +1,463 @@
+# -*- coding: utf-8 -*-
+
+"""
+Values and models for Widgets.
+
+A Widget counts the changes to its value in `value_version`, rather than keeping
+a copy of the value to compare against. Assigning a new value to `Widget.value`
+is a change; so that changes made in place are counted as well, a list, dict or
+set assigned to `value` is wrapped in a TrackedList, TrackedDict or TrackedSet.
+These hold the object assigned (never a copy of it, so wrapping costs the same
+whatever its size) and count any change made through them:
+
+    widget.value = {'name': 'x', 'tags': ['a']}
+    widget.value['tags'].append('b')  # counted, widget.value_version goes up
+
+Lists, dicts and sets reached by indexing a tracked value are wrapped in turn,
+and are left in place. Changes made to the object through some other reference
+are not seen, so a Widget's value should be changed through `Widget.value`.
+
+A tracked value passes for the list, dict or set it holds: isinstance, the
+operators and methods, copy and pickle all behave as they would for the object
+itself, and the results of operators, copies and slices are plain objects.
+`untracked` returns the object itself, for the few places which must have one
+of the built in types exactly, such as the json module:
+
+    json.dumps(widget.value, default=models.untracked)
+
+Models are observable values which may be shared by any number of Widgets. A
+Widget bound to a model (see Widget.bind) is told about each change as a Delta
+saying what changed, rather than having to look at the whole value again, and
+the changes made between two frames are delivered together, just before the
+Form is drawn:
+
+    rows = ObservableList(range(100000))
+    form.add(ListView, model=rows)
+    rows[500] = 'changed'  # only the row showing rows[500] is redrawn
+
+Three kinds of model are provided: Observable holds a single value,
+ObservableList a sequence and ObservableDict a mapping.
+"""
+
+import collections
+import collections.abc
+import copy
+import weakref
+
+import logging
+log = logging.getLogger('npyscreen2.models')
+
+__all__ = ['Tracked', 'TrackedList', 'TrackedDict', 'TrackedSet', 'tracked',
+           'untracked', 'Delta', 'Model', 'Observable', 'ObservableList',
+           'ObservableDict', 'coalesce']
+
+
+def tracked(value, owner):
+    """
+    Returns `value` wrapped so that changes to it call `owner.value_mutated()`,
+    if it is a list, dict or set, or `value` itself otherwise. A tracked value
+    is wrapped afresh for `owner`.
+    """
+    if isinstance(value, Tracked):
+        value = value.data
+    wrapper = _WRAPPERS.get(type(value))
+    if wrapper is None:
+        return value
+    return wrapper(value, weakref.ref(owner))
+
+
+def untracked(value):
+    """
+    Returns the object held by a tracked value, or `value` itself.
+    """
+    if isinstance(value, Tracked):
+        return value.data
+    return value
+
+
+class Tracked(object):
+    """
+    The base class of tracked values. `data` is the object being tracked, to
+    which everything is passed on; the methods changing it also call
+    `value_mutated()` on the owner.
+    """
+    __slots__ = ('data', '_owner')
+
+    def __init__(self, data, owner):
+        self.data = data
+        self._owner = owner
+
+    @property
+    def __class__(self):
+        #So that isinstance(value, list) holds for a TrackedList
+        return type(self.data)
+
+    def _changed(self):
+        owner = self._owner()
+        if owner is not None:
+            owner.value_mutated()
+
+    def _track(self, item):
+        #Items are wrapped as they are reached, so that changes made to them
+        #are seen, but the item itself is not replaced
+        wrapper = _WRAPPERS.get(type(item))
+        if wrapper is None:
+            return item
+        return wrapper(item, self._owner)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.data)
+
+    def __copy__(self):
+        return self.data.copy()
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.data, memo)
+
+    def __reduce_ex__(self, protocol):
+        #Pickles are of the object itself
+        return self.data.__reduce_ex__(protocol)
+
+
+class TrackedList(Tracked):
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.data[index]
+        return self._track(self.data[index])
+
+    def __radd__(self, other):
+        if isinstance(other, list):
+            return untracked(other) + self.data
+        return NotImplemented
+
+
+class TrackedDict(Tracked):
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return self._track(self.data[key])
+
+    def get(self, key, default=None):
+        return self._track(self.data.get(key, default))
+
+    def setdefault(self, key, default=None):
+        if key not in self.data:
+            self.data[key] = untracked(default)
+            self._changed()
+        return self[key]
+
+
+class TrackedSet(Tracked):
+    __slots__ = ()
+
+    def add(self, item):
+        if item not in self.data:
+            self.data.add(item)
+            self._changed()
+
+    def discard(self, item):
+        if item in self.data:
+            self.data.discard(item)
+            self._changed()
+
+
+def _reading(base, name):
+    #The method `name` of `base`, called on the object held
+    method = getattr(base, name)
+
+    def reading(self, *args, **kwargs):
+        return method(self.data, *map(untracked, args), **kwargs)
+    reading.__name__ = name
+    reading.__doc__ = method.__doc__
+    return reading
+
+
+def _mutating(base, name):
+    #The method `name` of `base`, called on the object held and reporting the
+    #change; the in place operators return the tracked value itself
+    method = getattr(base, name)
+
+    def mutating(self, *args, **kwargs):
+        result = method(self.data, *map(untracked, args), **kwargs)
+        self._changed()
+        if result is self.data:
+            return self
+        return result
+    mutating.__name__ = name
+    mutating.__doc__ = method.__doc__
+    return mutating
+
+
+_COMPARING = ('__eq__', '__ne__', '__lt__', '__le__', '__gt__', '__ge__',
+              '__len__', '__iter__', '__contains__', '__reversed__', 'copy')
+
+for _cls, _base, _reads, _writes in (
+        (TrackedList, list,
+         ('__add__', '__mul__', '__rmul__', 'index', 'count'),
+         ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append',
+          'extend', 'insert', 'pop', 'remove', 'clear', 'reverse', 'sort')),
+        (TrackedDict, dict,
+         ('__or__', '__ror__', 'keys', 'items', 'values'),
+         ('__setitem__', '__delitem__', '__ior__', 'update', 'pop', 'popitem',
+          'clear')),
+        (TrackedSet, set,
+         ('__or__', '__ror__', '__and__', '__rand__', '__sub__', '__rsub__',
+          '__xor__', '__rxor__', 'union', 'intersection', 'difference',
+          'symmetric_difference', 'issubset', 'issuperset', 'isdisjoint'),
+         ('__ior__', '__iand__', '__ixor__', '__isub__', 'remove', 'pop',
+          'clear', 'update', 'difference_update', 'intersection_update',
+          'symmetric_difference_update'))):
+    for _name in _COMPARING + _reads:
+        if hasattr(_base, _name):
+            setattr(_cls, _name, _reading(_base, _name))
+    for _name in _writes:
+        setattr(_cls, _name, _mutating(_base, _name))
+del _cls, _base, _reads, _writes, _name
+
+_WRAPPERS = {list: TrackedList,
+             dict: TrackedDict,
+             set: TrackedSet}
+
+
+#A change to a model. `kind` is one of:
+#    'set'     the value of an Observable was replaced
+#    'insert'  `count` items were inserted at index or key `key`
+#    'remove'  `count` items were removed from index or key `key`
+#    'update'  the item at index or key `key` was replaced
+#    'reset'   anything may have changed
+Delta = collections.namedtuple('Delta', 'kind key count')
+
+_SET = Delta('set', None, 1)
+_RESET = Delta('reset', None, 0)
+
+
+class Model(object):
+    """
+    The base class of models, keeping a list of the callbacks to be given each
+    Delta. Callbacks which are bound methods are held by weak reference, so
+    that subscribing a Widget does not keep it alive.
+    """
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        """
+        Call `callback(model, delta)` on each change to the model.
+        """
+        try:
+            ref = weakref.WeakMethod(callback)
+        except TypeError:
+            ref = lambda callback=callback: callback
+        self._subscribers.append(ref)
+        return callback
+
+    def unsubscribe(self, callback):
+        self._subscribers = [ref for ref in self._subscribers
+                             if ref() not in (None, callback)]
+
+    def notify(self, delta):
+        dead = False
+        for ref in self._subscribers:
+            callback = ref()
+            if callback is None:
+                dead = True
+            else:
+                callback(self, delta)
+        if dead:
+            self._subscribers = [ref for ref in self._subscribers
+                                 if ref() is not None]
+
+
+class Observable(Model):
+    """
+    A model holding a single value, such as a number for a Gauge.
+    """
+    def __init__(self, value=None):
+        super(Observable, self).__init__()
+        self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        self.notify(_SET)
+
+    def set(self, value):
+        self.value = value
+
+
+class ObservableList(Model, collections.abc.MutableSequence):
+    """
+    A model holding a list; `data` is the list itself. Changes to single items
+    are reported with their index, changes to slices as a reset.
+    """
+    def __init__(self, iterable=()):
+        super(ObservableList, self).__init__()
+        self.data = list(iterable)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __contains__(self, item):
+        return item in self.data
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def __setitem__(self, index, item):
+        self.data[index] = item
+        if isinstance(index, slice):
+            self.notify(_RESET)
+        else:
+            self.notify(Delta('update', index % len(self.data), 1))
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            del self.data[index]
+            self.notify(_RESET)
+        else:
+            index %= len(self.data)
+            del self.data[index]
+            self.notify(Delta('remove', index, 1))
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, ObservableList):
+            other = other.data
+        return self.data == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'ObservableList({0!r})'.format(self.data)
+
+    def insert(self, index, item):
+        length = len(self.data)
+        self.data.insert(index, item)
+        #Normalize the index as list.insert does
+        if index < 0:
+            index = max(length + index, 0)
+        self.notify(Delta('insert', min(index, length), 1))
+
+    def append(self, item):
+        self.data.append(item)
+        self.notify(Delta('insert', len(self.data) - 1, 1))
+
+    def extend(self, items):
+        start = len(self.data)
+        self.data.extend(items)
+        if len(self.data) > start:
+            self.notify(Delta('insert', start, len(self.data) - start))
+
+    def pop(self, index=-1):
+        index %= len(self.data)
+        item = self.data.pop(index)
+        self.notify(Delta('remove', index, 1))
+        return item
+
+    def clear(self):
+        self.data.clear()
+        self.notify(_RESET)
+
+    def reverse(self):
+        self.data.reverse()
+        self.notify(_RESET)
+
+    def sort(self, *args, **kwargs):
+        self.data.sort(*args, **kwargs)
+        self.notify(_RESET)
+
+    def reset(self, iterable):
+        """
+        Replace the whole contents of the list.
+        """
+        self.data[:] = iterable
+        self.notify(_RESET)
+
+    def index(self, *args):
+        return self.data.index(*args)
+
+    def count(self, item):
+        return self.data.count(item)
+
+
+class ObservableDict(Model, collections.abc.MutableMapping):
+    """
+    A model holding a dict; `data` is the dict itself. Changes are reported
+    with the key which changed.
+    """
+    def __init__(self, *args, **kwargs):
+        super(ObservableDict, self).__init__()
+        self.data = dict(*args, **kwargs)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, item):
+        kind = 'update' if key in self.data else 'insert'
+        self.data[key] = item
+        self.notify(Delta(kind, key, 1))
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.notify(Delta('remove', key, 1))
+
+    def __eq__(self, other):
+        if isinstance(other, ObservableDict):
+            other = other.data
+        return self.data == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'ObservableDict({0!r})'.format(self.data)
+
+    def clear(self):
+        self.data.clear()
+        self.notify(_RESET)
+
+
+def coalesce(deltas):
+    """
+    Reduce the Deltas received between two frames to as few as describe the
+    same changes, in order. A reset stands for everything before it, only the
+    last 'set' matters, and an update repeating one that has not since been
+    moved by an insert or remove is dropped.
+    """
+    result = []
+    updated = set()
+    for delta in deltas:
+        kind = delta.kind
+        if kind == 'reset' or kind == 'set':
+            result = [delta]
+            updated.clear()
+        elif kind == 'update':
+            if delta.key not in updated:
+                updated.add(delta.key)
+                result.append(delta)
+        else:
+            updated.clear()
+            result.append(delta)
+    return result
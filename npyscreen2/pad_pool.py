@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Manages the curses pads used by Forms.
+
+A pad the size of the screen is a sizeable allocation, and Forms used to create
+a new one every time they were resized or activated. A PadPool lets a Form keep
+its pad for as long as it is big enough, grows pads geometrically when they are
+not, and lets the Forms of an application pass pads to one another as they are
+activated and deactivated.
+"""
+
+from . import backends
+
+import logging
+log = logging.getLogger('npyscreen2.pad_pool')
+
+__all__ = ['PadPool']
+
+
+class PadPool(object):
+    """
+    A pool of curses pads shared by the Forms of an application. A Form asks
+    for a pad with `acquire` and hands it back with `release` when it is no
+    longer active.
+
+    The `allocated`, `reused` and `grown` attributes count how requests have
+    been satisfied; useful for checking that resizing and switching Forms does
+    not cause new allocations.
+    """
+
+    def __init__(self, growth_factor=1.5):
+        #When a pad must grow, it grows by at least this factor, so that a
+        #terminal being dragged larger only causes a few reallocations
+        self.growth_factor = growth_factor
+        self._free = []
+
+        self.allocated = 0
+        self.reused = 0
+        self.grown = 0
+
+    def acquire(self, height, width, pad=None):
+        """
+        Returns a pad with at least `height` rows and `width` columns.
+
+        `pad` should be the pad currently held by the caller, if any. It will be
+        returned as it is if it is big enough, or grown otherwise. Without a
+        pad, a free one from the pool is used before a new one is created.
+        """
+        if pad is None:
+            pad = self._take_free(height, width)
+            if pad is None:
+                self.allocated += 1
+                log.debug('''\
+allocating new pad: height={0}, width={1}'''.format(height, width))
+                return backends.get_backend().newpad(height, width)
+
+        pad_height, pad_width = pad.getmaxyx()
+        if pad_height >= height and pad_width >= width:
+            self.reused += 1
+            return pad
+
+        new_height = max(height, int(pad_height * self.growth_factor))
+        new_width = max(width, int(pad_width * self.growth_factor))
+        if pad_height >= height:
+            new_height = pad_height
+        if pad_width >= width:
+            new_width = pad_width
+        log.debug('''\
+growing pad: height={0}->{1}, width={2}->{3}'''.format(pad_height, new_height,
+                                                       pad_width, new_width))
+        pad.resize(new_height, new_width)
+        self.grown += 1
+        return pad
+
+    def release(self, pad):
+        """
+        Return a pad to the pool so that another Form may use it.
+        """
+        self._free.append(pad)
+
+    def _take_free(self, height, width):
+        """
+        Removes and returns the smallest free pad that fits, or the largest
+        free pad if none fits (it will be grown). Returns None if there are no
+        free pads.
+        """
+        if not self._free:
+            return None
+
+        def area(pad):
+            h, w = pad.getmaxyx()
+            return h * w
+
+        fitting = [pad for pad in self._free
+                   if pad.getmaxyx()[0] >= height and
+                   pad.getmaxyx()[1] >= width]
+        if fitting:
+            pad = min(fitting, key=area)
+        else:
+            pad = max(self._free, key=area)
+        self._free.remove(pad)
+        return pad
@@ -3,6 +3,8 @@
 import curses
 import os
 
+from . import backends
+
 
 import logging
 logger = logging.getLogger('npyscreen2.pmfuncs')
@@ -14,14 +16,14 @@ class ResizeError(Exception):
 
 def hidecursor():
     try:
-        curses.curs_set(0)
+        backends.get_backend().curs_set(0)
     except:
         pass
 
 
 def showcursor():
     try:
-        curses.curs_set(1)
+        backends.get_backend().curs_set(1)
     except:
         pass
 
@@ -32,12 +34,16 @@ def call_subshell(subshell):
     (os.system).  All the usual warnings apply -- the command line will be
     expanded by the shell, so make sure it is safe before passing it to this
     function.
+
+    The terminal contents are not preserved, so the whole terminal is
+    retransmitted when the active Form next commits a frame.
     """
     curses.def_prog_mode()
     #curses.endwin() # Probably causes a memory leak.
 
     rtn = os.system("%s" % (subshell))
     curses.reset_prog_mode()
+    backends.get_backend().invalidate_screen()
     if rtn is not 0:
         return False
     else:
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+"""
+An opt-in profiler for the drawing and resizing of Widgets.
+
+Methods decorated with `profiled` (Widget._update and Widget._resize and their
+overrides in Containers and Forms) are left exactly as they are until a
+Profiler is enabled, at which point they are replaced by timing wrappers; when
+the Profiler is disabled, the originals are put back. There is no cost at all
+while profiling is disabled.
+
+Time is recorded by widget path, such as
+
+    TraditionalForm(MAIN) > GridContainer(0) > TextField(4) > update
+
+where each Widget is named by its class and its widget_id in its parent (see
+Container.add_widget), and the last element says which method was called. For
+each path the inclusive time (including the Widgets it contains), exclusive
+time and number of calls are kept per frame (each Form.display) and in total:
+
+    prof = profiler.enable()
+    ... use the application ...
+    profiler.disable()
+    prof.write_speedscope('frames.speedscope.json')  # https://www.speedscope.app
+    prof.write_collapsed('frames.folded')  # for flamegraph.pl and others
+"""
+
+import collections
+import json
+import time
+
+from . import logs
+
+import logging
+log = logging.getLogger('npyscreen2.profiler')
+
+__all__ = ['Profiler', 'profiled', 'enable', 'disable', 'get_profiler']
+
+
+PROFILER = None
+
+#The (class, attribute name, function) of every profiled method
+_PROFILED = []
+
+
+def get_profiler():
+    return PROFILER
+
+
+def enable(profiler=None):
+    """
+    Start profiling with `profiler`, or a new Profiler, and return it.
+    """
+    global PROFILER
+    if PROFILER is not None:
+        disable()
+    if profiler is None:
+        profiler = Profiler()
+    PROFILER = profiler
+    for owner, name, function in _PROFILED:
+        setattr(owner, name, profiler.wrap(function, name.strip('_')))
+    return profiler
+
+
+def disable():
+    """
+    Stop profiling, restoring the original methods. Returns the Profiler which
+    was in use.
+    """
+    global PROFILER
+    for owner, name, function in _PROFILED:
+        setattr(owner, name, function)
+    profiler, PROFILER = PROFILER, None
+    if profiler is not None:
+        profiler.end_frame()
+    return profiler
+
+
+class profiled(object):
+    """
+    Marks a method to be timed while a Profiler is enabled. The method itself
+    is placed in the class unchanged.
+    """
+    def __init__(self, function):
+        self.function = function
+
+    def __set_name__(self, owner, name):
+        _PROFILED.append((owner, name, self.function))
+        setattr(owner, name, self.function)
+
+
+class Profiler(object):
+    """
+    Records the time spent in the profiled methods of each Widget. `frames`
+    holds the records of the last `max_frames` frames, `totals` those of the
+    whole session; both map paths (tuples of names) to lists of
+    [inclusive seconds, exclusive seconds, calls].
+    """
+    def __init__(self, max_frames=1000, clock=time.perf_counter):
+        self.clock = clock
+        self.frames = collections.deque(maxlen=max_frames)
+        self.totals = {}
+        self.current = {}
+        #Entries of [widget, kind, path, start, time spent in nested calls]
+        self._stack = []
+
+    def wrap(self, function, kind):
+        def profiled_method(widget, *args, **kwargs):
+            return self.call(function, kind, widget, args, kwargs)
+        profiled_method.__name__ = function.__name__
+        profiled_method.__doc__ = function.__doc__
+        profiled_method.__wrapped__ = function
+        return profiled_method
+
+    def widget_path(self, widget):
+        """
+        Returns the names of the Widget and its ancestors, starting with the
+        Form.
+        """
+        path = [logs.widget_name(widget)]
+        while not widget.is_form():
+            widget = widget.parent
+            path.append(logs.widget_name(widget))
+        path.reverse()
+        return tuple(path)
+
+    def call(self, function, kind, widget, args, kwargs):
+        stack = self._stack
+        #An override calling the method it overrides is the same call
+        if stack and stack[-1][0] is widget and stack[-1][1] == kind:
+            return function(widget, *args, **kwargs)
+        path = self.widget_path(widget) + (kind,)
+        entry = [widget, kind, path, self.clock(), 0.0]
+        stack.append(entry)
+        try:
+            return function(widget, *args, **kwargs)
+        finally:
+            elapsed = self.clock() - entry[3]
+            stack.pop()
+            if stack:
+                stack[-1][4] += elapsed
+            record = self.current.get(path)
+            if record is None:
+                record = self.current[path] = [0.0, 0.0, 0]
+            record[0] += elapsed
+            record[1] += elapsed - entry[4]
+            record[2] += 1
+
+    def end_frame(self):
+        """
+        Close the record of the current frame; called by Form.display. Frames
+        are only closed between profiled calls, so a display in the middle of
+        a resize is part of the resize's frame.
+        """
+        if self._stack or not self.current:
+            return
+        frame, self.current = self.current, {}
+        self.frames.append(frame)
+        totals = self.totals
+        for path, (inclusive, exclusive, calls) in frame.items():
+            record = totals.get(path)
+            if record is None:
+                totals[path] = [inclusive, exclusive, calls]
+            else:
+                record[0] += inclusive
+                record[1] += exclusive
+                record[2] += calls
+
+    def report(self, count=20):
+        """
+        Returns a table of the `count` paths with the most exclusive time.
+        """
+        lines = ['{0:>12} {1:>12} {2:>8}  path'.format('inclusive', 'exclusive', 'calls')]
+        ranked = sorted(self.totals.items(), key=lambda item: -item[1][1])
+        for path, (inclusive, exclusive, calls) in ranked[:count]:
+            lines.append('{0:>12.6f} {1:>12.6f} {2:>8}  {3}'.format(inclusive, exclusive, calls, ' > '.join(path)))
+        return '\n'.join(lines)
+
+    def collapsed(self):
+        """
+        Returns the session as collapsed stacks: a line per path of the names
+        joined by semicolons followed by the exclusive time in microseconds.
+        """
+        #Semicolons separate the elements of collapsed stacks
+        return '\n'.join('{0} {1}'.format(';'.join(name.replace(';', ':')
+                                                     for name in path),
+                                           int(round(record[1] * 1e6)))
+                         for path, record in sorted(self.totals.items()))
+
+    def write_collapsed(self, filename):
+        with open(filename, 'w') as out:
+            out.write(self.collapsed())
+            out.write('\n')
+
+    def speedscope(self, name='npyscreen2'):
+        """
+        Returns the session in the speedscope file format, as a sampled
+        profile weighted by exclusive time in microseconds.
+        """
+        frames, index = [], {}
+        samples, weights = [], []
+        for path, record in sorted(self.totals.items()):
+            sample = []
+            for frame_name in path:
+                if frame_name not in index:
+                    index[frame_name] = len(frames)
+                    frames.append({'name': frame_name})
+                sample.append(index[frame_name])
+            samples.append(sample)
+            weights.append(record[1] * 1e6)
+        return {'$schema': 'https://www.speedscope.app/file-format-schema.json',
+                'shared': {'frames': frames},
+                'profiles': [{'type': 'sampled',
+                              'name': name,
+                              'unit': 'microseconds',
+                              'startValue': 0,
+                              'endValue': sum(weights),
+                              'samples': samples,
+                              'weights': weights}],
+                'name': name,
+                'exporter': 'npyscreen2.profiler'}
+
+    def write_speedscope(self, filename, name='npyscreen2'):
+        with open(filename, 'w') as out:
+            json.dump(self.speedscope(name), out)
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+
+"""
+Samples from other processes, through a ring buffer in shared memory.
+
+A collector running as a separate process writes samples (a fixed number of
+floating point channels each, CPU and memory use say) into a RingBuffer in a
+multiprocessing.shared_memory segment; the application attaches to the same
+segment by name and reads the latest sample straight from it, with nothing to
+decode and no pipe to drain:
+
+    #In the collector
+    ring = RingBuffer.create('metrics', channels=2)
+    while True:
+        ring.write((cpu_percent(), mem_percent()))
+        time.sleep(0.1)
+
+    #In the application
+    source = RingBufferSource('metrics', name='metrics')
+    cpu_gauge.subscribe(source, 0)
+    mem_gauge.subscribe(source, 1)
+
+A RingBufferSource is a sources.DataSource, so the Form reads it once per `ttl`
+(by default about once per frame at 30 frames per second) however many Widgets
+show it, and redraws only those whose channel has changed. LocalProducer runs a
+sampling function in a child process for you.
+
+The segment starts with a header giving its layout, followed by `capacity`
+slots of `channels` doubles in native byte order, and the count of samples
+written so far. The writer fills the slot after the last and then advances the
+count; readers take the count, copy the slots they want and check that the
+writer has not come round to them meanwhile. Neither ever waits for the other:
+a reader which falls more than `capacity` samples behind loses the oldest, and
+the writer never notices that anyone is reading. There must be one writer.
+
+The samples are read through a memoryview of the segment, or as a NumPy array
+of `capacity` rows and `channels` columns (`RingBuffer.array`) when NumPy is
+installed and `use_numpy` is given.
+"""
+
+import multiprocessing
+import os
+import struct
+import time
+
+from multiprocessing import shared_memory
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .sources import DataSource
+
+import logging
+log = logging.getLogger('npyscreen2.ring_buffer')
+
+__all__ = ['RingBuffer', 'RingBufferSource', 'LocalProducer', 'run_producer']
+
+
+MAGIC = b'NPRB'
+VERSION = 1
+#Magic, version, channels and capacity, then the count of samples written
+_HEADER = struct.Struct('=4sIII')
+_COUNT_OFFSET = 16
+_DATA_OFFSET = 32
+
+
+def _attach(name, track):
+    #Before Python 3.13, attaching always registers the segment to be unlinked
+    #when the processes sharing this one's resource tracker exit, which is for
+    #its creator to do
+    try:
+        return shared_memory.SharedMemory(name, track=track)
+    except TypeError:
+        pass
+    shm = shared_memory.SharedMemory(name)
+    if not track and os.name == 'posix':
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+class RingBuffer(object):
+    """
+    A ring buffer of samples in the shared memory segment `name`, which is
+    attached to; use `create` to make a new one. With `use_numpy`, `array` is a
+    NumPy array of the slots.
+
+    `track` should be True only in the process creating the segment and its
+    children, which share its multiprocessing resource tracker.
+    """
+    def __init__(self, name, use_numpy=False, track=False, _shm=None):
+        if use_numpy and numpy is None:
+            raise ImportError('NumPy is not available')
+        self._owner = _shm is not None
+        self.shm = _shm if _shm is not None else _attach(name, track)
+        buf = self.shm.buf
+        magic, version, channels, capacity = _HEADER.unpack_from(buf)
+        if magic != MAGIC or version != VERSION:
+            self.shm.close()
+            raise ValueError('{0!r} does not hold a ring buffer'.format(name))
+        self.channels = channels
+        self.capacity = capacity
+        #The count is read and written whole, as one aligned 8 byte word
+        self._count = buf[_COUNT_OFFSET:_COUNT_OFFSET + 8].cast('Q')
+        size = channels * capacity
+        self.samples = buf[_DATA_OFFSET:_DATA_OFFSET + 8 * size].cast('d')
+        self.array = None
+        if use_numpy:
+            self.array = numpy.ndarray((capacity, channels), dtype=numpy.float64,
+                                       buffer=buf, offset=_DATA_OFFSET)
+        #Samples a reader has fallen too far behind to read, see read_since
+        self.lost = 0
+
+    @classmethod
+    def create(cls, name=None, channels=1, capacity=1024, use_numpy=False):
+        """
+        Create a new segment holding an empty ring buffer of `capacity` slots
+        of `channels` values; a name is chosen if `name` is None. The buffer
+        which creates a segment unlinks it in `unlink`.
+        """
+        if channels < 1 or capacity < 2:
+            raise ValueError('a ring buffer needs a channel and two slots')
+        size = _DATA_OFFSET + 8 * channels * capacity
+        shm = shared_memory.SharedMemory(name, create=True, size=size)
+        _HEADER.pack_into(shm.buf, 0, MAGIC, VERSION, channels, capacity)
+        struct.pack_into('=Q', shm.buf, _COUNT_OFFSET, 0)
+        return cls(shm.name, use_numpy=use_numpy, _shm=shm)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def count(self):
+        """
+        The number of samples written so far.
+        """
+        return self._count[0]
+
+    def __repr__(self):
+        return 'RingBuffer({0!r}, channels={1}, capacity={2})'.format(
+            self.name, self.channels, self.capacity)
+
+    def write(self, values):
+        """
+        Write the sample `values`, a sequence of `channels` numbers, over the
+        oldest one.
+        """
+        count = self._count[0]
+        channels = self.channels
+        start = (count % self.capacity) * channels
+        samples = self.samples
+        for i in range(channels):
+            samples[start + i] = values[i]
+        self._count[0] = count + 1
+
+    def latest(self):
+        """
+        Returns the last sample written, as a tuple, or None if there is none.
+        """
+        channels = self.channels
+        capacity = self.capacity
+        while True:
+            count = self._count[0]
+            if not count:
+                return None
+            start = ((count - 1) % capacity) * channels
+            values = tuple(self.samples[start:start + channels])
+            #The slot is only written again once the count has come round
+            if self._count[0] - count < capacity - 1:
+                return values
+
+    def read_since(self, cursor):
+        """
+        Returns the cursor to pass next time, and the samples written since the
+        count was `cursor`, oldest first, as a list of tuples. Samples
+        overwritten before they could be read are skipped, and added to `lost`.
+        """
+        channels = self.channels
+        capacity = self.capacity
+        count = self._count[0]
+        #The slot of the oldest sample may be being written already
+        first = max(cursor, count - capacity + 1)
+        samples = self.samples
+        values = []
+        for index in range(first, count):
+            start = (index % capacity) * channels
+            values.append(tuple(samples[start:start + channels]))
+        #Discard the samples the writer has overtaken meanwhile, which may
+        #include some written after they were counted
+        overtaken = self._count[0] - capacity + 1 - first
+        if overtaken > 0:
+            del values[:overtaken]
+            first += overtaken
+        self.lost += max(first - cursor, 0)
+        return max(count, first), values
+
+    def close(self):
+        """
+        Detach from the segment. The views of it must be released first, so
+        `array` and `samples` may not be used after this.
+        """
+        self.array = None
+        for view in (self._count, self.samples):
+            view.release()
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Destroy the segment, if this buffer created it.
+        """
+        if self._owner:
+            self.shm.unlink()
+            self._owner = False
+
+
+class RingBufferSource(DataSource):
+    """
+    A DataSource whose value is the latest sample of `ring`, a RingBuffer or
+    the name of one to attach to, as a tuple of its channels; zeros until the
+    first sample is written. Select a channel by its index.
+    """
+    def __init__(self, ring, ttl=1 / 30, name=None, clock=time.monotonic):
+        if not isinstance(ring, RingBuffer):
+            ring = RingBuffer(ring)
+        self.ring = ring
+        self._last_count = 0
+        self._sample = (0.0,) * ring.channels
+        super(RingBufferSource, self).__init__(self._latest, ttl, name, clock)
+
+    def _latest(self):
+        #The same sample as before, while the writer has not written another
+        count = self.ring.count
+        if count != self._last_count:
+            sample = self.ring.latest()
+            if sample is not None:
+                self._sample = sample
+            self._last_count = count
+        return self._sample
+
+
+def run_producer(name, sample, interval=0.1, stop=None, limit=None,
+                 track=False):
+    """
+    Write the samples returned by `sample`, called with no arguments, to the
+    RingBuffer `name` every `interval` seconds (as fast as possible if it is
+    0), until the multiprocessing.Event `stop` is set or `limit` samples have
+    been written. Returns the number written. `track` is as for RingBuffer.
+    """
+    ring = RingBuffer(name, track=track)
+    written = 0
+    due = time.monotonic()
+    try:
+        while (stop is None or not stop.is_set()) and \
+              (limit is None or written < limit):
+            ring.write(sample())
+            written += 1
+            if interval:
+                due += interval
+                delay = due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    due = time.monotonic()
+    finally:
+        ring.close()
+    return written
+
+
+class LocalProducer(object):
+    """
+    Runs `sample` in a child process, writing what it returns to a new
+    RingBuffer (see run_producer); `ring` is the buffer, for the application to
+    read or give to a RingBufferSource. Use as a context manager, or call
+    `start` and then `stop`, which also destroys the buffer. With the spawn
+    start method `sample` must be picklable.
+    """
+    def __init__(self, sample, channels=1, capacity=1024, interval=0.1,
+                 name=None, limit=None):
+        self.ring = RingBuffer.create(name, channels=channels,
+                                      capacity=capacity)
+        self._stop = multiprocessing.Event()
+        self.process = multiprocessing.Process(
+            target=run_producer,
+            args=(self.ring.name, sample, interval, self._stop, limit, True),
+            name='npyscreen2-producer', daemon=True)
+
+    def start(self):
+        self.process.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self.process.pid is not None:
+            self.process.join(timeout)
+        self.ring.close()
+        self.ring.unlink()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
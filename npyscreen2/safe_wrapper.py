@@ -12,6 +12,8 @@ import subprocess
 import sys
 import warnings
 
+from . import terminal
+
 import logging
 logger = logging.getLogger('npyscreen2.safe_wrapper')
 
@@ -55,6 +57,7 @@ def wrapper_fork(call_function, reset=True):
         except:
             pass
         SCREEN.keypad(1)
+        terminal.install_sigwinch_handler()
         curses.noecho()
         curses.cbreak()
         curses.def_prog_mode()
@@ -89,6 +92,7 @@ wrapper_fork to avoid.''')
         curses.noecho()
         curses.cbreak()
         SCREEN.keypad(1)
+        terminal.install_sigwinch_handler()
 
     curses.noecho()
     curses.cbreak()
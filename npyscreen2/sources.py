@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+
+"""
+Data sources shared by many Widgets.
+
+A feed belongs to one Widget, so a dashboard showing several figures from the
+same place (CPU, memory and load from /proc, say) in separate Widgets reads it
+once per Widget. A DataSource is fetched once instead, and the result kept for
+`ttl` seconds; Widgets subscribe to the part of it they show through a
+selector:
+
+    sources = SourceRegistry()
+    sources.register('stat', read_proc_stat, ttl=1.0)
+    app = MyApp(sources=sources)
+
+    #Then, on a Form of the application
+    cpu_gauge.subscribe('stat', lambda stat: stat.cpu_percent)
+    load_field.subscribe('stat', 'load')  #stat['load']
+
+A Form fetches the sources its Widgets subscribe to while it waits for input,
+each as its `ttl` runs out, as it does its timers. The value selected for each
+Widget is compared with a copy of the last one given to it and only set if it
+differs, so Widgets showing a figure which has not changed are not redrawn, and
+a fetch which changes nothing does not draw a frame at all. As the comparison
+is with a copy, a fetch may change and return the same list or dict each time.
+"""
+
+import copy
+import time
+import weakref
+
+from . import models
+
+import logging
+log = logging.getLogger('npyscreen2.sources')
+
+__all__ = ['DataSource', 'SourceRegistry', 'Subscription']
+
+#The last selection of a Subscription which has not given one yet
+_NOTHING = object()
+
+
+class Subscription(object):
+    """
+    A Widget subscribed to a DataSource. Its `selector` is None to select the
+    whole value, a callable to be called with the value, or else a key to look
+    up in it. `last` is a copy of the last selection given to the Widget.
+    """
+    __slots__ = ('widget', 'selector', 'last')
+
+    def __init__(self, widget, selector=None):
+        self.widget = weakref.ref(widget)
+        self.selector = selector
+        self.last = _NOTHING
+
+    def select(self, value):
+        selector = self.selector
+        if selector is None:
+            return value
+        if callable(selector):
+            return selector(value)
+        return value[selector]
+
+    def deliver(self, value):
+        """
+        Give the selection from `value` to the Widget if it differs from the
+        last one. Returns True if it was given, or None if the Widget is gone.
+        """
+        widget = self.widget()
+        if widget is None:
+            return None
+        selected = self.select(value)
+        if self.last is not _NOTHING and selected == self.last:
+            return False
+        self.last = copy.deepcopy(selected)
+        if models.untracked(widget.value) is selected:
+            #Changed in place, so assigning it again would be no change
+            widget.value_mutated()
+        else:
+            widget.value = selected
+        return True
+
+
+class DataSource(object):
+    """
+    A function, `fetch`, whose result is kept for `ttl` seconds and shared by
+    the Widgets subscribed to it.
+
+        fetches     calls made to `fetch`
+        hits        calls to `get` answered from the cache
+    """
+    def __init__(self, fetch, ttl=1.0, name=None, clock=time.monotonic):
+        if ttl <= 0:
+            raise ValueError('ttl must be greater than 0')
+        self.fetch = fetch
+        self.ttl = ttl
+        self.name = name
+        self.clock = clock
+        self.fetched_at = None
+        self._value = None
+        self.subscriptions = []
+        self.fetches = 0
+        self.hits = 0
+
+    def __repr__(self):
+        return 'DataSource({0!r}, ttl={1!r}, name={2!r})'.format(
+            self.fetch, self.ttl, self.name)
+
+    def expires_in(self):
+        """
+        Returns the number of seconds until the cached value expires (0 if it
+        has, or there is none).
+        """
+        if self.fetched_at is None:
+            return 0
+        return max(self.fetched_at + self.ttl - self.clock(), 0)
+
+    @property
+    def expired(self):
+        return self.expires_in() == 0
+
+    def get(self):
+        """
+        Returns the value, fetching it only if the cached one has expired.
+        """
+        if self.expired:
+            self._value = self.fetch()
+            self.fetched_at = self.clock()
+            self.fetches += 1
+        else:
+            self.hits += 1
+        return self._value
+
+    def invalidate(self):
+        """
+        Discard the cached value, so that it is fetched again when next due.
+        """
+        self.fetched_at = None
+
+    def subscribe(self, widget, selector=None):
+        """
+        Give `widget` the selection of the value made by `selector` (see
+        Subscription) whenever it changes, replacing any earlier subscription
+        of `widget` to this source. Returns the Subscription.
+        """
+        self.unsubscribe(widget)
+        subscription = Subscription(widget, selector)
+        self.subscriptions.append(subscription)
+        #A Widget subscribing to a source fetched already need not wait
+        if self.fetched_at is not None and not self.expired:
+            subscription.deliver(self._value)
+        return subscription
+
+    def unsubscribe(self, widget):
+        self.subscriptions = [subscription
+                              for subscription in self.subscriptions
+                              if subscription.widget() not in (widget, None)]
+
+    def publish(self):
+        """
+        Get the value, and give each subscribed Widget its selection if that
+        has changed. Returns the number of Widgets given a new value.
+        """
+        value = self.get()
+        changed = 0
+        gone = False
+        for subscription in self.subscriptions:
+            delivered = subscription.deliver(value)
+            if delivered is None:
+                gone = True
+            elif delivered:
+                changed += 1
+        if gone:
+            self.subscriptions = [subscription
+                                  for subscription in self.subscriptions
+                                  if subscription.widget() is not None]
+        return changed
+
+
+class SourceRegistry(object):
+    """
+    DataSources by name. A Form holding a registry fetches the sources which
+    have subscribers as they expire, while it waits for input; the sources are
+    few, so they are simply visited in turn.
+
+        fetches     sources published
+        changed     selections given to Widgets
+        unchanged   selections not given, as they had not changed
+    """
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._sources = {}
+        self.fetches = 0
+        self.changed = 0
+        self.unchanged = 0
+
+    def __len__(self):
+        return len(self._sources)
+
+    def __contains__(self, name):
+        return name in self._sources
+
+    def __getitem__(self, name):
+        return self._sources[name]
+
+    def __iter__(self):
+        return iter(self._sources.values())
+
+    def register(self, name, fetch, ttl=1.0):
+        """
+        Register `fetch` as the DataSource `name`, replacing any source of that
+        name. Returns the DataSource.
+        """
+        return self.add(DataSource(fetch, ttl, name=name, clock=self.clock))
+
+    def add(self, source):
+        """
+        Register the DataSource `source` under its name. Returns the source.
+        """
+        if source.name is None:
+            raise ValueError('a DataSource must have a name to be registered')
+        self._sources[source.name] = source
+        return source
+
+    def subscribe(self, widget, source, selector=None):
+        """
+        Subscribe `widget` to `source`, a DataSource or the name of one; see
+        DataSource.subscribe.
+        """
+        if not isinstance(source, DataSource):
+            source = self._sources[source]
+        elif self._sources.get(source.name) is not source:
+            self.add(source)
+        return source.subscribe(widget, selector)
+
+    def unsubscribe(self, widget):
+        for source in self._sources.values():
+            source.unsubscribe(widget)
+
+    def next_due(self):
+        """
+        Returns the number of seconds until the next source with subscribers
+        expires (0 if one has), or None if no source has subscribers.
+        """
+        due = None
+        for source in self._sources.values():
+            if source.subscriptions:
+                when = source.expires_in()
+                if due is None or when < due:
+                    due = when
+        return due
+
+    def run_due(self):
+        """
+        Publish the expired sources with subscribers, and returns the number of
+        Widgets given a new value.
+        """
+        changed = 0
+        for source in list(self._sources.values()):
+            if source.subscriptions and source.expired:
+                subscribers = len(source.subscriptions)
+                published = source.publish()
+                self.fetches += 1
+                self.unchanged += subscribers - published
+                changed += published
+        self.changed += changed
+        return changed
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+"""
+Keeps track of the size of the physical terminal.
+
+Asking the terminal for its size costs a system call, so the size is queried
+once and cached until the terminal is resized. The cache is invalidated when a
+Form receives curses.KEY_RESIZE, and by a SIGWINCH handler where one can be
+installed (see `install_sigwinch_handler`).
+"""
+
+import curses
+import signal
+
+from . import backends
+
+import logging
+log = logging.getLogger('npyscreen2.terminal')
+
+__all__ = ['size', 'invalidate', 'install_sigwinch_handler', 'watch_resize',
+           'take_resize']
+
+
+#Cached (height, width) of the terminal, None when it must be queried again
+_SIZE = None
+
+#Set by the handler installed by watch_resize when the terminal is resized,
+#and the Waker it wakes
+_RESIZED = False
+_RESIZE_WAKER = None
+_WATCHING = False
+
+
+def size():
+    """
+    Returns the height and width of the physical screen.
+    """
+    global _SIZE
+    if _SIZE is None:
+        _SIZE = query_size()
+    return _SIZE
+
+
+def invalidate():
+    """
+    Forget the cached terminal size, it will be queried on the next call to
+    `size`.
+    """
+    global _SIZE
+    _SIZE = None
+
+
+def query_size():
+    """
+    Ask the terminal for its size, bypassing the cache.
+    """
+    max_y, max_x = backends.get_backend().terminal_size()
+    log.info('terminal size queried; height/lines=%s, width/cols=%s',
+             max_y, max_x)
+    return (max_y, max_x)
+
+
+def install_sigwinch_handler():
+    """
+    Invalidate the cached size whenever the process receives SIGWINCH. Returns
+    True if the handler was installed.
+
+    curses normally installs its own SIGWINCH handler, which is what produces
+    curses.KEY_RESIZE; such a handler cannot be chained to from Python, so it is
+    left in place and the cache is invalidated on KEY_RESIZE instead. A handler
+    installed from Python will be chained to. If nothing handles SIGWINCH, then
+    KEY_RESIZE is pushed onto the input queue so that the Form still resizes.
+    """
+    try:
+        previous = signal.getsignal(signal.SIGWINCH)
+    except AttributeError:  # No SIGWINCH on this platform
+        return False
+    if previous is None:  # Installed from C, most likely by curses
+        return False
+
+    def handler(signum, frame):
+        invalidate()
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            try:
+                curses.ungetch(curses.KEY_RESIZE)
+            except curses.error:
+                pass
+
+    try:
+        signal.signal(signal.SIGWINCH, handler)
+    except ValueError:  # Not in the main thread
+        return False
+    return True
+
+
+def watch_resize(waker):
+    """
+    Wake `waker` (a timers.Waker) when the terminal is resized, so that a Form
+    waiting for input in `select` hears of it; see `take_resize`. Returns True
+    if the resize can be watched for.
+
+    curses only notices a resize when asked for a key, so its SIGWINCH handler
+    is replaced; curses.KEY_RESIZE must then be produced by the caller.
+    """
+    global _RESIZE_WAKER, _WATCHING
+    _RESIZE_WAKER = waker
+    if _WATCHING:
+        return True
+    try:
+        previous = signal.getsignal(signal.SIGWINCH)
+    except AttributeError:  # No SIGWINCH on this platform
+        return False
+
+    def handler(signum, frame):
+        global _RESIZED
+        invalidate()
+        _RESIZED = True
+        if _RESIZE_WAKER is not None:
+            _RESIZE_WAKER.wake()
+        if callable(previous):
+            previous(signum, frame)
+
+    try:
+        signal.signal(signal.SIGWINCH, handler)
+    except ValueError:  # Not in the main thread
+        return False
+    _WATCHING = True
+    return True
+
+
+def take_resize():
+    """
+    Returns True, once, if the terminal has been resized since the last call.
+    """
+    global _RESIZED
+    resized, _RESIZED = _RESIZED, False
+    return resized
@@ -6,6 +6,7 @@ CHANGE, AND NO DEFAULT WIDGETS CURRENTLY TAKE ADVANTAGE OF THEME SUPPORT AT ALL.
 """
 
 import curses
+from . import backends
 from . import global_options
 
 import logging
@@ -21,6 +22,10 @@ def enable_color():
 
 
 class ThemeManager(object):
+    #Counts the compilations of the attribute table, so that the Forms and
+    #Widgets which have drawn with an older one know to redraw; see compile
+    generation = 0
+
     _colors_to_define = (
      # DO NOT DEFINE THIS COLOR - THINGS BREAK
      #('WHITE_BLACK',      DO_NOT_DO_THIS,      DO_NOT_DO_THIS),
@@ -81,35 +86,65 @@ class ThemeManager(object):
         #curses.use_default_colors()
         self._defined_pairs = {}
         self._names = {}
+        #Logical names mapped directly to their final attribute, see compile
+        self.attr_table = {}
+        self.default_attr = 0
         try:
-            self._max_pairs = curses.COLOR_PAIRS - 1
+            self._max_pairs = backends.get_backend().color_pairs() - 1
             do_color = True
         except AttributeError:
             # curses.start_color has failed or has not been called
             do_color = False
             # Disable all color use across the application
             disable_color()
-        if do_color and curses.has_colors():
+        self._has_colors = do_color and backends.get_backend().has_colors()
+        if self._has_colors:
             self.initialize_pairs()
             self.initialize_names()
+            self.compile()
 
     def find_pair(self, caller, request='DEFAULT'):
         #log.debug('ThemeManager.find_pair called by {0}, request={1}'.format(caller, request))
-        if not curses.has_colors() or global_options.DISABLE_ALL_COLORS:
+        if not self._has_colors or global_options.DISABLE_ALL_COLORS:
             return False
 
         if request == 'DEFAULT':
             request = caller.color
-        #Locate the requested colour pair. Default to default if not found.
-        try:
-            pair = self._defined_pairs[self._names[request]]
-        except:
-            pair = self._defined_pairs[self._names['DEFAULT']]
-
-        #now make the actual attribute
-        color_attribute = curses.color_pair(pair[0])
-
-        return color_attribute
+        #Locate the requested attribute. Default to default if not found.
+        return self.attr_table.get(request, self.default_attr)
+
+    def compile(self):
+        """
+        Resolves every logical name (such as 'LABEL') through its color pair to
+        the final attribute used in drawing, so that find_pair is a single
+        lookup. The new table replaces the old one in a single assignment, so
+        callers will see either the old table or the new one, never a mixture.
+
+        This is called on instantiation; call it again after changing the names
+        or pairs of a ThemeManager which is in use. Each call increments
+        `generation`, and Forms displaying with this ThemeManager are redrawn
+        in full on their next display.
+        """
+        table = {}
+        backend = backends.get_backend()
+        for name, pair_name in self._names.items():
+            pair = self._defined_pairs.get(pair_name)
+            if pair is None:
+                log.debug('Theme name {0} refers to undefined pair {1}'.format(name, pair_name))
+                continue
+            table[name] = backend.color_pair(pair[0])
+        self.default_attr = table.get('DEFAULT', 0)
+        self.attr_table = table
+        self.generation += 1
+
+    def set_name(self, name, pair_name):
+        """
+        Points the logical name at the named color pair and recompiles the
+        attribute table.
+        """
+        self._names[name] = pair_name
+        if self._has_colors:
+            self.compile()
 
     def set_default(self, caller):
         return False
@@ -134,7 +169,7 @@ class ThemeManager(object):
 
         _this_pair_number = len(list(self._defined_pairs.keys())) + 1
 
-        curses.init_pair(_this_pair_number, fg, bg)
+        backends.get_backend().init_pair(_this_pair_number, fg, bg)
 
         self._defined_pairs[name] = (_this_pair_number, fg, bg)
 
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import curses
+from . import backends
 from . import theme_managers as theme_managers
 
 class DefaultTheme(theme_managers.ThemeManager):
@@ -135,7 +136,7 @@ class TransparentThemeDarkText(theme_managers.ThemeManager):
 
 
     def __init__(self, *args, **keywords):
-        curses.use_default_colors()
+        backends.get_backend().use_default_colors()
         super(TransparentThemeDarkText, self).__init__(*args, **keywords)
 
 class TransparentThemeLightText(TransparentThemeDarkText):
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+"""
+Timers, and waking a Form which is waiting for input.
+
+A Form waits for keys in `select` on the terminal, for no longer than until
+the next thing it has to do: the earliest of its timers, the next feed due
+from its FeedScheduler and its keypress_timeout. An application with nothing
+to do waits for as long as it takes someone to press a key, and uses no CPU
+meanwhile.
+
+Timers are set on a Form, or on a Widget, which sets them on its Form:
+
+    timer = widget.call_every(0.25, widget.blink)
+    form.call_later(0.005, form.flush)
+    timer.cancel()
+
+Their callbacks are called on the application's thread, with no arguments,
+while the Form waits for input, after which the Form is displayed. Times are
+in seconds, by time.monotonic, to a resolution of milliseconds or better.
+
+A Waker is a pipe which a Form watches along with the terminal, so that
+writing to it from elsewhere (another thread, or a signal handler) ends the
+wait early.
+"""
+
+import heapq
+import itertools
+import os
+import time
+
+import logging
+log = logging.getLogger('npyscreen2.timers')
+
+__all__ = ['Timer', 'TimerQueue', 'Waker']
+
+
+class Timer(object):
+    """
+    A callback to be called at `when`, and every `interval` seconds after if
+    `interval` is not None, until cancelled.
+    """
+    __slots__ = ('when', 'interval', 'callback', 'cancelled')
+
+    def __init__(self, when, interval, callback):
+        self.when = when
+        self.interval = interval
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def __repr__(self):
+        return 'Timer(when={0!r}, interval={1!r}, callback={2!r})'.format(
+            self.when, self.interval, self.callback)
+
+
+class TimerQueue(object):
+    """
+    Timers, in a heap by the time they are next due.
+    """
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._heap = []
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _push(self, timer):
+        heapq.heappush(self._heap, (timer.when, next(self._counter), timer))
+        return timer
+
+    def call_later(self, delay, callback):
+        """
+        Call `callback` once, in `delay` seconds. Returns the Timer.
+        """
+        return self._push(Timer(self.clock() + delay, None, callback))
+
+    def call_every(self, interval, callback, delay=None):
+        """
+        Call `callback` every `interval` seconds, the first time in `delay`
+        seconds (by default, `interval`). Returns the Timer.
+        """
+        if interval <= 0:
+            raise ValueError('interval must be greater than 0')
+        if delay is None:
+            delay = interval
+        return self._push(Timer(self.clock() + delay, interval, callback))
+
+    def next_due(self):
+        """
+        Returns the number of seconds until the next timer is due (0 if one is
+        overdue), or None if there are no timers.
+        """
+        heap = self._heap
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        return max(heap[0][0] - self.clock(), 0)
+
+    def run_due(self):
+        """
+        Call the callbacks of the timers which are due, and returns how many
+        were called.
+        """
+        heap = self._heap
+        now = self.clock()
+        called = 0
+        while heap and heap[0][0] <= now:
+            timer = heapq.heappop(heap)[2]
+            if timer.cancelled:
+                continue
+            if timer.interval is not None:
+                #Keep to the interval, unless the timer has fallen behind
+                timer.when += timer.interval
+                if timer.when <= now:
+                    timer.when = now + timer.interval
+                self._push(timer)
+            called += 1
+            timer.callback()
+        return called
+
+
+class Waker(object):
+    """
+    A pipe to be watched along with the terminal; `wake` makes it readable,
+    which may be done from any thread or from a signal handler.
+    """
+    def __init__(self):
+        self.read_fd, self.write_fd = os.pipe()
+        os.set_blocking(self.read_fd, False)
+        os.set_blocking(self.write_fd, False)
+
+    def fileno(self):
+        return self.read_fd
+
+    def wake(self):
+        try:
+            os.write(self.write_fd, b'\0')
+        except (BlockingIOError, OSError):
+            #The pipe is full, so it is readable already, or it is closed
+            pass
+
+    def clear(self):
+        """
+        Empty the pipe, after waking.
+        """
+        try:
+            while os.read(self.read_fd, 4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self):
+        for fd in (self.read_fd, self.write_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.read_fd = self.write_fd = -1
@@ -4,12 +4,14 @@ import logging
 log = logging.getLogger('npyscreen2.widgets')
 
 __all__ = ['Widget', 'NotEnoughSpaceForWidget', 'LinePrinter', 'InputHandler',
-           'BorderBox', 'TextField', 'Gauge']
+           'KeyMap', 'key_predicate', 'BorderBox', 'TextField', 'Gauge',
+           'ListView']
 
-from .input_handler import InputHandler
+from .input_handler import InputHandler, KeyMap, key_predicate
 from .line_printer import LinePrinter
 
 from .widget import Widget, NotEnoughSpaceForWidget
 from .borderbox import BorderBox
 from .textfield import TextField
-from .gauge import Gauge
\ No newline at end of file
+from .gauge import Gauge
+from .listview import ListView
\ No newline at end of file
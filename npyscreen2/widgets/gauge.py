@@ -100,6 +100,9 @@ class Gauge(Widget):
         return fill_len
 
     def fill_attr(self):
+        return self.style_attr('fill', self.compute_fill_attr)
+
+    def compute_fill_attr(self):
         attr = curses.A_REVERSE
         if self.bold:
             attr |= curses.A_BOLD
@@ -114,17 +117,20 @@ class Gauge(Widget):
         if not fill_length:
             return
 
-        self.color = None
+        color = None
 
         dynamic_range = self.max_val - self.min_val
         #Break points will be interpreted as a fraction of fill_len
         if self.theme_by_proportion:
             for i, point in enumerate(self.theme_breakpoints):
                 if self.value <= dynamic_range * point:
-                    self.color = self.themes[i]
+                    color = self.themes[i]
                     break
-            if self.color is None:
-                self.color = self.themes[-1]
+            if color is None:
+                color = self.themes[-1]
+            #Only assigned once, so the memoized attributes survive if the
+            #color has not changed
+            self.color = color
 
             if self.horizontal:
                 if not self.reverse:
@@ -1,13 +1,24 @@
 # -*- coding: utf-8 -*-
 
 import curses
+import curses.ascii
 from functools import wraps
 
 
 import logging
 log = logging.getLogger('npyscreen2.widgets.input_handler')
 
-__all__ = ['exit_edit_method', 'InputHandler']
+__all__ = ['exit_edit_method', 'key_predicate', 'InputHandler', 'KeyMap']
+
+
+#Incremented whenever any Widget's handlers or complex_handlers change, so that
+#a KeyMap can tell that it is out of date
+_handlers_generation = 0
+
+
+def _handlers_changed():
+    global _handlers_generation
+    _handlers_generation += 1
 
 
 def exit_edit_method(func):
@@ -29,65 +40,250 @@ def exit_edit_method(func):
     return wrapper
 
 
+def key_predicate(func):
+    """
+    This function serves as a decorator for the test functions of complex
+    handlers whose result depends upon nothing but the input value, such as
+    TextField.t_input_isprint. A KeyMap needs only call such a test once for
+    each input value; the outcome is stored in its table along with the simple
+    handlers.
+
+    The test functions of the curses.ascii module (isprint, isdigit and so on)
+    are treated this way without being decorated.
+    """
+    func.key_predicate = True
+    return func
+
+
+def _is_key_predicate(test):
+    if getattr(test, 'key_predicate', False):
+        return True
+    return getattr(test, '__module__', None) == 'curses.ascii'
+
+
+class _HandlerDict(dict):
+    """
+    The dictionary holding a Widget's handlers, noting any change to itself.
+    """
+    def __setitem__(self, key, value):
+        super(_HandlerDict, self).__setitem__(key, value)
+        _handlers_changed()
+
+    def __delitem__(self, key):
+        super(_HandlerDict, self).__delitem__(key)
+        _handlers_changed()
+
+    def update(self, *args, **kwargs):
+        super(_HandlerDict, self).update(*args, **kwargs)
+        _handlers_changed()
+
+    def setdefault(self, key, default=None):
+        _handlers_changed()
+        return super(_HandlerDict, self).setdefault(key, default)
+
+    def pop(self, *args):
+        _handlers_changed()
+        return super(_HandlerDict, self).pop(*args)
+
+    def popitem(self):
+        _handlers_changed()
+        return super(_HandlerDict, self).popitem()
+
+    def clear(self):
+        super(_HandlerDict, self).clear()
+        _handlers_changed()
+
+
+class _HandlerList(list):
+    """
+    The list holding a Widget's complex handlers, noting any change to itself.
+    """
+    def __setitem__(self, index, value):
+        super(_HandlerList, self).__setitem__(index, value)
+        _handlers_changed()
+
+    def __delitem__(self, index):
+        super(_HandlerList, self).__delitem__(index)
+        _handlers_changed()
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def append(self, item):
+        super(_HandlerList, self).append(item)
+        _handlers_changed()
+
+    def extend(self, items):
+        super(_HandlerList, self).extend(items)
+        _handlers_changed()
+
+    def insert(self, index, item):
+        super(_HandlerList, self).insert(index, item)
+        _handlers_changed()
+
+    def remove(self, item):
+        super(_HandlerList, self).remove(item)
+        _handlers_changed()
+
+    def pop(self, *args):
+        _handlers_changed()
+        return super(_HandlerList, self).pop(*args)
+
+    def clear(self):
+        super(_HandlerList, self).clear()
+        _handlers_changed()
+
+    def reverse(self):
+        super(_HandlerList, self).reverse()
+        _handlers_changed()
+
+    def sort(self, *args, **kwargs):
+        super(_HandlerList, self).sort(*args, **kwargs)
+        _handlers_changed()
+
+
+#The kinds of step a KeyMap takes in resolving an input
+_KEYS, _UNCTRL, _PREDICATE, _TEST = range(4)
+
+
+class KeyMap(object):
+    """
+    The handlers of a Widget and of all of its parents up to the Form,
+    compiled into a single table mapping each input to the handler which
+    InputHandler.handle_input would reach for it.
+
+    Resolving an input follows the same steps as handle_input always has: at
+    each level, starting with the Widget, its handlers are looked up by the
+    input and then by `curses.ascii.unctrl` of the input, and then the tests of
+    its complex handlers are tried in order. The handler found is stored in the
+    table under the input, so that each input is only resolved once; later
+    presses of the same key are a single dictionary lookup. Only the tests
+    marked with key_predicate allow this. A result which depended upon any
+    other test is not stored, and the input is resolved again next time.
+
+    If a parent's class overrides handle_input, the input is handed to that
+    method when nothing below it handles the input.
+    """
+    def __init__(self, widget):
+        self.widget = widget
+        self.generation = _handlers_generation
+        self.table = {}
+        self.steps = []
+        self.delegate = None
+        level = widget
+        while True:
+            self.steps.append((_KEYS, level.handlers, None))
+            if any(isinstance(key, str) for key in level.handlers):
+                self.steps.append((_UNCTRL, level.handlers, None))
+            for test, handler in level.complex_handlers:
+                if _is_key_predicate(test):
+                    self.steps.append((_PREDICATE, test, handler))
+                else:
+                    self.steps.append((_TEST, test, handler))
+            if level.is_form():
+                break
+            level = level.parent
+            if level.__class__.handle_input is not InputHandler.handle_input:
+                self.delegate = level
+                break
+
+    def is_current(self, widget):
+        return self.widget is widget and \
+               self.generation == _handlers_generation
+
+    def resolve(self, inpt):
+        """
+        Returns the handler for `inpt`, or None, and whether that result may be
+        kept in the table.
+        """
+        final = True
+        for kind, target, handler in self.steps:
+            if kind == _KEYS:
+                if inpt in target:
+                    return target[inpt], final
+            elif kind == _UNCTRL:
+                try:
+                    unctrl_inpt = curses.ascii.unctrl(inpt)
+                except TypeError:
+                    continue
+                if unctrl_inpt in target:
+                    return target[unctrl_inpt], final
+            elif kind == _PREDICATE:
+                if target(inpt) is not False:
+                    return handler, final
+            else:
+                final = False
+                if target(inpt) is not False:
+                    return handler, final
+        return None, final and self.delegate is None
+
+    def dispatch(self, inpt):
+        """
+        Calls the handler for `inpt`. Returns True if the input was dealt with.
+        """
+        try:
+            handler = self.table[inpt]
+        except KeyError:
+            handler, final = self.resolve(inpt)
+            if final:
+                self.table[inpt] = handler
+        except TypeError:  # Unhashable input
+            handler = self.resolve(inpt)[0]
+        if handler is None:
+            if self.delegate is not None:
+                return self.delegate.handle_input(inpt)
+            return False
+        handler(inpt)
+        return True
+
+
 class InputHandler(object):
     """
     An object that can handle user input
     """
 
+    #The handlers are held in containers which record any change to them, so
+    #that compiled KeyMaps are rebuilt
+    @property
+    def handlers(self):
+        return self._handlers
+
+    @handlers.setter
+    def handlers(self, value):
+        self._handlers = _HandlerDict(value)
+        _handlers_changed()
+
+    @property
+    def complex_handlers(self):
+        return self._complex_handlers
+
+    @complex_handlers.setter
+    def complex_handlers(self, value):
+        self._complex_handlers = _HandlerList(value)
+        _handlers_changed()
+
     def handle_input(self, inpt):
         """
         Returns True if input has been dealt with, and no further action needs
         taking.
 
-        First attempts to look up a method in self.input_handers (which is a
+        First attempts to look up a method in self.handlers (which is a
         dictionary), then runs the methods in self.complex_handlers (if any),
         which is an array of form (test_func, dispatch_func).
 
         If test_func(input) returns true, then dispatch_func(input) is called.
-        Check to see if parent can handle. No further action taken after that
-        point.
-        """
-        log.debug('handle_input called on inpt={0}'.format(inpt))
-
-        if inpt in self.handlers:
-            log.debug('inpt in handlers, calling method {0}'.format(self.handlers[inpt]))
-            self.handlers[inpt](inpt)
-            return True
+        Failing that, the same is tried for the parent, and so on up to the
+        Form.
 
-        try:
-            unctrl_inpt = curses.ascii.unctrl(inpt)
-        except TypeError:
-            unctrl_inpt = None
-        else:
-            log.debug('unctrl_inpt={0}'.format(unctrl_inpt))
-
-        if unctrl_inpt and (unctrl_inpt in self.handlers):
-            self.handlers[unctrl_inpt](inpt)
-            return True
-
-        #When would this ever be False? complex_handlers is created during
-        #Widget instantiation
-        for test, handler in self.complex_handlers:
-            if test(inpt) is not False:
-                handler(inpt)
-                return True
-        #if not hasattr(self, 'complex_handlers'):
-            #return False
-        #else:
-            #for test, handler in self.complex_handlers:
-                #if test(inpt) is not False:
-                    #handler(inpt)
-                    #return True
-
-        #This recursion should be able to travel from a Widget up to the Form
-        #and then end
-        if not self.is_form():
-            #If the current Widget is not a form, then recurse to parent
-            if self.parent.handle_input(inpt):
-                return True
-
-        #Everything has failed
-        return False
+        The handlers along the way are compiled into a KeyMap, kept by the Form
+        for the Widget receiving input, which is rebuilt when that Widget
+        changes or any handlers are modified.
+        """
+        keymap = self.form._keymap
+        if keymap is None or not keymap.is_current(self):
+            keymap = self.form._keymap = KeyMap(self)
+        return keymap.dispatch(inpt)
 
     def set_up_handlers(self):
         """
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+import curses
+import curses.ascii
+
+from . import Widget
+from .widget import _damaging_attribute
+
+import logging
+log = logging.getLogger('npyscreen2.widgets.listview')
+
+__all__ = ['ListView']
+
+
+class ListView(Widget):
+    """
+    The ListView Widget displays the items of a sequence, one per row, and lets
+    the user move a cursor over them. Only the items in view are ever looked
+    at, so the sequence may be very long.
+
+    A ListView bound to an ObservableList (see the models module) redraws only
+    the rows affected by each change: replacing an item redraws its row if it
+    is in view, an insertion or removal redraws the rows below it, and a change
+    above the rows in view moves the view along with the items so that nothing
+    needs redrawing at all.
+    """
+
+    def __init__(self,
+                 form,
+                 parent,
+                 value=None,
+                 cursor_color='CURSOR',
+                 cursor_highlight_color='CURSOR_HIGHLIGHT',
+                 *args,
+                 **kwargs):
+        #The index of the item shown on the first row, and of the item under
+        #the cursor
+        self.start_index = 0
+        self.cursor_line = 0
+        #Rows to be redrawn without redrawing the whole Widget
+        self._dirty_rows = set()
+
+        if value is None:
+            value = []
+        super(ListView, self).__init__(form,
+                                       parent,
+                                       value=value,
+                                       *args,
+                                       **kwargs)
+
+        self.cursor_color = cursor_color
+        self.cursor_highlight_color = cursor_highlight_color
+
+    cursor_color = _damaging_attribute('cursor_color', style=True)
+    cursor_highlight_color = _damaging_attribute('cursor_highlight_color',
+                                                 style=True)
+
+    def set_up_handlers(self):
+        super(ListView, self).set_up_handlers()
+        self.handlers.update({curses.KEY_UP: self.h_cursor_up,
+                              curses.KEY_DOWN: self.h_cursor_down,
+                              curses.KEY_PPAGE: self.h_page_up,
+                              curses.KEY_NPAGE: self.h_page_down,
+                              curses.KEY_HOME: self.h_first,
+                              curses.KEY_END: self.h_last,
+                              curses.ascii.TAB: self.h_exit_down,
+                              })
+
+    def display_value(self, item):
+        """
+        Returns the text shown for an item. Override this to customize how the
+        items are displayed.
+        """
+        return str(item)
+
+    def update(self):
+        self._dirty_rows.clear()
+        for row in range(self.height):
+            self.draw_row(row)
+
+    def _update_damaged(self):
+        if self._dirty:
+            self._update()
+        elif self._dirty_rows:
+            for row in sorted(self._dirty_rows):
+                self.draw_row(row)
+            self._dirty_rows.clear()
+            self.form.widgets_redrawn += 1
+
+    def draw_row(self, row):
+        index = self.start_index + row
+        if index < len(self.value):
+            text = self.display_value(self.value[index])
+        else:
+            text = ''
+        if index == self.cursor_line and self.editing:
+            attr = self.style_attr('cursor', self.compute_cursor_attr)
+        else:
+            attr = self.get_text_attr()
+        self.addstr(self.rely + row, self.relx,
+                    text[:self.width].ljust(self.width), attr)
+
+    def compute_cursor_attr(self):
+        if self.do_colors():
+            if self.highlight:
+                return self.form.theme_manager.find_pair(self, self.cursor_highlight_color)
+            return self.form.theme_manager.find_pair(self, self.cursor_color)
+        return self.get_text_attr() | curses.A_REVERSE
+
+    def mark_rows_dirty(self, first, last=None):
+        """
+        Redraw the rows showing the items `first` to `last` (by default, to
+        the end of the view) on the next display.
+        """
+        if last is None:
+            last = self.start_index + self.height - 1
+        first = max(first, self.start_index)
+        last = min(last, self.start_index + self.height - 1)
+        if first > last:
+            return
+        self._dirty_rows.update(range(first - self.start_index,
+                                      last - self.start_index + 1))
+        self.mark_part_dirty()
+
+    def apply_deltas(self, deltas):
+        self.value_version += 1
+        for kind, key, count in deltas:
+            if kind == 'update' and isinstance(key, int):
+                self.mark_rows_dirty(key, key)
+            elif kind == 'insert' and isinstance(key, int):
+                #Keep the cursor on the same item, if there was one
+                if key <= self.cursor_line and len(self.value) > count:
+                    self.cursor_line += count
+                if key < self.start_index:
+                    #The items in view have only moved down
+                    self.start_index += count
+                else:
+                    self.mark_rows_dirty(key)
+            elif kind == 'remove' and isinstance(key, int):
+                if key + count <= self.cursor_line:
+                    self.cursor_line -= count
+                elif key <= self.cursor_line:
+                    self.cursor_line = key
+                if key + count <= self.start_index:
+                    self.start_index -= count
+                elif key < self.start_index:
+                    self.start_index = key
+                    self.mark_dirty()
+                else:
+                    self.mark_rows_dirty(key)
+            else:
+                self.mark_dirty()
+        self.move_cursor(self.cursor_line)
+
+    def move_cursor(self, index):
+        """
+        Move the cursor to the item at `index`, scrolling to keep it in view.
+        """
+        index = max(min(index, len(self.value) - 1), 0)
+        previous, self.cursor_line = self.cursor_line, index
+        if index < self.start_index:
+            self.start_index = index
+            self.mark_dirty()
+        elif index >= self.start_index + self.height:
+            self.start_index = index - self.height + 1
+            self.mark_dirty()
+        elif index != previous:
+            self.mark_rows_dirty(previous, previous)
+            self.mark_rows_dirty(index, index)
+
+    def h_cursor_up(self, inpt):
+        if self.cursor_line <= 0:
+            self.h_exit_up(inpt)
+        else:
+            self.move_cursor(self.cursor_line - 1)
+
+    def h_cursor_down(self, inpt):
+        if self.cursor_line >= len(self.value) - 1:
+            self.h_exit_down(inpt)
+        else:
+            self.move_cursor(self.cursor_line + 1)
+
+    def h_page_up(self, inpt):
+        self.move_cursor(self.cursor_line - self.height)
+
+    def h_page_down(self, inpt):
+        self.move_cursor(self.cursor_line + self.height)
+
+    def h_first(self, inpt):
+        self.move_cursor(0)
+
+    def h_last(self, inpt):
+        self.move_cursor(len(self.value) - 1)
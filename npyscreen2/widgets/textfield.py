@@ -3,6 +3,8 @@
 import curses
 
 from . import Widget
+from .widget import _damaging_attribute
+from .input_handler import key_predicate
 
 import logging
 log = logging.getLogger('npyscreen2.widgets.textfield')
@@ -59,6 +61,13 @@ class TextField(Widget):
 
         self.update()
 
+    #Attributes used in drawing the cursor
+    cursor_bold = _damaging_attribute('cursor_bold', style=True)
+    cursor_color = _damaging_attribute('cursor_color', style=True)
+    cursor_highlight_color = _damaging_attribute('cursor_highlight_color',
+                                                 style=True)
+    cursor_underline = _damaging_attribute('cursor_underline', style=True)
+
     def set_up_handlers(self):
         super(TextField, self).set_up_handlers()
 
@@ -151,6 +160,12 @@ class TextField(Widget):
         except IndexError:
             char_under_cur = self.cursor_empty_character
 
+        self.addstr(self.rely,
+                    self.relx + self.cursor_position - self.begin_at,
+                    char_under_cur,
+                    self.style_attr('cursor', self.compute_cursor_attr))
+
+    def compute_cursor_attr(self):
         attr = 0
         if self.cursor_bold:
             attr |= curses.A_BOLD
@@ -165,11 +180,7 @@ class TextField(Widget):
                                                           self.cursor_color)
         else:
             attr |= curses.A_REVERSE
-
-        self.addstr(self.rely,
-                    self.relx + self.cursor_position - self.begin_at,
-                    char_under_cur,
-                    attr)
+        return attr
 
     def h_addch(self, inpt):
         if self.editable:
@@ -236,13 +247,15 @@ class TextField(Widget):
     def h_end(self, inpt):
         self.cursor_position = len(self.value)
 
+    @key_predicate
     def t_input_isprint(self, inpt):
         """
         An example of a complex handler; returns True if the most recently
         gotten character input is a printable unicode character.
         """
-        if self._last_get_ch_was_unicode and inpt not in '\n\t\r':
-            return True
+        #Decoded multi-byte characters are the only inputs given as str
+        if isinstance(inpt, str):
+            return inpt not in '\n\t\r'
         if curses.ascii.isprint(inpt) and \
            (chr(inpt) not in '\n\t\r'):
             return True
@@ -1,12 +1,18 @@
 # -*- coding: utf-8 -*-
 
-import copy
 import sys
 import curses
 import curses.ascii
+import inspect
+import math
 import time
 import weakref
+from .. import backends
 from .. import global_options
+from .. import logs
+from .. import models
+from .. import terminal
+from ..profiler import profiled
 
 from functools import wraps
 import locale
@@ -21,6 +27,9 @@ log = logging.getLogger('npyscreen2.widgets.widget')
 #What does this offer?
 ALLOW_NEW_INPUT = True
 
+#The types of value compared on assignment, see Widget.value
+_IMMUTABLE_VALUES = frozenset((str, int, float, tuple, type(None)))
+
 
 __all__ = ['Widget', 'NotEnoughSpaceForWidget']
 
@@ -29,6 +38,38 @@ class NotEnoughSpaceForWidget(Exception):
     pass
 
 
+def _damaging_attribute(name, geometric=False, style=False):
+    """
+    Creates a property for a Widget attribute which affects how the Widget is
+    drawn. Assigning a new value to the attribute marks the Widget as damaged
+    so that it will be redrawn on the next display of its Form.
+
+    If `geometric` is True, the attribute concerns the position, size or
+    visibility of the Widget; since a change to these may leave stale characters
+    outside of the Widget's new area, the parent is damaged instead.
+
+    If `style` is True, the attribute is used to compute text attributes, so
+    the Widget's memoized attributes are discarded; see `style_attr`.
+    """
+    private = '_' + name
+
+    def fget(self):
+        return getattr(self, private)
+
+    def fset(self, val):
+        if private in self.__dict__ and self.__dict__[private] == val:
+            return
+        self.__dict__[private] = val
+        if style:
+            self._style_attrs.clear()
+        if geometric:
+            self.mark_geometry_dirty()
+        else:
+            self.mark_dirty()
+
+    return property(fget, fset)
+
+
 class Widget(InputHandler,
              #LinePrinter
              ):
@@ -39,9 +80,11 @@ class Widget(InputHandler,
                  relx=0,
                  rely=0,
                  value=None,
+                 model=None,
                  feed=None,
                  feed_reset=False,
                  feed_reset_time=5,
+                 feed_interval=None,
                  width=None,
                  height=None,
                  max_height=None,
@@ -60,6 +103,18 @@ class Widget(InputHandler,
                  interested_in_mouse_even_when_not_editable=False,
                  **kwargs):
 
+        #Damage tracking; a dirty Widget will be redrawn on the next display of
+        #its Form, _dirty_descendants lets the Form find dirty Widgets without
+        #visiting every Widget in the tree
+        self._dirty = True
+        self._dirty_descendants = False
+
+        #Memoized text attributes, see style_attr
+        self._style_attrs = {}
+        self._style_attrs_colors_disabled = None
+        self._style_attrs_theme_manager = None
+        self._style_attrs_theme_generation = None
+
         try:
             self.form = weakref.proxy(form)
         except TypeError:
@@ -95,6 +150,8 @@ class Widget(InputHandler,
         if value is None:
             value = ''
         self.value = value
+        if model is not None:
+            self.bind(model)
 
         #This should be a method that modifies the value (at least)
         #self.feed = feed
@@ -117,6 +174,7 @@ class Widget(InputHandler,
         self.feed_reset = feed_reset
         self.feed_reset_time = feed_reset_time
         self.feed = feed
+        self.feed_interval = feed_interval
 
         #The following attributes are intended to be abstracted traits which
         #may be applied to how a widget is represented on the screen. Hopefully
@@ -146,6 +204,7 @@ class Widget(InputHandler,
 
         self.set_up_handlers()
 
+    @profiled
     def _resize(self, inpt=None):
         """
         This method will be called when the terminal is resized.
@@ -177,32 +236,194 @@ class Widget(InputHandler,
         """
         pass
 
+    #The key of the Widget in its parent's contained_map, see add_widget
+    widget_id = None
+
+    _value = None
+    #Counts the changes to the value, see the value property
+    value_version = 0
+    #The value_version seen by the last when_check_value_changed
+    _checked_value_version = None
+
+    #The model the Widget is bound to, see bind, and the Deltas received from
+    #it since the last frame
+    model = None
+    _model_deltas = None
+
+    #The wrapped feed function, see the feed property, and the number of
+    #seconds between calls to it by the Form's FeedScheduler
+    _feed = None
+    _feed_interval = None
+
+    #The following attributes affect how a Widget is drawn, changing them will
+    #mark the Widget (or its parent) for redrawing; see mark_dirty
+    relx = _damaging_attribute('relx', geometric=True)
+    rely = _damaging_attribute('rely', geometric=True)
+    hidden = _damaging_attribute('hidden', geometric=True)
+    color = _damaging_attribute('color', style=True)
+    highlight = _damaging_attribute('highlight', style=True)
+    highlight_color = _damaging_attribute('highlight_color', style=True)
+    bold = _damaging_attribute('bold', style=True)
+    underline = _damaging_attribute('underline', style=True)
+    editing = _damaging_attribute('editing')
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, val):
+        #Assigning the value it has already is not a change, but otherwise
+        #values may be mutable and expensive to compare, so only equal values
+        #of the immutable types are compared. Lists, dicts and sets are wrapped
+        #so that changes made to them in place are counted too, see models
+        current = models.untracked(self._value)
+        if models.untracked(val) is current:
+            return
+        if type(val) in _IMMUTABLE_VALUES and type(val) is type(current) and \
+           val == current:
+            return
+        self._value = models.tracked(val, self)
+        self.value_mutated()
+
+    def value_mutated(self):
+        """
+        Note a change to the value. This is called on assignment to `value` and
+        by tracked values, but should be called by hand if the value is an
+        object changed in some other way.
+        """
+        self.value_version += 1
+        self.mark_dirty()
+
+    def bind(self, model):
+        """
+        Bind the Widget to a model (see the models module), replacing any model
+        it was bound to. The value of the Widget becomes the value of an
+        Observable, or the ObservableList or ObservableDict itself, and changes
+        to the model are passed to `apply_deltas` before the next frame is
+        drawn.
+        """
+        self.unbind()
+        self.model = model
+        model.subscribe(self._model_changed)
+        self.value = self.model_value()
+
+    def unbind(self):
+        if self.model is not None:
+            self.model.unsubscribe(self._model_changed)
+            self.model = None
+            self._model_deltas = None
+
+    def model_value(self):
+        """
+        Returns the value of the Widget given by its model.
+        """
+        if isinstance(self.model, models.Observable):
+            return self.model.value
+        return self.model
+
+    def _model_changed(self, model, delta):
+        if self._model_deltas is None:
+            self._model_deltas = []
+            self.form.model_changed(self)
+        self._model_deltas.append(delta)
+
+    def deliver_deltas(self):
+        """
+        Apply the changes received from the model since the last frame; called
+        by the Form before it is drawn.
+        """
+        deltas, self._model_deltas = self._model_deltas, None
+        if deltas and self.model is not None:
+            self.apply_deltas(models.coalesce(deltas))
+
+    def apply_deltas(self, deltas):
+        """
+        Override this method to make use of the list of Deltas describing the
+        changes to the model since the last frame. By default the value is
+        taken from the model again and the whole Widget is redrawn.
+        """
+        self.value = self.model_value()
+
+    def mark_dirty(self):
+        """
+        Mark this Widget as needing to be redrawn on the next display of its
+        Form. Its ancestors are informed so that the Form may find it without
+        searching the whole tree.
+
+        Attributes that affect drawing already call this when they are set; a
+        Widget whose `update` depends on other state should call this when that
+        state changes.
+        """
+        self._dirty = True
+        self.mark_part_dirty()
+
+    def mark_part_dirty(self):
+        """
+        Inform the ancestors of this Widget that something in it needs to be
+        redrawn, without marking the Widget itself as dirty. Its
+        `_update_damaged` will be called on the next display, for Widgets which
+        can redraw only what has changed.
+        """
+        widget = self
+        while not widget.is_form():
+            widget = widget.parent
+            if widget._dirty_descendants:
+                break
+            widget._dirty_descendants = True
+
+    def mark_geometry_dirty(self):
+        """
+        Mark the area occupied by this Widget as needing to be redrawn. This is
+        done by informing the parent, which will clear its whole area and redraw
+        everything it contains.
+        """
+        if self.is_form():
+            self.mark_dirty()
+        else:
+            self.parent.contained_geometry_changed(self)
+
     def clear(self, usechar=' '):
         """
         Blank the screen area used by this widget, ready for redrawing
         """
-        for y in range(self.rely, self.rely + self.height - 1):
-            if self.do_colors():
-                self.addstr(y, self.relx, usechar * (self.width),
-                            self.form.theme_manager.find_pair(self,
-                                                              self.form.color))
-            else:
-                self.addstr(y, self.relx, usechar * (self.width))
+        if self.do_colors():
+            attr = self.form.theme_manager.find_pair(self, self.form.color)
+        else:
+            attr = None
+        self.fill(self.rely, self.relx, self.height, self.width, usechar, attr)
 
     #How much need is there for updating without clearing first?
+    @profiled
     def _update(self, clear=True):
         """
         How should object display itself on the screen. Define here, but do not
         actually refresh the curses display, since this should be done as little
         as possible.  This base widget puts nothing on screen.
         """
+        #Changes from the model not yet delivered by the Form must be applied
+        #before the Widget is drawn, as when it is drawn on finishing editing
+        if self._model_deltas:
+            self.deliver_deltas()
         if clear:
             self.clear()
         if self.hidden:
             #self.clear()
+            self._dirty = False
             return True
 
         self.update()
+        #Reset afterwards so that attributes set while drawing do not cause
+        #a redraw on every frame
+        self._dirty = False
+        self.form.widgets_redrawn += 1
+
+    def _update_damaged(self):
+        """
+        Redraw this Widget only if it has been marked as dirty.
+        """
+        if self._dirty:
+            self._update()
 
     def update(self):
         """
@@ -213,16 +434,18 @@ class Widget(InputHandler,
 
     def display(self, clear=True):
         """
-        Do an update of the object AND refresh the screen.
+        Redraw everything on the Form that has been marked as dirty, this object
+        included, AND refresh the screen. Use `mark_dirty` first to force this
+        object to be redrawn.
         """
-        self._update(clear=clear)
-        self.form.refresh()
+        self.form.display(clear=clear)
 
     def do_colors(self):
         """
         Returns True if the widget should try to paint in coloour.
         """
-        if curses.has_colors() and not global_options.DISABLE_ALL_COLORS:
+        if not global_options.DISABLE_ALL_COLORS and \
+           backends.get_backend().has_colors():
             return True
         else:
             return False
@@ -231,7 +454,6 @@ class Widget(InputHandler,
         """
         Allow the user to edit the widget: ie. start handling keypresses.
         """
-        log.debug('{0}.edit method called'.format(self.__class__))
         self.editing = True
         self._pre_edit()
         self.edit_loop()
@@ -247,7 +469,6 @@ class Widget(InputHandler,
         #self.highlight = True
         self.how_exited = False
         self.pre_edit()
-        log.debug('{0}._pre_edit method called'.format(self.__class__))
 
     def post_edit(self):
         """
@@ -256,7 +477,6 @@ class Widget(InputHandler,
         pass
 
     def _post_edit(self):
-        log.debug('{0}._post_edit method called'.format(self.__class__))
         #self.highlight = False
         self._update()
         self.post_edit()
@@ -278,88 +498,108 @@ class Widget(InputHandler,
             self.editing = False
             self.how_exited = True
 
-    def _get_ch(self):
-        #try:
-        #    # Python3.3 and above - returns unicode
-        #    ch = self.form.curses_pad.get_wch()
-        #    self._last_get_ch_was_unicode = True
-        #except AttributeError:
-
-        #For now, disable all attempts to use get_wch(), but everything that
-        #follows could be in the except clause above.
-
-        #Try to read utf-8 if possible.
-        _stored_bytes = []
-        self._last_get_ch_was_unicode = True
-        global ALLOW_NEW_INPUT
-        if ALLOW_NEW_INPUT == True and locale.getpreferredencoding() == 'UTF-8':
-            ch = self.form.curses_pad.getch()
-            if ch <= 127:
-                rtn_ch = ch
-                self._last_get_ch_was_unicode = False
-                return rtn_ch
-            elif ch <= 193:
-                rtn_ch = ch
-                self._last_get_ch_was_unicode = False
-                return rtn_ch
-            #if we are here, we need to read 1, 2 or 3 more bytes.
-            #all of the subsequent bytes should be in the range 128 - 191,
-            #but we'll risk not checking...
-            elif 194 <= ch <= 223:
-                    # 2 bytes
-                    _stored_bytes.append(ch)
-                    _stored_bytes.append(self.form.curses_pad.getch())
-            elif 224 <= ch <= 239:
-                    # 3 bytes
-                    _stored_bytes.append(ch)
-                    _stored_bytes.append(self.form.curses_pad.getch())
-                    _stored_bytes.append(self.form.curses_pad.getch())
-            elif 240 <= ch <= 244:
-                    # 4 bytes
-                    _stored_bytes.append(ch)
-                    _stored_bytes.append(self.form.curses_pad.getch())
-                    _stored_bytes.append(self.form.curses_pad.getch())
-                    _stored_bytes.append(self.form.curses_pad.getch())
-            elif ch >= 245:
-                #probably a control character
-                self._last_get_ch_was_unicode = False
-                return ch
-
-            if sys.version_info[0] >= 3:
-                ch = bytes(_stored_bytes).decode('utf-8', errors='strict')
+    def _get_ch(self, halfdelay=None):
+        """
+        Returns the next key from the Form's InputReader; an int, or a str if
+        a multi-byte character was decoded, in which case
+        `_last_get_ch_was_unicode` is set. With `halfdelay`, -1 is returned if
+        nothing is typed within that many tenths of a second.
+        """
+        if not ALLOW_NEW_INPUT:
+            if halfdelay:
+                backends.get_backend().halfdelay(halfdelay)
             else:
-                ch = ''.join([chr(b) for b in _stored_bytes])
-                ch = ch.decode('utf-8')
-        else:
-            ch = self.form.curses_pad.getch()
+                self.form.curses_pad.timeout(-1)
             self._last_get_ch_was_unicode = False
-
-        #This line should not be in the except clause.
+            return self.form.curses_pad.getch()
+        ch, self._last_get_ch_was_unicode = \
+            self.form.input_reader.read_key(self.form.curses_pad, halfdelay)
         return ch
 
     def get_and_use_key_press(self):
-        curses.raw()
-        curses.cbreak()
-        curses.meta(1)
+        backend = backends.get_backend()
+        backend.raw()
+        backend.cbreak()
+        backend.meta(1)
         self.form.curses_pad.keypad(1)
-        if self.form.keypress_timeout:
-            curses.halfdelay(self.form.keypress_timeout)
-            ch = self._get_ch()
-            if ch == -1:
-                log.debug('calling {0}.while_waiting'.format(self.form))
-                return self.form.while_waiting()
-        else:
-            self.form.curses_pad.timeout(-1)
-            ch = self._get_ch()
+        #Everything drawn while handling the last input goes out in one update
+        self.form.commit_frame()
+        ch = self._wait_for_key()
+        if ch == -1:
+            return self.form.while_waiting()
+        self.use_key_press(self._alt_key(ch))
+
+    def _wait_for_key(self):
+        """
+        Returns the next key, as `_get_ch`, or -1 if the Form's keypress_timeout
+        passes without one. Meanwhile the Form's timers and scheduled feeds are
+        run as they fall due, and the Form displayed after them, and after
+        updates posted to it from other threads.
+        """
+        form = self.form
+        backend = backends.get_backend()
+        #Wait in select on the terminal if there is one, otherwise in curses
+        poll = ALLOW_NEW_INPUT and backend.input_fd() is not None
+        if not poll and form.next_due() is None:
+            if form.keypress_timeout:
+                return self._get_ch(form.keypress_timeout)
+            return self._get_ch()
+        if poll:
+            terminal.watch_resize(form.waker)
+            #Results from feeds running in threads are shown as they arrive
+            if form.feed_executor is not None:
+                form.feed_executor.wakeup = form.waker.wake
+        deadline = None
+        if form.keypress_timeout:
+            deadline = time.monotonic() + form.keypress_timeout / 10
+        while True:
+            wait = form.next_due()
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return -1
+                if wait is None or left < wait:
+                    wait = left
+            if poll:
+                if terminal.take_resize():
+                    form.terminal_resized()
+                if form.input_reader.queue or \
+                   backend.wait_for_input(wait, form.waker):
+                    return self._get_ch()
+            elif wait is None:
+                return self._get_ch()
+            elif wait > 0:
+                #halfdelay counts in tenths of a second, from 1 to 255
+                ch = self._get_ch(min(max(int(math.ceil(wait * 10)), 1), 255))
+                if ch != -1:
+                    return ch
+            #Display what the timers, or other threads, have changed
+            if form.run_due() or form.posted_pending or \
+               (form.feed_executor is not None and form.feed_executor.pending):
+                form.display()
+                form.commit_frame()
+
+    def _alt_key(self, ch):
+        """
+        Returns the key read as `ch`, combined with the key read along with it
+        if `ch` is escape, as that was typed with alt (meta).
+        """
         if ch == curses.ascii.ESC:
-            #self.form.curses_pad.timeout(1)
-            self.form.curses_pad.nodelay(1)
-            ch2 = self.form.curses_pad.getch()
-            if ch2 != -1:
-                ch = curses.ascii.alt(ch2)
-            self.form.curses_pad.timeout(-1)  # back to blocking mode
-            #curses.flushinp()
+            following = self.form.input_reader.pending()
+            if following is not None:
+                if following[1]:
+                    self.form.input_reader.unread(following)
+                else:
+                    ch = curses.ascii.alt(following[0])
+        return ch
 
+    def use_key_press(self, ch):
+        """
+        Handle the key `ch`, which has been read for this Widget, and check
+        whether its value or cursor changed as a result.
+        """
+        if logs.TRACER is not None:
+            logs.TRACER.keypress(self, ch)
         self.handle_input(ch)
         if self.check_value_change:
             self.when_check_value_changed()
@@ -394,14 +634,10 @@ class Widget(InputHandler,
         Check whether the widget's value has changed and call
         when_valued_edited if so.
         """
-        try:
-            if self.value == self._old_value:
-                return False
-        except AttributeError:
-            self._old_value = copy.deepcopy(self.value)
-            self.when_value_edited()
+        if self.value_version == self._checked_value_version:
+            return False
         #Value must have changed:
-        self._old_value = copy.deepcopy(self.value)
+        self._checked_value_version = self.value_version
         self.when_value_edited()
         if hasattr(self, 'parent_widget'):
             self.parent_widget.when_value_edited()
@@ -457,24 +693,42 @@ class Widget(InputHandler,
     def _feed_wrapper(self, func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            self.value = func(*args, **kwargs)
+            if logs.TRACER is not None:
+                self.value = logs.TRACER.feed(self, func, *args, **kwargs)
+            else:
+                self.value = func(*args, **kwargs)
         return wrapper
 
     def _feed_timeout_wrapper(self, func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            now = time.time()
+            now = time.monotonic()
             if (now - wrapper.started) > self.feed_reset_time:
                 self.live = False
                 self.value = ''
                 self.when_feed_resets()
+            elif logs.TRACER is not None:
+                self.value = logs.TRACER.feed(self, func, *args, **kwargs)
             else:
                 self.value = func(*args, **kwargs)
-        wrapper.started = time.time()
+        wrapper.started = time.monotonic()
         return wrapper
 
+    def _feed_expired(self):
+        #Whether the feed of a feed_reset Widget is due to be reset
+        started = getattr(self._feed, 'started', None)
+        return started is not None and \
+               time.monotonic() - started > self.feed_reset_time
+
     def call_feed(self):
-        self.feed()
+        #Asynchronous feeds are run by the AsyncApp instead
+        if self._feed is None:
+            return
+        executor = self.form.feed_executor
+        if executor is None or self._feed_expired():
+            self._feed()
+        else:
+            executor.submit(self, self.feed_function)
 
     def when_feed_resets(self):
         pass
@@ -485,16 +739,76 @@ class Widget(InputHandler,
 
     @feed.setter
     def feed(self, func):
+        #The function as given, which may be a coroutine function or an
+        #asynchronous generator function for use with AsyncApp
+        self.feed_function = func
+        self.async_feed = inspect.iscoroutinefunction(func) or \
+                          inspect.isasyncgenfunction(func)
         if func is None:
             self._feed = None
             self.live = False
             return
-        if self.feed_reset:
+        if self.async_feed:
+            self._feed = None
+            self.live = True
+        elif self.feed_reset:
             self._feed = self._feed_timeout_wrapper(func)
             self.live = True
         else:
             self.live = True
             self._feed = self._feed_wrapper(func)
+        self._schedule_feed()
+
+    @property
+    def feed_interval(self):
+        """
+        If set, the feed is called every `feed_interval` seconds while the Form
+        waits for input, by its FeedScheduler (see the feeds module).
+        """
+        return self._feed_interval
+
+    @feed_interval.setter
+    def feed_interval(self, interval):
+        if interval is not None and interval <= 0:
+            raise ValueError('feed_interval must be greater than 0')
+        self._feed_interval = interval
+        self._schedule_feed()
+
+    def subscribe(self, source, selector=None):
+        """
+        Take the value of the Widget from `source`, a sources.DataSource or the
+        name of one registered with the Form, through `selector`; see the
+        sources module. Returns the Subscription.
+        """
+        return self.form.subscribe(self, source, selector)
+
+    def unsubscribe(self):
+        if self.form.sources is not None:
+            self.form.sources.unsubscribe(self)
+
+    def post_value(self, value):
+        """
+        Set the value of the Widget from another thread; see Form.post_value.
+        """
+        self.form.post_value(self, value)
+
+    def call_later(self, delay, callback):
+        """
+        Call `callback` in `delay` seconds, while the Form is waiting for input.
+        Returns a timers.Timer, which may be cancelled.
+        """
+        return self.form.call_later(delay, callback)
+
+    def call_every(self, interval, callback, delay=None):
+        """
+        Call `callback` every `interval` seconds while the Form is waiting for
+        input. Returns a timers.Timer, which may be cancelled.
+        """
+        return self.form.call_every(interval, callback, delay)
+
+    def _schedule_feed(self):
+        if self._feed is not None and self._feed_interval is not None:
+            self.form.schedule_feed(self)
 
 #Let's discuss dimension and position policy for Widgets and, by extension,
 #Containers; I'll simply refer to both as Widgets in the following text.
@@ -548,7 +862,9 @@ class Widget(InputHandler,
         """
         if val is None:
             val = 0
-        self._max_height = val
+        if self.__dict__.get('_max_height') != val:
+            self._max_height = val
+            self.mark_geometry_dirty()
 
     @property
     def max_width(self):
@@ -562,7 +878,9 @@ class Widget(InputHandler,
         """
         if val is None:
             val = 0
-        self._max_width = val
+        if self.__dict__.get('_max_width') != val:
+            self._max_width = val
+            self.mark_geometry_dirty()
 
     @property
     def height(self):
@@ -587,7 +905,9 @@ class Widget(InputHandler,
     def height(self, val):
         if val is None:
             val = 0
-        self._height = val
+        if self.__dict__.get('_height') != val:
+            self._height = val
+            self.mark_geometry_dirty()
 
     @property
     def width(self):
@@ -612,7 +932,9 @@ class Widget(InputHandler,
     def width(self, val):
         if val is None:
             val = 0
-        self._width = val
+        if self.__dict__.get('_width') != val:
+            self._width = val
+            self.mark_geometry_dirty()
 
     def is_form(self):
         """
@@ -679,7 +1001,36 @@ class Widget(InputHandler,
 
         self.form.curses_pad.addstr(y, x, string[:self.width], attr)
 
+    def style_attr(self, kind, compute):
+        """
+        Returns the text attribute word of the given `kind` (such as 'text' or
+        'cursor'), calling `compute` to work it out only when there is no
+        memoized value.
+
+        Memoized values are discarded when an attribute declared with
+        `style=True` changes, when colors are enabled or disabled, or when the
+        Form's theme manager is replaced or recompiled. If `compute` depends on
+        other state, clear `self._style_attrs` when that state changes.
+        """
+        theme_manager = self.form.theme_manager
+        if self._style_attrs_colors_disabled is not \
+           global_options.DISABLE_ALL_COLORS or \
+           self._style_attrs_theme_manager is not theme_manager or \
+           self._style_attrs_theme_generation != theme_manager.generation:
+            self._style_attrs.clear()
+            self._style_attrs_colors_disabled = global_options.DISABLE_ALL_COLORS
+            self._style_attrs_theme_manager = theme_manager
+            self._style_attrs_theme_generation = theme_manager.generation
+        try:
+            return self._style_attrs[kind]
+        except KeyError:
+            attr = self._style_attrs[kind] = compute()
+            return attr
+
     def get_text_attr(self):
+        return self.style_attr('text', self.compute_text_attr)
+
+    def compute_text_attr(self):
         attr = 0
         if self.bold:
             attr |= curses.A_BOLD
@@ -696,15 +1047,134 @@ class Widget(InputHandler,
                 attr |= curses.A_REVERSE
         return attr
 
-    def hline(self, y, x, ch, n):
-        attr = self.get_text_attr()
-        for i in range(n):
-            self.addch(y, x + i, ch, attr)
+    #The drawing primitives below clip their region against the parent's
+    #borders once and then draw with as few calls to curses as possible, rather
+    #than painting one character at a time with addch. As with addch and
+    #addstr, if `attr` is not used then it will be defined by the theme and
+    #attributes of the Widget.
+
+    def clip_region(self, top, bottom, left, right):
+        """
+        Clip the region spanning rows `top` to `bottom` and columns `left` to
+        `right` (inclusive) to the parent's borders and the Form's pad. Returns
+        the clipped (top, bottom, left, right), or None if nothing remains.
+        """
+        p_y_t, p_y_b, p_x_l, p_x_r = self.parent_borders()
+        p_y_t = max(p_y_t, 0)
+        p_x_l = max(p_x_l, 0)
+        p_y_b = min(p_y_b, self.form.pad_height - 1)
+        p_x_r = min(p_x_r, self.form.pad_width - 1)
+        if top < p_y_t:
+            top = p_y_t
+        if bottom > p_y_b:
+            bottom = p_y_b
+        if left < p_x_l:
+            left = p_x_l
+        if right > p_x_r:
+            right = p_x_r
+        if top > bottom or left > right:
+            return None
+        return top, bottom, left, right
+
+    def hline(self, y, x, ch, n, attr=None):
+        """
+        Draw a horizontal line of `n` characters `ch` starting at (y, x).
+        """
+        region = self.clip_region(y, y, x, x + n - 1)
+        if region is None:
+            return
+        y, _, left, right = region
+        if attr is None:
+            attr = self.get_text_attr()
+        self.form.curses_pad.hline(y, left, ch, right - left + 1, attr)
+
+    def vline(self, y, x, ch, n, attr=None):
+        """
+        Draw a vertical line of `n` characters `ch` starting at (y, x).
+        """
+        region = self.clip_region(y, y + n - 1, x, x)
+        if region is None:
+            return
+        top, bottom, x, _ = region
+        if attr is None:
+            attr = self.get_text_attr()
+        self.form.curses_pad.vline(top, x, ch, bottom - top + 1, attr)
+
+    def fill(self, y, x, height, width, ch=' ', attr=None):
+        """
+        Fill the rectangle of `height` rows and `width` columns whose top left
+        corner is at (y, x) with the character `ch`.
 
-    def vline(self, y, x, ch, n):
-        attr = self.get_text_attr()
-        for i in range(n):
-            self.addch(y + i, x, ch, attr)
+        Rectangles of a few rows are drawn a row at a time, larger ones are
+        erased in one go through a derived window.
+        """
+        region = self.clip_region(y, y + height - 1, x, x + width - 1)
+        if region is None:
+            return
+        top, bottom, left, right = region
+        if attr is None:
+            attr = self.get_text_attr()
+        rows, cols = bottom - top + 1, right - left + 1
+        pad = self.form.curses_pad
+        if rows <= 4:
+            for row in range(top, bottom + 1):
+                pad.hline(row, left, ch, cols, attr)
+        else:
+            area = pad.subpad(rows, cols, top, left)
+            area.bkgdset(ch, attr)
+            area.erase()
+            area.syncup()  # Make the change visible when the pad is refreshed
+
+    def draw_box(self, y, x, height, width, top=True, bottom=True, left=True,
+                 right=True, blank=False, attr=None):
+        """
+        Draw the sides of the rectangle of `height` rows and `width` columns
+        whose top left corner is at (y, x) with line drawing characters, or
+        with spaces if `blank` is True. Individual sides may be left out, and
+        corners are drawn where two sides meet.
+
+        A complete box which is not clipped is drawn with a single border call
+        on a derived window.
+        """
+        if height < 1 or width < 1:
+            return
+        if attr is None:
+            attr = self.get_text_attr()
+        if blank:
+            hbar = vbar = ul_c = ur_c = ll_c = lr_c = ord(' ')
+        else:
+            hbar, vbar = curses.ACS_HLINE, curses.ACS_VLINE
+            ul_c, ur_c = curses.ACS_ULCORNER, curses.ACS_URCORNER
+            ll_c, lr_c = curses.ACS_LLCORNER, curses.ACS_LRCORNER
+
+        y_b, x_r = y + height - 1, x + width - 1
+        complete = top and bottom and left and right
+        if complete and height > 1 and width > 1 and \
+           self.clip_region(y, y_b, x, x_r) == (y, y_b, x, x_r):
+            area = self.form.curses_pad.subpad(height, width, y, x)
+            area.border(vbar | attr, vbar | attr, hbar | attr, hbar | attr,
+                        ul_c | attr, ur_c | attr, ll_c | attr, lr_c | attr)
+            area.syncup()  # Make the change visible when the pad is refreshed
+            return
+
+        #Draw the bars
+        if top:
+            self.hline(y, x, hbar, width, attr)
+        if bottom:
+            self.hline(y_b, x, hbar, width, attr)
+        if left:
+            self.vline(y, x, vbar, height, attr)
+        if right:
+            self.vline(y, x_r, vbar, height, attr)
+
+        #Draw the corners
+        corners = ((top and left, y, x, ul_c),
+                   (top and right, y, x_r, ur_c),
+                   (bottom and left, y_b, x, ll_c),
+                   (bottom and right, y_b, x_r, lr_c))
+        for wanted, c_y, c_x, ch in corners:
+            if wanted and self.clip_region(c_y, c_y, c_x, c_x) is not None:
+                self.form.curses_pad.addch(c_y, c_x, ch, attr)
 
     @property
     def cursor_position(self):
@@ -720,4 +1190,6 @@ class Widget(InputHandler,
             val = 0
         elif val > len(self.value):
             val = len(self.value)
-        self._cursor_position = val
+        if val != self._cursor_position:
+            self._cursor_position = val
+            self.mark_dirty()
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for npyscreen2, run against the headless backend:
+
+    python -m unittest discover tests
+"""
+
+import npyscreen2
+from npyscreen2 import backends
+
+
+class _FunctionApp(npyscreen2.NPSApp):
+    def __init__(self, function, *args, **kwargs):
+        super(_FunctionApp, self).__init__(*args, **kwargs)
+        self.function = function
+        self.result = None
+
+    def main(self):
+        self.result = self.function(self)
+
+
+def headless(function, keys=(), **kwargs):
+    """
+    Call `function` with an NPSApp running under a HeadlessBackend (fed
+    `keys`) in place of its main loop, and return what it returns.
+    """
+    app = _FunctionApp(function, **kwargs)
+    app.run(backend=backends.HeadlessBackend(keys=keys))
+    return app.result
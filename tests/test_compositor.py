@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+import curses
+import unittest
+
+import npyscreen2
+from npyscreen2 import backends
+from npyscreen2.backends import HeadlessPad
+from npyscreen2.compositor import CellBuffer, Compositor
+
+from tests import headless
+
+
+class RecordingPad(HeadlessPad):
+    """
+    A HeadlessPad recording the writes made to it.
+    """
+    def __init__(self, *args, **kwargs):
+        super(RecordingPad, self).__init__(*args, **kwargs)
+        self.writes = []
+
+    def addstr(self, y, x, string, attr=0):
+        self.writes.append((y, x, string))
+        super(RecordingPad, self).addstr(y, x, string, attr)
+
+    def addch(self, y, x, ch, attr=0):
+        self.writes.append((y, x, ch))
+        super(RecordingPad, self).addch(y, x, ch, attr)
+
+
+class CellBufferTest(unittest.TestCase):
+    def test_changed_columns(self):
+        a, b = CellBuffer(2, 6), CellBuffer(2, 6)
+        self.assertEqual(a.changed_columns(b, 0), [])
+        a.fill(ord('x'), 0, 1, 3)
+        b.fill(ord(' '), curses.A_BOLD, 5, 6)
+        self.assertEqual(a.changed_columns(b, 0), [1, 2, 5])
+        self.assertEqual(a.changed_columns(b, 1), [])
+
+
+class CompositorTest(unittest.TestCase):
+    def setUp(self):
+        self.pad = RecordingPad(backends.HeadlessBackend(3, 10), 3, 10)
+        self.compositor = Compositor()
+        self.compositor.attach(self.pad, 3, 10)
+
+    def flush(self):
+        del self.pad.writes[:]
+        self.compositor.flush()
+        return self.pad.writes
+
+    def test_first_frame_is_written_in_full(self):
+        self.compositor.addstr(0, 0, 'hello')
+        self.flush()
+        self.assertEqual(self.compositor.changed_cells, 30)
+        self.assertEqual(self.pad.cells.row_text(0), 'hello     ')
+
+    def test_identical_frame_writes_nothing(self):
+        self.compositor.addstr(0, 0, 'hello')
+        self.flush()
+        self.compositor.erase()
+        self.compositor.addstr(0, 0, 'hello')
+        self.assertEqual(self.flush(), [])
+        self.assertEqual(self.compositor.changed_cells, 0)
+
+    def test_only_changed_runs_are_written(self):
+        self.compositor.addstr(1, 0, 'abcdefgh')
+        self.flush()
+        self.compositor.addstr(1, 0, 'abXYefgZ')
+        self.assertEqual(self.flush(), [(1, 2, 'XY'), (1, 7, 'Z')])
+        self.assertEqual(self.compositor.changed_cells, 3)
+        self.assertEqual(self.pad.cells.row_text(1), 'abXYefgZ  ')
+
+    def test_runs_are_split_by_attribute(self):
+        self.flush()
+        self.compositor.addstr(2, 0, 'ab')
+        self.compositor.addstr(2, 2, 'cd', curses.A_BOLD)
+        self.assertEqual(self.flush(), [(2, 0, 'ab'), (2, 2, 'cd')])
+        self.assertEqual(self.pad.cells.cell(2, 3)[1] & curses.A_BOLD,
+                         curses.A_BOLD)
+
+    def test_invalidate_writes_everything_again(self):
+        self.flush()
+        self.compositor.invalidate()
+        self.flush()
+        self.assertEqual(self.compositor.changed_cells, 30)
+
+
+class CompositorFormTest(unittest.TestCase):
+    def test_matches_drawing_on_the_pad(self):
+        def draw(compositor):
+            def check(app):
+                form = npyscreen2.TraditionalForm(parent_app=app, framed=True,
+                                                  compositor=compositor)
+                for i in range(3):
+                    form.add(npyscreen2.TextField, height=1,
+                             value='line {0}'.format(i))
+                form._resize()
+                form.mark_dirty()
+                form.display()
+                form.commit_frame()
+                changed = form.compositor.changed_cells if compositor else None
+                form.release_pad()
+                return backends.get_backend().snapshot(), changed
+            return headless(check)
+        plain, _ = draw(False)
+        composited, changed = draw(True)
+        self.assertIn('line 1', ''.join(plain))
+        self.assertEqual(plain, composited)
+        #Everything was drawn again, the same as before
+        self.assertEqual(changed, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
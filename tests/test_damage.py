@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import npyscreen2
+from npyscreen2 import backends
+
+from tests import headless
+
+
+def screen_row(y):
+    backend = backends.get_backend()
+    return backend.row_text(y, backend.virtual)
+
+
+class DamageTrackingTest(unittest.TestCase):
+    """
+    Only the Widgets marked dirty since the last display are redrawn.
+    """
+    def run_check(self, check):
+        def setup(app):
+            form = npyscreen2.TraditionalForm(parent_app=app)
+            fields = [form.add(npyscreen2.TextField, height=1,
+                               value='field {0}'.format(i))
+                      for i in range(5)]
+            #Resizing draws everything
+            form._resize()
+            self.assertGreaterEqual(form.widgets_redrawn, len(fields))
+            try:
+                check(form, fields)
+            finally:
+                form.release_pad()
+        headless(setup)
+
+    def test_nothing_changed(self):
+        def check(form, fields):
+            form.display()
+            self.assertEqual(form.widgets_redrawn, 0)
+        self.run_check(check)
+
+    def test_value_change_redraws_the_widget(self):
+        def check(form, fields):
+            fields[2].value = 'changed'
+            form.display()
+            self.assertEqual(form.widgets_redrawn, 1)
+            self.assertIn('changed', screen_row(fields[2].rely))
+            self.assertIn('field 1', screen_row(fields[1].rely))
+            form.display()
+            self.assertEqual(form.widgets_redrawn, 0)
+        self.run_check(check)
+
+    def test_style_change_redraws_the_widget(self):
+        def check(form, fields):
+            fields[0].highlight = True
+            fields[0].highlight = True
+            form.display()
+            self.assertEqual(form.widgets_redrawn, 1)
+        self.run_check(check)
+
+    def test_geometry_change_redraws_the_parent(self):
+        def check(form, fields):
+            form.mark_dirty()
+            form.display()
+            everything = form.widgets_redrawn
+            row = fields[4].rely
+            fields[4].hidden = True
+            form.display()
+            #Everything still shown
+            self.assertEqual(form.widgets_redrawn, everything - 1)
+            self.assertNotIn('field 4', screen_row(row))
+        self.run_check(check)
+
+    def test_marking_a_widget_dirty(self):
+        def check(form, fields):
+            fields[1].mark_dirty()
+            fields[3].mark_dirty()
+            self.assertTrue(form._dirty_descendants)
+            form.display()
+            self.assertEqual(form.widgets_redrawn, 2)
+            self.assertFalse(form._dirty_descendants)
+        self.run_check(check)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+
+import npyscreen2
+from npyscreen2 import FeedExecutor
+from npyscreen2.feeds import FeedScheduler
+
+from tests import headless
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Holder(object):
+    value = None
+
+
+class FeedExecutorTimeoutTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.executor = FeedExecutor(max_workers=2, timeout=1.0,
+                                     clock=self.clock)
+        self.arrived = threading.Semaphore(0)
+        self.executor.wakeup = self.arrived.release
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+        self.executor.shutdown()
+
+    def hang(self):
+        self.release.wait(10)
+        return 'late'
+
+    def test_hung_feed_times_out(self):
+        executor = self.executor
+        widget = Holder()
+        self.assertTrue(executor.submit(widget, self.hang))
+        self.assertEqual(executor.next_due(), 1.0)
+        self.clock.now = 0.5
+        self.assertEqual(executor.expire(), 0)
+        self.assertFalse(executor.submit(widget, self.hang))
+
+        #Counted once the timeout passes, without waiting for the result
+        self.clock.now = 1.5
+        self.assertEqual(executor.next_due(), 0)
+        self.assertEqual(executor.expire(), 1)
+        self.assertEqual(executor.expire(), 0)
+        stats = executor.stats_for(widget)
+        self.assertEqual((stats.calls, stats.skipped, stats.timeouts), (1, 1, 1))
+        self.assertFalse(executor.in_flight(widget))
+        self.assertEqual(executor.abandoned, 1)
+        self.assertIsNone(executor.next_due())
+
+        #The Widget's feed may be called again, and the late result is dropped
+        self.assertTrue(executor.submit(widget, lambda: 'fresh'))
+        self.assertTrue(self.arrived.acquire(timeout=10))
+        self.release.set()
+        self.assertTrue(self.arrived.acquire(timeout=10))
+        executor.apply_results()
+        self.assertEqual(widget.value, 'fresh')
+        self.assertEqual(executor.abandoned, 0)
+        self.assertEqual((stats.calls, stats.completed, stats.timeouts),
+                         (2, 1, 1))
+
+    def test_submit_expires_its_own_call(self):
+        executor = self.executor
+        widget = Holder()
+        executor.submit(widget, self.hang)
+        self.clock.now = 2.0
+        self.assertTrue(executor.submit(widget, lambda: 'fresh'))
+        self.assertEqual(executor.stats_for(widget).timeouts, 1)
+        self.assertTrue(self.arrived.acquire(timeout=10))
+        executor.apply_results()
+        self.assertEqual(widget.value, 'fresh')
+
+
+class FeedSchedulerTest(unittest.TestCase):
+    """
+    Feeds are called when due, in order, each at its own interval.
+    """
+    def run_check(self, check, intervals):
+        def setup(app):
+            clock = Clock()
+            calls = []
+            form = npyscreen2.Form(parent_app=app)
+            form.feed_scheduler = FeedScheduler(clock=clock)
+
+            def feed(name):
+                return lambda: calls.append((clock.now, name)) or name
+            #Placed by hand, so that hiding one hides it from the Form
+            widgets = [form.add(npyscreen2.Widget, height=1, width=10,
+                                auto_manage=False, feed=feed(name),
+                                feed_interval=interval)
+                       for name, interval in intervals]
+            form._resize()
+            try:
+                check(form.feed_scheduler, clock, calls, widgets)
+            finally:
+                form.release_pad()
+        headless(setup)
+
+    def test_order(self):
+        def check(scheduler, clock, calls, widgets):
+            for now in range(7):
+                clock.now = float(now)
+                scheduler.run_due()
+            self.assertEqual([(int(now), name) for now, name in calls],
+                             [(0, 'a'), (0, 'b'), (0, 'c'),
+                              (1, 'a'),
+                              (2, 'a'), (2, 'b'),
+                              (3, 'a'), (3, 'c'),
+                              (4, 'a'), (4, 'b'),
+                              (5, 'a'),
+                              (6, 'a'), (6, 'b'), (6, 'c')])
+            self.assertEqual(scheduler.calls, 14)
+        self.run_check(check, [('a', 1), ('b', 2), ('c', 3)])
+
+    def test_next_due_and_cadence(self):
+        def check(scheduler, clock, calls, widgets):
+            self.assertEqual(scheduler.next_due(), 0)
+            self.assertEqual(scheduler.run_due(), 1)
+            clock.now = 0.25
+            self.assertEqual(scheduler.next_due(), 0.75)
+            self.assertEqual(scheduler.run_due(), 0)
+            #A feed which has fallen behind is called once, and keeps its
+            #interval from then on
+            clock.now = 3.5
+            self.assertEqual(scheduler.run_due(), 1)
+            self.assertEqual(scheduler.next_due(), 1.0)
+        self.run_check(check, [('a', 1)])
+
+    def test_hidden_and_out_of_view(self):
+        def check(scheduler, clock, calls, widgets):
+            hidden, away, shown = widgets
+            hidden.hidden = True
+            away.rely = 1000
+            for now in range(8):
+                clock.now = float(now)
+                scheduler.run_due()
+            names = [name for now, name in calls]
+            self.assertEqual(names.count('hidden'), 0)
+            self.assertEqual(names.count('shown'), 8)
+            #Called four times less often while out of view
+            self.assertEqual(names.count('away'), 2)
+            shown.feed_interval = None
+            clock.now = 8.0
+            scheduler.run_due()
+            self.assertEqual(len(scheduler), 2)
+            self.assertNotIn((8.0, 'shown'), calls)
+        self.run_check(check, [('hidden', 1), ('away', 1), ('shown', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import npyscreen2
+from npyscreen2 import backends
+
+
+class SwitchingForm(npyscreen2.TraditionalForm):
+    def __init__(self, *args, **kwargs):
+        super(SwitchingForm, self).__init__(*args, **kwargs)
+        self.add_handlers({'^Q': self.switch})
+        self.field = self.add(npyscreen2.TextField, height=1)
+
+    def switch(self, inpt=None):
+        app = self.parent_app
+        app.seen.append(self.field.value)
+        if len(app.seen) < 4:
+            app.set_next_form('TWO' if self.name == 'MAIN' else 'MAIN')
+        else:
+            app.set_next_form(None)
+        app.switch_form_now()
+
+
+class TypeAheadTest(unittest.TestCase):
+    """
+    Keys typed ahead of a change of Form are read by the next Form.
+    """
+    def run_app(self, app_class):
+        class SwitchingApp(app_class):
+            def on_start(self):
+                self.seen = []
+                self.add_form(SwitchingForm, 'MAIN', name='MAIN')
+                self.add_form_class(SwitchingForm, 'TWO', name='TWO')
+        app = SwitchingApp()
+        keys = ['a', '^Q', 'b', '^Q', 'c', '^Q', 'd', '^Q']
+        app.run(backend=backends.HeadlessBackend(keys=keys))
+        return app.seen
+
+    def test_npsapp(self):
+        self.assertEqual(self.run_app(npyscreen2.NPSApp),
+                         ['a', 'b', 'ac', 'd'])
+
+    def test_npsapp_advanced(self):
+        self.assertEqual(self.run_app(npyscreen2.NPSAppAdvanced),
+                         ['a', 'b', 'ac', 'd'])
+
+    def test_async_app(self):
+        self.assertEqual(self.run_app(npyscreen2.AsyncApp),
+                         ['a', 'b', 'ac', 'd'])
+
+
+if __name__ == '__main__':
+    unittest.main()
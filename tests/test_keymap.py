@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+import curses.ascii
+import unittest
+
+import npyscreen2
+from npyscreen2.widgets import key_predicate
+
+from tests import headless
+
+
+class DelegatingContainer(npyscreen2.Container):
+    def handle_input(self, inpt):
+        self.form.log.append(('container', inpt))
+        return True
+
+
+class KeyMapTest(unittest.TestCase):
+    """
+    A KeyMap finds the handler InputHandler.handle_input always would, and
+    keeps it when that depends on nothing but the input.
+    """
+    def run_check(self, check):
+        def setup(app):
+            form = npyscreen2.Form(parent_app=app)
+            form.log = []
+            widget = form.add(npyscreen2.Widget)
+            try:
+                check(form, widget)
+            finally:
+                form.release_pad()
+        headless(setup)
+
+    def handler(self, form, name):
+        return lambda inpt: form.log.append((name, inpt))
+
+    def test_nearest_handler_wins(self):
+        def check(form, widget):
+            form.add_handlers({ord('a'): self.handler(form, 'form'),
+                               ord('b'): self.handler(form, 'form')})
+            widget.add_handlers({ord('a'): self.handler(form, 'widget')})
+            self.assertTrue(widget.handle_input(ord('a')))
+            self.assertTrue(widget.handle_input(ord('b')))
+            self.assertFalse(widget.handle_input(ord('c')))
+            self.assertEqual(form.log, [('widget', ord('a')),
+                                        ('form', ord('b'))])
+        self.run_check(check)
+
+    def test_named_keys_are_found_and_kept(self):
+        def check(form, widget):
+            form.add_handlers({'^Q': self.handler(form, 'quit')})
+            quit_key = ord(curses.ascii.ctrl('q'))
+            widget.handle_input(quit_key)
+            widget.handle_input(quit_key)
+            self.assertEqual(form.log, [('quit', quit_key)] * 2)
+            self.assertIn(quit_key, form._keymap.table)
+        self.run_check(check)
+
+    def test_only_key_predicates_are_kept(self):
+        def check(form, widget):
+            calls = []
+
+            @key_predicate
+            def is_digit(inpt):
+                calls.append('digit')
+                return curses.ascii.isdigit(inpt)
+
+            def is_x(inpt):
+                calls.append('x')
+                return inpt == ord('x')
+
+            widget.add_complex_handlers([
+                (is_digit, self.handler(form, 'digit')),
+                (is_x, self.handler(form, 'x'))])
+            for key in '1122':
+                widget.handle_input(ord(key))
+            self.assertEqual(calls, ['digit', 'digit'])
+            for key in 'xx':
+                widget.handle_input(ord(key))
+            self.assertEqual(calls.count('x'), 2)
+            self.assertNotIn(ord('x'), form._keymap.table)
+            self.assertEqual([name for name, inpt in form.log],
+                             ['digit'] * 4 + ['x'] * 2)
+        self.run_check(check)
+
+    def test_changed_handlers_rebuild_the_keymap(self):
+        def check(form, widget):
+            widget.add_handlers({ord('a'): self.handler(form, 'old')})
+            widget.handle_input(ord('a'))
+            keymap = form._keymap
+            widget.handlers[ord('a')] = self.handler(form, 'new')
+            self.assertFalse(keymap.is_current(keymap.widget))
+            widget.handle_input(ord('a'))
+            self.assertIsNot(form._keymap, keymap)
+            self.assertEqual(form.log, [('old', ord('a')), ('new', ord('a'))])
+        self.run_check(check)
+
+    def test_overridden_handle_input_is_delegated_to(self):
+        def check(form, widget):
+            container = form.add(DelegatingContainer)
+            inner = container.add(npyscreen2.Widget)
+            form.add_handlers({ord('f'): self.handler(form, 'form')})
+            inner.add_handlers({ord('i'): self.handler(form, 'inner')})
+            inner.handle_input(ord('i'))
+            inner.handle_input(ord('f'))
+            self.assertIsNotNone(form._keymap.delegate)
+            self.assertEqual(form.log, [('inner', ord('i')),
+                                        ('container', ord('f'))])
+        self.run_check(check)
+
+
+if __name__ == '__main__':
+    unittest.main()
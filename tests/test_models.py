@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import json
+import pickle
+import unittest
+
+import npyscreen2
+from npyscreen2 import models
+
+from tests import headless
+
+
+class Owner(object):
+    def __init__(self):
+        self.mutations = 0
+
+    def value_mutated(self):
+        self.mutations += 1
+
+
+class TrackedListTest(unittest.TestCase):
+    def setUp(self):
+        self.owner = Owner()
+        self.value = models.tracked([1, 2], self.owner)
+
+    def test_is_a_list(self):
+        self.assertIsInstance(self.value, list)
+        self.assertEqual(json.dumps(self.value, default=models.untracked),
+                         '[1, 2]')
+
+    def test_holds_the_object(self):
+        data = [1, [2]]
+        value = models.tracked(data, self.owner)
+        self.assertIs(models.untracked(value), data)
+        self.assertIs(models.untracked(value[1]), data[1])
+        value[1].append(3)
+        self.assertEqual(data, [1, [2, 3]])
+        self.assertIs(type(data[1]), list)
+        self.assertEqual(self.owner.mutations, 1)
+
+    def test_operators_return_plain_lists(self):
+        for result, expected in ((self.value + [3], [1, 2, 3]),
+                                 ([0] + self.value, [0, 1, 2]),
+                                 (self.value * 2, [1, 2, 1, 2]),
+                                 (self.value.copy(), [1, 2]),
+                                 (self.value[:1], [1]),
+                                 (copy.copy(self.value), [1, 2]),
+                                 (pickle.loads(pickle.dumps(self.value)),
+                                  [1, 2])):
+            self.assertIs(type(result), list)
+            self.assertEqual(result, expected)
+        self.assertEqual(self.owner.mutations, 0)
+
+    def test_changes_are_counted(self):
+        self.value.append(3)
+        value = self.value
+        self.value += [4]
+        self.assertIs(self.value, value)
+        self.value[0] = 0
+        del self.value[0]
+        self.value.sort(reverse=True)
+        self.assertEqual(self.value, [4, 3, 2])
+        self.assertEqual(self.owner.mutations, 5)
+
+    def test_nested_changes_are_counted(self):
+        value = models.tracked([{'tags': ['a']}], self.owner)
+        value[0]['tags'].append('b')
+        self.assertEqual(value, [{'tags': ['a', 'b']}])
+        self.assertEqual(self.owner.mutations, 1)
+
+
+class TrackedDictTest(unittest.TestCase):
+    def setUp(self):
+        self.owner = Owner()
+        self.value = models.tracked({'a': 1}, self.owner)
+
+    def test_is_a_dict(self):
+        self.assertIsInstance(self.value, dict)
+        self.assertEqual(json.dumps(self.value, default=models.untracked),
+                         '{"a": 1}')
+        self.assertIs(type(self.value.copy()), dict)
+        self.assertEqual(self.value | {'b': 2}, {'a': 1, 'b': 2})
+        self.assertEqual(self.owner.mutations, 0)
+
+    def test_changes_are_counted(self):
+        self.value['b'] = 2
+        self.value.update(c=3)
+        self.value |= {'d': 4}
+        self.value.setdefault('e', []).append(5)
+        self.value.pop('a')
+        self.assertEqual(self.value, {'b': 2, 'c': 3, 'd': 4, 'e': [5]})
+        self.assertEqual(self.owner.mutations, 6)
+
+
+class TrackedSetTest(unittest.TestCase):
+    def test_is_a_set(self):
+        owner = Owner()
+        value = models.tracked({1}, owner)
+        self.assertIsInstance(value, set)
+        self.assertIs(type(value | {2}), set)
+        self.assertIs(type({2} | value), set)
+        self.assertTrue(value <= {1, 2})
+        self.assertIs(type(value.copy()), set)
+        value.add(1)
+        self.assertEqual(owner.mutations, 0)
+        value |= {2}
+        value.discard(1)
+        self.assertEqual(value, {2})
+        self.assertEqual(owner.mutations, 2)
+
+
+class WidgetValueTest(unittest.TestCase):
+    def test_idioms(self):
+        def check(app):
+            form = npyscreen2.Form(parent_app=app)
+            widget = form.add(npyscreen2.Widget)
+            widget.value = [1, 2]
+            widget.value = widget.value + [3]
+            self.assertEqual(widget.value, [1, 2, 3])
+            self.assertIsInstance(widget.value, list)
+            version = widget.value_version
+            widget.value.append(4)
+            self.assertEqual(widget.value_version, version + 1)
+            self.assertEqual(json.loads(json.dumps(widget.value,
+                                                   default=models.untracked)),
+                             [1, 2, 3, 4])
+            form.release_pad()
+        headless(check)
+
+    def test_assigning_the_same_value(self):
+        def check(app):
+            form = npyscreen2.Form(parent_app=app)
+            widget = form.add(npyscreen2.Widget)
+            data = list(range(10))
+            widget.value = data
+            self.assertIs(models.untracked(widget.value), data)
+            version = widget.value_version
+            widget.value = data
+            widget.value = widget.value
+            widget.value = 'text'
+            widget.value = ''.join(['te', 'xt'])
+            self.assertEqual(widget.value_version, version + 1)
+            #Equal but distinct containers may yet be changed apart
+            widget.value = [1]
+            widget.value = [1]
+            self.assertEqual(widget.value_version, version + 3)
+            form.release_pad()
+        headless(check)
+
+
+class CoalesceTest(unittest.TestCase):
+    def test_reset_and_set_stand_for_everything_before(self):
+        Delta = models.Delta
+        self.assertEqual(
+            models.coalesce([Delta('update', 1, 1), Delta('insert', 0, 2),
+                             Delta('reset', None, 0), Delta('update', 3, 1)]),
+            [Delta('reset', None, 0), Delta('update', 3, 1)])
+        self.assertEqual(
+            models.coalesce([Delta('set', None, 1), Delta('set', None, 1)]),
+            [Delta('set', None, 1)])
+
+    def test_repeated_updates_are_dropped(self):
+        Delta = models.Delta
+        self.assertEqual(
+            models.coalesce([Delta('update', 1, 1), Delta('update', 2, 1),
+                             Delta('update', 1, 1)]),
+            [Delta('update', 1, 1), Delta('update', 2, 1)])
+
+    def test_updates_after_a_move_are_kept(self):
+        Delta = models.Delta
+        deltas = [Delta('update', 1, 1), Delta('insert', 0, 1),
+                  Delta('update', 1, 1), Delta('remove', 4, 1),
+                  Delta('update', 1, 1)]
+        self.assertEqual(models.coalesce(deltas), deltas)
+
+
+class ObservableListTest(unittest.TestCase):
+    def test_deltas(self):
+        rows = models.ObservableList(range(5))
+        deltas = []
+        callback = lambda model, delta: deltas.append(delta)
+        rows.subscribe(callback)
+        rows.append(5)
+        rows.insert(-2, 'x')
+        rows[0] = 'y'
+        rows.pop(-1)
+        rows[1:3] = []
+        Delta = models.Delta
+        self.assertEqual(deltas, [Delta('insert', 5, 1), Delta('insert', 4, 1),
+                                  Delta('update', 0, 1), Delta('remove', 6, 1),
+                                  Delta('reset', None, 0)])
+
+
+class DeltaRecorder(npyscreen2.Widget):
+    def apply_deltas(self, deltas):
+        self.applied.append(deltas)
+        super(DeltaRecorder, self).apply_deltas(deltas)
+
+
+class ModelDeliveryTest(unittest.TestCase):
+    def test_changes_are_delivered_together_before_drawing(self):
+        def check(app):
+            form = npyscreen2.Form(parent_app=app)
+            widget = form.add(DeltaRecorder)
+            widget.applied = []
+            rows = models.ObservableList(['a', 'b', 'c'])
+            widget.bind(rows)
+            form.display()
+            self.assertEqual(widget.applied, [])
+            rows[1] = 'B'
+            rows[1] = 'BB'
+            rows.append('d')
+            self.assertEqual(widget.applied, [])
+            form.display()
+            Delta = models.Delta
+            self.assertEqual(widget.applied, [[Delta('update', 1, 1),
+                                               Delta('insert', 3, 1)]])
+            form.display()
+            self.assertEqual(len(widget.applied), 1)
+            form.release_pad()
+        headless(check)
+
+
+if __name__ == '__main__':
+    unittest.main()
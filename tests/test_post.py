@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import select
+import threading
+import time
+import unittest
+
+import npyscreen2
+
+from tests import headless
+
+
+def readable(waker, timeout):
+    return bool(select.select([waker], [], [], timeout)[0])
+
+
+class PostTest(unittest.TestCase):
+    def test_last_value_wins(self):
+        def check(app):
+            form = npyscreen2.Form(parent_app=app)
+            widget = form.add(npyscreen2.Widget, value='')
+            calls = []
+            for value in ('a', 'b', 'c'):
+                widget.post_value(value)
+            form.post(lambda: calls.append(widget.value))
+            widget.post_value('d')
+            version = widget.value_version
+            form.display()
+            result = (widget.value, calls, widget.value_version - version,
+                      form.posted_pending)
+            form.release_pad()
+            return result
+        #Only the last value is set, after the callback posted before it
+        self.assertEqual(headless(check), ('d', [''], 1, False))
+
+    def test_post_while_applying_wakes(self):
+        #An update posted while the updates are being taken is applied with
+        #them; one posted after the Waker has then been cleared must wake it
+        class PostingDeque(collections.deque):
+            def popleft(self):
+                if self.post is not None:
+                    post, self.post = self.post, None
+                    post()
+                return super(PostingDeque, self).popleft()
+
+        def check(app):
+            form = npyscreen2.Form(parent_app=app)
+            widget = form.add(npyscreen2.Widget)
+            form._posted = PostingDeque()
+            form._posted.post = lambda: widget.post_value('b')
+            widget.post_value('a')
+            form.apply_posted()
+            form.waker.clear()
+            taken = (widget.value, form.posted_pending)
+            widget.post_value('c')
+            result = (taken, readable(form.waker, 0))
+            form.release_pad()
+            return result
+        self.assertEqual(headless(check), (('b', False), True))
+
+    def test_threaded_producer_never_stalls(self):
+        count = 20000
+
+        def check(app):
+            form = npyscreen2.Form(parent_app=app)
+            widget = form.add(npyscreen2.Widget)
+
+            def produce():
+                for i in range(count):
+                    widget.post_value(i)
+                    if not i % 1000:
+                        time.sleep(0.001)
+            producer = threading.Thread(target=produce)
+            producer.start()
+            stalls = 0
+            deadline = time.monotonic() + 10
+            while widget.value != count - 1 and time.monotonic() < deadline:
+                #As the Form's wait for input does
+                if not readable(form.waker, 0.5):
+                    if form.posted_pending:
+                        stalls += 1
+                    continue
+                form.waker.clear()
+                form.apply_posted()
+            producer.join()
+            result = (widget.value, stalls)
+            form.release_pad()
+            return result
+        self.assertEqual(headless(check), (count - 1, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
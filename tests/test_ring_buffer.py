@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from multiprocessing import shared_memory
+
+from npyscreen2.ring_buffer import RingBuffer, RingBufferSource
+
+
+class RingBufferTest(unittest.TestCase):
+    def setUp(self):
+        self.ring = RingBuffer.create(channels=2, capacity=4)
+        self.addCleanup(self.ring.unlink)
+        self.addCleanup(self.ring.close)
+
+    def write(self, first, stop):
+        for i in range(first, stop):
+            self.ring.write((float(i), -float(i)))
+
+    def test_empty(self):
+        self.assertIsNone(self.ring.latest())
+        self.assertEqual(self.ring.read_since(0), (0, []))
+
+    def test_wrap_around(self):
+        self.write(0, 10)
+        self.assertEqual(self.ring.count, 10)
+        self.assertEqual(self.ring.latest(), (9.0, -9.0))
+        #The slot of the oldest sample may be being written, so one fewer than
+        #the capacity can be read
+        cursor, samples = self.ring.read_since(0)
+        self.assertEqual(cursor, 10)
+        self.assertEqual([sample[0] for sample in samples], [7.0, 8.0, 9.0])
+        self.assertEqual(self.ring.lost, 7)
+
+    def test_reading_across_the_wrap(self):
+        self.write(0, 3)
+        cursor, samples = self.ring.read_since(0)
+        self.assertEqual((cursor, len(samples)), (3, 3))
+        self.write(3, 6)
+        cursor, samples = self.ring.read_since(cursor)
+        self.assertEqual(cursor, 6)
+        self.assertEqual(samples, [(3.0, -3.0), (4.0, -4.0), (5.0, -5.0)])
+        self.assertEqual(self.ring.read_since(cursor), (6, []))
+        self.assertEqual(self.ring.lost, 0)
+
+    def test_falling_behind_loses_the_oldest(self):
+        cursor = 0
+        read = []
+        for stop in (2, 9, 10, 17):
+            self.write(self.ring.count, stop)
+            cursor, samples = self.ring.read_since(cursor)
+            read.extend(int(sample[0]) for sample in samples)
+        self.assertEqual(read, [0, 1, 6, 7, 8, 9, 14, 15, 16])
+        self.assertEqual(self.ring.lost, 17 - len(read))
+
+    def test_attached_by_name(self):
+        self.write(0, 5)
+        other = RingBuffer(self.ring.name)
+        try:
+            self.assertEqual((other.channels, other.capacity), (2, 4))
+            self.assertEqual(other.latest(), (4.0, -4.0))
+            self.ring.write((5.0, -5.0))
+            self.assertEqual(other.read_since(4), (6, [(4.0, -4.0),
+                                                       (5.0, -5.0)]))
+        finally:
+            other.close()
+
+    def test_source(self):
+        source = RingBufferSource(self.ring, ttl=1.0, clock=lambda: 0.0)
+        self.assertEqual(source.get(), (0.0, 0.0))
+        source.invalidate()
+        self.write(0, 6)
+        self.assertEqual(source.get(), (5.0, -5.0))
+
+
+class NotARingBufferTest(unittest.TestCase):
+    def test_rejected(self):
+        shm = shared_memory.SharedMemory(create=True, size=64)
+        try:
+            with self.assertRaises(ValueError):
+                RingBuffer(shm.name, track=True)
+        finally:
+            shm.close()
+            shm.unlink()
+
+
+if __name__ == '__main__':
+    unittest.main()
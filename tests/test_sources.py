@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import npyscreen2
+from npyscreen2 import DataSource, models
+
+from tests import headless
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class DeliveryTest(unittest.TestCase):
+    def test_changes_are_delivered_once(self):
+        def check(app):
+            clock = Clock()
+            stat = {'load': 1, 'rows': [1, 2]}
+            source = DataSource(lambda: stat, ttl=1.0, name='stat',
+                                clock=clock)
+            form = npyscreen2.Form(parent_app=app)
+            load = form.add(npyscreen2.Widget)
+            rows = form.add(npyscreen2.Widget)
+            load.subscribe(source, 'load')
+            rows.subscribe(source, 'rows')
+            self.assertEqual(source.publish(), 2)
+            self.assertIs(models.untracked(rows.value), stat['rows'])
+            versions = load.value_version, rows.value_version
+
+            clock.now = 2.0
+            self.assertEqual(source.publish(), 0)
+            self.assertEqual((load.value_version, rows.value_version),
+                             versions)
+
+            #The source changes and returns the same objects
+            clock.now = 4.0
+            stat['rows'].append(3)
+            self.assertEqual(source.publish(), 1)
+            self.assertEqual(rows.value, [1, 2, 3])
+            self.assertEqual((load.value_version, rows.value_version),
+                             (versions[0], versions[1] + 1))
+            form.release_pad()
+        headless(check)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+import npyscreen2
+from npyscreen2 import backends
+from npyscreen2.theme_managers import ThemeManager
+
+from tests import headless
+
+
+class RecompileTest(unittest.TestCase):
+    """
+    Changing the theme of a ThemeManager in use redraws the Forms using it.
+    """
+    def test_set_name_redraws(self):
+        def check(app):
+            theme_manager = ThemeManager()
+            form = npyscreen2.TraditionalForm(parent_app=app)
+            form.theme_manager = theme_manager
+            field = form.add(npyscreen2.TextField, height=1, value='abc',
+                             color='LABEL')
+            form._resize()
+            form.display()
+            screen = backends.get_backend().virtual
+            before = screen.cell(field.rely, field.relx)[1]
+            form.display()
+            self.assertEqual(form.widgets_redrawn, 0)
+
+            generation = theme_manager.generation
+            theme_manager.set_name('LABEL', 'RED_BLACK')
+            self.assertEqual(theme_manager.generation, generation + 1)
+            form.display()
+            self.assertGreater(form.widgets_redrawn, 0)
+            after = screen.cell(field.rely, field.relx)[1]
+            red = theme_manager.attr_table['LABEL']
+            self.assertNotEqual(before, after)
+            self.assertEqual(after & red, red)
+            form.release_pad()
+        headless(check)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+import os
+import unittest
+
+import npyscreen2
+from npyscreen2 import backends
+
+
+def open_fds():
+    return len(os.listdir('/proc/self/fd'))
+
+
+class QuittingForm(npyscreen2.TraditionalForm):
+    def __init__(self, *args, **kwargs):
+        super(QuittingForm, self).__init__(*args, **kwargs)
+        self.add_handlers({'^Q': self.switch})
+        #Something to edit, or the Form would not wait for input at all
+        self.add(npyscreen2.TextField, height=1)
+
+    def switch(self, inpt=None):
+        app = self.parent_app
+        app.switches += 1
+        app.fds.append(open_fds())
+        app.set_next_form('MAIN' if app.switches < 20 else None)
+        app.switch_form_now()
+
+
+@unittest.skipUnless(os.path.isdir('/proc/self/fd'), 'needs /proc/self/fd')
+class WakerTest(unittest.TestCase):
+    """
+    Forms rebuilt on every switch share the application's Waker, rather than
+    each opening a pipe.
+    """
+    def run_app(self, app_class, form_class=QuittingForm):
+        class SwitchingApp(app_class):
+            def on_start(self):
+                self.switches = 0
+                self.fds = []
+                self.add_form_class(form_class, 'MAIN')
+        app = SwitchingApp()
+        before = open_fds()
+        app.run(backend=backends.HeadlessBackend(keys=['^Q'] * 20))
+        self.assertEqual(app.switches, 20)
+        self.assertEqual(len(set(app.fds)), 1)
+        self.assertEqual(open_fds(), before)
+
+    def test_async_app(self):
+        self.run_app(npyscreen2.AsyncApp)
+
+    def test_npsapp(self):
+        #The Waker is only made when something is posted
+        class PostingForm(QuittingForm):
+            def switch(self, inpt=None):
+                self.post(lambda: None)
+                super(PostingForm, self).switch(inpt)
+        self.run_app(npyscreen2.NPSApp, PostingForm)
+
+
+if __name__ == '__main__':
+    unittest.main()